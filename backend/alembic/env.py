@@ -33,7 +33,8 @@ from app.models import (
     Milestone,
     MeetingNote,
     Comment,
-    Attachment
+    Attachment,
+    IdempotencyKey
 )
 
 # add your model's MetaData object here
@@ -0,0 +1,82 @@
+"""report history indexes and compression
+
+Revision ID: 3f1c9a2e7b10
+Revises:
+Create Date: 2026-10-19 09:00:00.000000
+
+Report periods and entries grow by one row per student every two weeks.
+Hot-path lookups are per student and recent, so they get a
+(student_id, start_date) btree; whole-history date scans get BRIN
+indexes, which stay tiny because rows are inserted in date order.
+The large free-text report columns are switched to lz4 TOAST
+compression (PostgreSQL 14+), which applies to newly written values.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f1c9a2e7b10"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COMPRESSED_COLUMNS = [
+    "accomplishments",
+    "blockers",
+    "next_period_plan",
+    "challenges",
+    "goals_next_quarter",
+    "training_completed",
+]
+
+
+def upgrade() -> None:
+    op.create_index(
+        "idx_report_periods_student_status",
+        "report_periods",
+        ["student_id", "status"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "idx_report_periods_status_due_date",
+        "report_periods",
+        ["status", "due_date"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "idx_report_periods_student_start_date",
+        "report_periods",
+        ["student_id", "start_date"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "brin_report_periods_start_date",
+        "report_periods",
+        ["start_date"],
+        postgresql_using="brin",
+        if_not_exists=True,
+    )
+    op.create_index(
+        "idx_report_entries_student_submitted_at",
+        "report_entries",
+        ["student_id", "submitted_at"],
+        if_not_exists=True,
+    )
+
+    for column in COMPRESSED_COLUMNS:
+        op.execute(f"ALTER TABLE report_entries ALTER COLUMN {column} SET COMPRESSION lz4")
+
+
+def downgrade() -> None:
+    for column in COMPRESSED_COLUMNS:
+        op.execute(f"ALTER TABLE report_entries ALTER COLUMN {column} SET COMPRESSION DEFAULT")
+
+    op.drop_index("idx_report_entries_student_submitted_at", table_name="report_entries")
+    op.drop_index("brin_report_periods_start_date", table_name="report_periods")
+    op.drop_index("idx_report_periods_student_start_date", table_name="report_periods")
+    op.drop_index("idx_report_periods_status_due_date", table_name="report_periods")
+    op.drop_index("idx_report_periods_student_status", table_name="report_periods")
@@ -0,0 +1,39 @@
+"""report entry derived metrics
+
+Revision ID: c4e81d0b9a52
+Revises: 8d2b6f4a1c37
+Create Date: 2026-10-19 15:00:00.000000
+
+Narrow metric columns computed when a report is submitted. Existing
+entries are filled by `python -m app.cli backfill-report-metrics`.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c4e81d0b9a52"
+down_revision: Union[str, None] = "8d2b6f4a1c37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("report_entries", sa.Column("accomplishments_words", sa.Integer(), nullable=True))
+    op.add_column("report_entries", sa.Column("blockers_words", sa.Integer(), nullable=True))
+    op.add_column("report_entries", sa.Column("next_period_plan_words", sa.Integer(), nullable=True))
+    op.add_column("report_entries", sa.Column("has_blockers", sa.Boolean(), nullable=True))
+    op.add_column("report_entries", sa.Column("time_allocation_entropy", sa.Float(), nullable=True))
+    op.add_column("report_entries", sa.Column("days_late", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("report_entries", "days_late")
+    op.drop_column("report_entries", "time_allocation_entropy")
+    op.drop_column("report_entries", "has_blockers")
+    op.drop_column("report_entries", "next_period_plan_words")
+    op.drop_column("report_entries", "blockers_words")
+    op.drop_column("report_entries", "accomplishments_words")
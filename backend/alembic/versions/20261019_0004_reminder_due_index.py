@@ -0,0 +1,34 @@
+"""partial index for due reminders
+
+Revision ID: 5a9e3c7d2f84
+Revises: c4e81d0b9a52
+Create Date: 2026-10-19 18:00:00.000000
+
+Reminder workers claim due rows with FOR UPDATE SKIP LOCKED ordered by
+scheduled_for; the partial index keeps that scan to unprocessed rows.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5a9e3c7d2f84"
+down_revision: Union[str, None] = "c4e81d0b9a52"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "idx_reminder_schedules_due",
+        "reminder_schedules",
+        ["scheduled_for"],
+        postgresql_where=sa.text("processed = false"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_reminder_schedules_due", table_name="reminder_schedules")
@@ -0,0 +1,61 @@
+"""email outbox
+
+Revision ID: 9b4d2e7f1a63
+Revises: 5a9e3c7d2f84
+Create Date: 2026-10-19 19:00:00.000000
+
+Emails are queued here in the same transaction as the change that
+triggers them and sent by the dispatcher (python -m app.cli
+dispatch-emails). The partial index keeps the dispatcher's claim scan to
+pending rows.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9b4d2e7f1a63"
+down_revision: Union[str, None] = "5a9e3c7d2f84"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "email_outbox",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("notification_log_id", sa.Integer(), nullable=True),
+        sa.Column("to_email", sa.String(length=255), nullable=False),
+        sa.Column("subject", sa.String(length=255), nullable=False),
+        sa.Column("template_name", sa.String(length=100), nullable=False),
+        sa.Column("context", sa.JSON(), nullable=False),
+        sa.Column("status", sa.Enum("PENDING", "SENT", "DEAD", name="outboxstatus"), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["notification_log_id"], ["notification_logs.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_email_outbox_id"), "email_outbox", ["id"], unique=False)
+    op.create_index(op.f("ix_email_outbox_user_id"), "email_outbox", ["user_id"], unique=False)
+    op.create_index(
+        "idx_email_outbox_due",
+        "email_outbox",
+        ["next_attempt_at"],
+        postgresql_where=sa.text("status = 'PENDING'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_email_outbox_due", table_name="email_outbox")
+    op.drop_index(op.f("ix_email_outbox_user_id"), table_name="email_outbox")
+    op.drop_index(op.f("ix_email_outbox_id"), table_name="email_outbox")
+    op.drop_table("email_outbox")
+    sa.Enum(name="outboxstatus").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,65 @@
+"""email digest items
+
+Revision ID: 2c7a5f9e3d18
+Revises: 9b4d2e7f1a63
+Create Date: 2026-10-19 20:00:00.000000
+
+Notifications for users on daily/weekly digests are held here until the
+digest job merges them into one email per user. The partial index covers
+the job's per-frequency, per-user scan of undigested items.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2c7a5f9e3d18"
+down_revision: Union[str, None] = "9b4d2e7f1a63"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Both enum types already exist (notification_preferences, notification_logs)
+    op.create_table(
+        "email_digest_items",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "frequency",
+            postgresql.ENUM("IMMEDIATE", "DAILY_DIGEST", "WEEKLY_DIGEST", name="emailfrequency", create_type=False),
+            nullable=False,
+        ),
+        sa.Column(
+            "type",
+            postgresql.ENUM(
+                "REMINDER", "ALERT", "FEEDBACK", "DEADLINE", "ANNOUNCEMENT",
+                name="notificationtype", create_type=False
+            ),
+            nullable=False,
+        ),
+        sa.Column("subject", sa.String(length=255), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("extra_data", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("digested_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_email_digest_items_id"), "email_digest_items", ["id"], unique=False)
+    op.create_index(
+        "idx_email_digest_items_pending",
+        "email_digest_items",
+        ["frequency", "user_id", "created_at"],
+        postgresql_where=sa.text("digested_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_email_digest_items_pending", table_name="email_digest_items")
+    op.drop_index(op.f("ix_email_digest_items_id"), table_name="email_digest_items")
+    op.drop_table("email_digest_items")
@@ -0,0 +1,44 @@
+"""composite and partial indexes for notification listing
+
+Revision ID: 7e3b9d1c5a26
+Revises: 2c7a5f9e3d18
+Create Date: 2026-10-19 23:00:00.000000
+
+GET /notifications filters on user_id and channel and orders by
+(created_at, id) descending. With only single-column indexes Postgres had
+to sort a user's whole history, and OFFSET pages then walked it again.
+The composite index returns rows already in order for keyset pagination.
+The partial index holds only unread rows, for unread-only listings and
+unread recounts.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7e3b9d1c5a26"
+down_revision: Union[str, None] = "2c7a5f9e3d18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "idx_notification_logs_user_channel_created",
+        "notification_logs",
+        ["user_id", "channel", sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+    op.create_index(
+        "idx_notification_logs_unread",
+        "notification_logs",
+        ["user_id", "channel", sa.text("created_at DESC"), sa.text("id DESC")],
+        postgresql_where=sa.text("read_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_notification_logs_unread", table_name="notification_logs")
+    op.drop_index("idx_notification_logs_user_channel_created", table_name="notification_logs")
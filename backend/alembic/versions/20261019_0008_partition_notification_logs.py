@@ -0,0 +1,164 @@
+"""partition notification_logs by month
+
+Revision ID: e5a1c8f3b947
+Revises: 7e3b9d1c5a26
+Create Date: 2026-10-19 23:30:00.000000
+
+notification_logs grows with every reminder, email and in-app event and
+nothing ever removed rows. The table is rebuilt as a RANGE partitioned
+table with one partition per month on created_at (plus a default
+partition as a safety net), so the retention job can detach and drop
+whole months instead of deleting row by row. Postgres requires the
+partition key in the primary key, which becomes (id, created_at); ids
+keep coming from the same sequence. email_outbox.notification_log_id
+loses its foreign key, since a referenced row may go away with its
+partition. notification_monthly_summaries keeps per-user counts of
+dropped months.
+
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5a1c8f3b947"
+down_revision: Union[str, None] = "7e3b9d1c5a26"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Matches NOTIFICATION_PARTITIONS_AHEAD; the retention job keeps it topped up
+PARTITIONS_AHEAD = 3
+
+COLUMNS = "id, user_id, type, channel, subject, content, sent_at, read_at, status, extra_data, created_at"
+
+NOTIFICATION_TYPE = postgresql.ENUM(
+    "REMINDER", "ALERT", "FEEDBACK", "DEADLINE", "ANNOUNCEMENT", name="notificationtype", create_type=False
+)
+NOTIFICATION_CHANNEL = postgresql.ENUM("EMAIL", "SLACK", "TEAMS", "IN_APP", name="notificationchannel", create_type=False)
+NOTIFICATION_STATUS = postgresql.ENUM(
+    "PENDING", "SENT", "FAILED", "BOUNCED", "READ", name="notificationstatus", create_type=False
+)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_listing_indexes() -> None:
+    op.create_index(
+        "idx_notification_logs_user_channel_created",
+        "notification_logs",
+        ["user_id", "channel", sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+    op.create_index(
+        "idx_notification_logs_unread",
+        "notification_logs",
+        ["user_id", "channel", sa.text("created_at DESC"), sa.text("id DESC")],
+        postgresql_where=sa.text("read_at IS NULL"),
+    )
+
+
+def upgrade() -> None:
+    op.drop_constraint("email_outbox_notification_log_id_fkey", "email_outbox", type_="foreignkey")
+
+    # Move the old table aside, freeing its index and constraint names
+    op.rename_table("notification_logs", "notification_logs_unpartitioned")
+    for index in (
+        "idx_notification_logs_unread",
+        "idx_notification_logs_user_channel_created",
+        "ix_notification_logs_created_at",
+        "ix_notification_logs_user_id",
+        "ix_notification_logs_id",
+    ):
+        op.drop_index(index, table_name="notification_logs_unpartitioned")
+    op.execute(
+        "ALTER TABLE notification_logs_unpartitioned "
+        "RENAME CONSTRAINT notification_logs_pkey TO notification_logs_unpartitioned_pkey"
+    )
+    op.execute("ALTER SEQUENCE notification_logs_id_seq OWNED BY NONE")
+
+    op.create_table(
+        "notification_logs",
+        sa.Column("id", sa.Integer(), server_default=sa.text("nextval('notification_logs_id_seq')"), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("type", NOTIFICATION_TYPE, nullable=False),
+        sa.Column("channel", NOTIFICATION_CHANNEL, nullable=False),
+        sa.Column("subject", sa.String(length=255), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.Column("read_at", sa.DateTime(), nullable=True),
+        sa.Column("status", NOTIFICATION_STATUS, nullable=False),
+        sa.Column("extra_data", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id", "created_at"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    op.execute("ALTER SEQUENCE notification_logs_id_seq OWNED BY notification_logs.id")
+
+    # One partition per month from the oldest row to a few months ahead
+    earliest = op.get_bind().execute(sa.text("SELECT min(created_at) FROM notification_logs_unpartitioned")).scalar()
+    this_month = datetime.utcnow().date().replace(day=1)
+    month = min(earliest.date(), this_month).replace(day=1) if earliest else this_month
+    while month <= add_months(this_month, PARTITIONS_AHEAD):
+        op.execute(
+            f"CREATE TABLE notification_logs_p{month:%Y%m} PARTITION OF notification_logs "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        )
+        month = add_months(month, 1)
+    op.execute("CREATE TABLE notification_logs_default PARTITION OF notification_logs DEFAULT")
+
+    op.execute(f"INSERT INTO notification_logs ({COLUMNS}) SELECT {COLUMNS} FROM notification_logs_unpartitioned")
+    op.drop_table("notification_logs_unpartitioned")
+    create_listing_indexes()
+
+    op.create_table(
+        "notification_monthly_summaries",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column("type", NOTIFICATION_TYPE, nullable=False),
+        sa.Column("channel", NOTIFICATION_CHANNEL, nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column("unread", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "month", "type", "channel"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("notification_monthly_summaries")
+
+    op.execute(
+        "CREATE TABLE notification_logs_unpartitioned "
+        "(LIKE notification_logs INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    )
+    op.execute(f"INSERT INTO notification_logs_unpartitioned ({COLUMNS}) SELECT {COLUMNS} FROM notification_logs")
+    op.execute("ALTER SEQUENCE notification_logs_id_seq OWNED BY NONE")
+    # Drops every partition with it
+    op.drop_table("notification_logs")
+    op.rename_table("notification_logs_unpartitioned", "notification_logs")
+    op.execute("ALTER SEQUENCE notification_logs_id_seq OWNED BY notification_logs.id")
+
+    op.create_primary_key("notification_logs_pkey", "notification_logs", ["id"])
+    op.create_foreign_key(
+        "notification_logs_user_id_fkey", "notification_logs", "users", ["user_id"], ["id"], ondelete="CASCADE"
+    )
+    op.create_index(op.f("ix_notification_logs_id"), "notification_logs", ["id"], unique=False)
+    op.create_index(op.f("ix_notification_logs_user_id"), "notification_logs", ["user_id"], unique=False)
+    op.create_index(op.f("ix_notification_logs_created_at"), "notification_logs", ["created_at"], unique=False)
+    create_listing_indexes()
+
+    # Outbox rows may point at log entries of dropped months
+    op.execute(
+        "UPDATE email_outbox SET notification_log_id = NULL WHERE notification_log_id IS NOT NULL "
+        "AND notification_log_id NOT IN (SELECT id FROM notification_logs)"
+    )
+    op.create_foreign_key(
+        "email_outbox_notification_log_id_fkey", "email_outbox", "notification_logs",
+        ["notification_log_id"], ["id"], ondelete="SET NULL"
+    )
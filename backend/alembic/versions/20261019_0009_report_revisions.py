@@ -0,0 +1,46 @@
+"""report revisions
+
+Revision ID: a3f7c2d9e410
+Revises: e5a1c8f3b947
+Create Date: 2026-10-19 23:40:00.000000
+
+Every report submit records the previous text as a revision: a full
+keyframe every REPORT_REVISION_KEYFRAME_INTERVAL revisions and line
+deltas in between. The unique (report_id, version) constraint also
+serves the per-report history lookups.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a3f7c2d9e410"
+down_revision: Union[str, None] = "e5a1c8f3b947"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "report_revisions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("report_id", sa.Integer(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("is_keyframe", sa.Boolean(), nullable=False),
+        sa.Column("data", sa.JSON(), nullable=False),
+        sa.Column("created_by_id", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["report_id"], ["report_entries.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["created_by_id"], ["users.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("report_id", "version", name="uq_report_revisions_report_version"),
+    )
+    op.create_index(op.f("ix_report_revisions_id"), "report_revisions", ["id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_report_revisions_id"), table_name="report_revisions")
+    op.drop_table("report_revisions")
@@ -0,0 +1,38 @@
+"""attachment content hashes and PhD plan attachments
+
+Revision ID: b8d4e1a6c273
+Revises: a3f7c2d9e410
+Create Date: 2026-10-19 23:50:00.000000
+
+Attachments are stored once per SHA-256 digest; the indexed sha256
+column finds the other attachments sharing a blob before it is deleted.
+PhD plan documents become attachments too, which needs a new value in
+the attachmententitytype enum.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b8d4e1a6c273"
+down_revision: Union[str, None] = "a3f7c2d9e410"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A new enum value cannot be used in the transaction that adds it
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE attachmententitytype ADD VALUE IF NOT EXISTS 'PHD_PLAN'")
+
+    op.add_column("attachments", sa.Column("sha256", sa.String(length=64), nullable=True))
+    op.create_index(op.f("ix_attachments_sha256"), "attachments", ["sha256"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_attachments_sha256"), table_name="attachments")
+    op.drop_column("attachments", "sha256")
+    # Postgres cannot drop enum values; PHD_PLAN stays in attachmententitytype
@@ -0,0 +1,64 @@
+"""webhook outbox
+
+Revision ID: d2f9a4b7e615
+Revises: b8d4e1a6c273
+Create Date: 2026-10-19 23:55:00.000000
+
+Slack/Teams messages were posted inline after the reminder transaction
+committed, so a crash or a failed post lost them and a slow webhook
+stalled the reminder worker. They are now queued here in the same
+transaction, like email_outbox, and sent by python -m app.cli
+dispatch-webhooks. Reuses the outboxstatus type of email_outbox.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d2f9a4b7e615"
+down_revision: Union[str, None] = "b8d4e1a6c273"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NOTIFICATION_CHANNEL = postgresql.ENUM("EMAIL", "SLACK", "TEAMS", "IN_APP", name="notificationchannel", create_type=False)
+OUTBOX_STATUS = postgresql.ENUM("PENDING", "SENT", "DEAD", name="outboxstatus", create_type=False)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "webhook_outbox",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("notification_log_id", sa.Integer(), nullable=True),
+        sa.Column("channel", NOTIFICATION_CHANNEL, nullable=False),
+        sa.Column("url", sa.String(length=500), nullable=False),
+        sa.Column("subject", sa.String(length=255), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("status", OUTBOX_STATUS, nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_webhook_outbox_id"), "webhook_outbox", ["id"], unique=False)
+    op.create_index(op.f("ix_webhook_outbox_user_id"), "webhook_outbox", ["user_id"], unique=False)
+    op.create_index(
+        "idx_webhook_outbox_due",
+        "webhook_outbox",
+        ["next_attempt_at"],
+        postgresql_where=sa.text("status = 'PENDING'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_webhook_outbox_due", table_name="webhook_outbox")
+    op.drop_index(op.f("ix_webhook_outbox_user_id"), table_name="webhook_outbox")
+    op.drop_index(op.f("ix_webhook_outbox_id"), table_name="webhook_outbox")
+    op.drop_table("webhook_outbox")
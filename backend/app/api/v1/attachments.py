@@ -0,0 +1,115 @@
+"""Attachment API endpoints."""
+
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, Query, Request, Header, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.deps import get_current_user
+from app.core.responses import RangeFileResponse
+from app.models.user import User
+from app.models.attachment import AttachmentEntityType
+from app.schemas.attachment import Attachment as AttachmentSchema, StorageUsage
+from app.services.attachment_service import AttachmentService
+
+router = APIRouter()
+
+
+@router.get("/usage", response_model=StorageUsage)
+async def get_storage_usage(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """Get storage used by the current user's uploads."""
+    used = await AttachmentService.get_used_storage(db, current_user.id)
+    return StorageUsage(used=used, quota=settings.ATTACHMENT_USER_QUOTA)
+
+
+@router.get("", response_model=List[AttachmentSchema])
+async def list_attachments(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    entity_type: AttachmentEntityType,
+    entity_id: int
+) -> Any:
+    """List attachments for a report, comment, project or meeting."""
+    await AttachmentService.check_entity_access(db, current_user, entity_type, entity_id)
+    return await AttachmentService.list_attachments(db, entity_type, entity_id)
+
+
+@router.post("", response_model=AttachmentSchema, status_code=status.HTTP_201_CREATED)
+async def upload_attachment(
+    request: Request,
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    entity_type: AttachmentEntityType,
+    entity_id: int,
+    filename: str = Query(..., min_length=1, max_length=255),
+    content_type: Optional[str] = Header(None),
+    content_length: Optional[int] = Header(None)
+) -> Any:
+    """
+    Upload a file as the raw request body.
+
+    The body is streamed to storage in chunks and hashed on the fly;
+    identical files are stored only once.
+    """
+    await AttachmentService.check_entity_access(db, current_user, entity_type, entity_id)
+
+    return await AttachmentService.store_upload(
+        db,
+        uploader=current_user,
+        entity_type=entity_type,
+        entity_id=entity_id,
+        original_name=filename,
+        mime_type=content_type,
+        chunks=request.stream(),
+        declared_size=content_length
+    )
+
+
+@router.get("/{attachment_id}", response_model=AttachmentSchema)
+async def get_attachment(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    attachment_id: int
+) -> Any:
+    """Get attachment metadata."""
+    return await AttachmentService.get_attachment(db, attachment_id, current_user)
+
+
+@router.get("/{attachment_id}/download")
+async def download_attachment(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    attachment_id: int,
+    range: Optional[str] = Header(None)
+) -> Any:
+    """Download attachment content. Supports HTTP Range requests."""
+    attachment = await AttachmentService.get_attachment(db, attachment_id, current_user)
+
+    return RangeFileResponse(
+        path=attachment.path,
+        size=attachment.size,
+        media_type=attachment.mime_type,
+        filename=attachment.original_name,
+        range_header=range,
+        etag=attachment.sha256
+    )
+
+
+@router.delete("/{attachment_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_attachment(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    attachment_id: int
+) -> None:
+    """Delete an attachment."""
+    await AttachmentService.delete_attachment(db, attachment_id, current_user)
@@ -1,13 +1,13 @@
 """Notification API endpoints."""
 
-from typing import Any, Optional
-from datetime import datetime
+from typing import Any, Optional, Tuple
+from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, and_, func
+from sqlalchemy import select, and_, func
 
 from app.core.database import get_db
-from app.core.deps import get_current_user
+from app.core.deps import get_current_user, require_admin
 from app.models.user import User
 from app.models.notification_preference import NotificationPreference
 from app.models.notification_log import NotificationLog, NotificationChannel, NotificationStatus, NotificationType
@@ -17,10 +17,19 @@ from app.schemas.notification import (
     NotificationPreferenceUpdate,
     InAppNotification,
     InAppNotificationList,
-    TestNotificationRequest
+    TestNotificationRequest,
+    AnnouncementCreate,
+    AnnouncementResult,
+    UnreadCount,
+    NotificationIds,
+    MarkAllRead,
+    BulkNotificationResult
 )
+from app.services.email_outbox import EmailOutboxService
 from app.services.email_service import email_service
 from app.services.notification_service import NotificationService
+from app.services.unread_counter import UnreadCounterService
+from app.services.webhook_delivery import WebhookDeliveryService
 
 router = APIRouter()
 
@@ -78,49 +87,56 @@ async def update_notification_preferences(
     return prefs
 
 
+def _parse_notification_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """Decode a ``<created_at>_<id>`` keyset cursor"""
+    if not cursor:
+        return None
+    try:
+        created_at, notification_id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(created_at), int(notification_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
 @router.get("", response_model=InAppNotificationList)
 async def get_notifications(
     *,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    unread_only: bool = False
+    unread_only: bool = False,
+    include_total: bool = Query(False, description="Also count all matching notifications")
 ) -> Any:
-    """Get user's in-app notifications."""
-    # Base query
-    query = select(NotificationLog).where(
-        and_(
+    """
+    Get user's in-app notifications, newest first.
+    Pass ``next_cursor`` back as ``cursor`` to get the next page; unlike
+    ``skip``, deep pages cost the same as the first one.
+    """
+    # The total needs a COUNT over all matching rows, so only on request
+    total = None
+    if include_total:
+        conditions = [
             NotificationLog.user_id == current_user.id,
             NotificationLog.channel == NotificationChannel.IN_APP
-        )
-    )
+        ]
+        if unread_only:
+            conditions.append(NotificationLog.read_at.is_(None))
+        total = await db.scalar(select(func.count(NotificationLog.id)).where(and_(*conditions)))
     
-    if unread_only:
-        query = query.where(NotificationLog.read_at.is_(None))
+    unread_count = await UnreadCounterService.get(db, current_user.id)
     
-    # Get total count
-    count_query = select(func.count()).select_from(query.subquery())
-    total = await db.scalar(count_query)
-    
-    # Get unread count
-    unread_query = select(func.count()).select_from(
-        select(NotificationLog).where(
-            and_(
-                NotificationLog.user_id == current_user.id,
-                NotificationLog.channel == NotificationChannel.IN_APP,
-                NotificationLog.read_at.is_(None)
-            )
-        ).subquery()
+    notifications = await NotificationService.list_in_app(
+        db, current_user.id,
+        unread_only=unread_only,
+        after=_parse_notification_cursor(cursor),
+        skip=skip,
+        limit=limit
     )
-    unread_count = await db.scalar(unread_query)
-    
-    # Get items
-    query = query.order_by(NotificationLog.created_at.desc())
-    query = query.offset(skip).limit(limit)
-    
-    result = await db.execute(query)
-    notifications = result.scalars().all()
     
     # Convert to InAppNotification schema
     items = []
@@ -135,10 +151,99 @@ async def get_notifications(
             extra_data=notif.extra_data
         ))
     
+    next_cursor = None
+    if len(notifications) == limit:
+        last = notifications[-1]
+        next_cursor = f"{last.created_at.isoformat()}_{last.id}"
+    
     return InAppNotificationList(
         items=items,
         total=total,
-        unread_count=unread_count
+        unread_count=unread_count,
+        next_cursor=next_cursor
+    )
+
+
+@router.post("/announcements", response_model=AnnouncementResult, status_code=status.HTTP_201_CREATED)
+async def create_announcement(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin),
+    announcement: AnnouncementCreate
+) -> Any:
+    """
+    Send an in-app announcement to all active users matching the audience
+    filters (admin only). Fan-out is a single INSERT ... SELECT.
+    """
+    announcement_id, recipients = await NotificationService.create_announcement(
+        db,
+        sender=current_user,
+        subject=announcement.subject,
+        content=announcement.content,
+        roles=announcement.roles,
+        program_types=announcement.program_types,
+        supervisor_ids=announcement.supervisor_ids
+    )
+    return AnnouncementResult(announcement_id=announcement_id, recipients=recipients)
+
+
+@router.get("/unread-count", response_model=UnreadCount)
+async def get_unread_count(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """Number of unread in-app notifications, served from a cached counter."""
+    return UnreadCount(unread_count=await UnreadCounterService.get(db, current_user.id))
+
+
+@router.post("/read", response_model=BulkNotificationResult)
+async def mark_notifications_read(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    request: NotificationIds
+) -> Any:
+    """Mark a list of notifications as read in one statement."""
+    marked = await NotificationService.mark_read(db, current_user.id, ids=request.ids)
+    return BulkNotificationResult(
+        updated=len(marked),
+        unread_count=await UnreadCounterService.get(db, current_user.id)
+    )
+
+
+@router.post("/read-all", response_model=BulkNotificationResult)
+async def mark_all_notifications_read(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    request: MarkAllRead
+) -> Any:
+    """
+    Mark all notifications as read, up to the ``up_to_id`` watermark so
+    ones that arrived after the client loaded its list stay unread.
+    """
+    marked = await NotificationService.mark_read(db, current_user.id, up_to_id=request.up_to_id)
+    return BulkNotificationResult(
+        updated=len(marked),
+        unread_count=await UnreadCounterService.get(db, current_user.id)
+    )
+
+
+@router.delete("", response_model=BulkNotificationResult)
+async def delete_old_notifications(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    older_than_days: int = Query(..., ge=0, le=3650)
+) -> Any:
+    """Delete notifications older than the given number of days."""
+    deleted = await NotificationService.delete_older_than(
+        db, current_user.id, before=datetime.utcnow() - timedelta(days=older_than_days)
+    )
+    return BulkNotificationResult(
+        updated=deleted,
+        unread_count=await UnreadCounterService.get(db, current_user.id)
     )
 
 
@@ -150,26 +255,22 @@ async def mark_notification_read(
     notification_id: int
 ) -> Any:
     """Mark a notification as read."""
-    # Get notification
-    stmt = select(NotificationLog).where(
-        and_(
-            NotificationLog.id == notification_id,
-            NotificationLog.user_id == current_user.id,
-            NotificationLog.channel == NotificationChannel.IN_APP
-        )
-    )
-    notification = await db.scalar(stmt)
+    marked = await NotificationService.mark_read(db, current_user.id, ids=[notification_id])
     
-    if not notification:
+    if not marked and not await db.scalar(
+        select(NotificationLog.id).where(
+            and_(
+                NotificationLog.id == notification_id,
+                NotificationLog.user_id == current_user.id,
+                NotificationLog.channel == NotificationChannel.IN_APP
+            )
+        )
+    ):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Notification not found"
         )
     
-    if not notification.read_at:
-        notification.read_at = datetime.utcnow()
-        await db.commit()
-    
     return {"message": "Notification marked as read"}
 
 
@@ -184,26 +285,28 @@ async def send_test_notification(
     # Determine email
     email = request.email or current_user.email
     
-    # Send test email
-    success = await email_service.send_test_email(email)
+    # Queue the test email and Slack/Teams messages; the dispatchers send them
+    await EmailOutboxService.enqueue(db, [{
+        "user_id": current_user.id,
+        "to_email": email,
+        **email_service.test_email(),
+        "log": {
+            "type": NotificationType.ANNOUNCEMENT,
+            "subject": "PhD Progress Tracker - Test Email",
+            "content": "Test email sent to verify configuration"
+        }
+    }], respect_quiet_hours=False)
+    prefs = await db.scalar(
+        select(NotificationPreference).where(NotificationPreference.user_id == current_user.id)
+    )
+    webhooks = await WebhookDeliveryService.enqueue(db, WebhookDeliveryService.messages_for(
+        prefs, current_user.id, NotificationType.ANNOUNCEMENT,
+        subject="PhD Progress Tracker - Test Notification",
+        content="Test notification sent to verify your webhook settings"
+    ))
+    await db.commit()
     
-    if success:
-        # Log the notification
-        notification_log = NotificationLog(
-            user_id=current_user.id,
-            type=NotificationType.ANNOUNCEMENT,
-            channel=NotificationChannel.EMAIL,
-            subject="PhD Progress Tracker - Test Email",
-            content="Test email sent to verify configuration",
-            sent_at=datetime.utcnow(),
-            status=NotificationStatus.SENT
-        )
-        db.add(notification_log)
-        await db.commit()
-        
-        return {"message": f"Test email sent to {email}"}
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to send test email"
-        )
\ No newline at end of file
+    return {
+        "message": f"Test email queued for {email}",
+        "webhooks_queued": webhooks
+    }
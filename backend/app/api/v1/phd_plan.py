@@ -3,8 +3,10 @@ from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.core.deps import get_current_user
-from app.models import User, UserRole
+from app.models import User, UserRole, PhDPlan, AttachmentEntityType
 from app.services.phd_plan_service_async import PhDPlanService
+from app.services.attachment_service import AttachmentService
+from app.services.storage import iter_upload_file
 from app.schemas.phd_plan import (
     PhDPlanResponse, PhDPlanUpdate, PhDPlanSubmit,
     PhDPlanApproval, PhDPlanVersionResponse
@@ -99,6 +101,38 @@ async def get_plan_history(
     except (ForbiddenException, NotFoundException) as e:
         raise HTTPException(status_code=e.status_code, detail=str(e))
 
+PLAN_DOCUMENT_MAX_SIZE = 5 * 1024 * 1024  # 5MB
+
+
+async def _store_plan_document(
+    db: AsyncSession,
+    plan_id: int,
+    file: UploadFile,
+    current_user: User,
+    document_field: str
+) -> None:
+    """Stream an uploaded plan document into attachment storage and link it to the plan"""
+    phd_plan = await db.get(PhDPlan, plan_id)
+    if not phd_plan:
+        raise HTTPException(status_code=404, detail="PhD plan not found")
+    if phd_plan.student_id != current_user.id:
+        raise HTTPException(status_code=403, detail="You can only upload documents to your own PhD plan")
+    
+    attachment = await AttachmentService.store_upload(
+        db,
+        uploader=current_user,
+        entity_type=AttachmentEntityType.PHD_PLAN,
+        entity_id=phd_plan.id,
+        original_name=file.filename,
+        mime_type=file.content_type,
+        chunks=iter_upload_file(file),
+        max_size=PLAN_DOCUMENT_MAX_SIZE,
+        declared_size=file.size
+    )
+    
+    setattr(phd_plan, document_field, attachment.id)
+    await db.commit()
+
 @router.post("/phd-plans/{plan_id}/proposal-upload")
 async def upload_proposal_document(
     plan_id: int,
@@ -107,12 +141,7 @@ async def upload_proposal_document(
     db: AsyncSession = Depends(get_db)
 ):
     """Upload proposal document (max 5MB)"""
-    # Check file size
-    if file.size > 5 * 1024 * 1024:  # 5MB
-        raise HTTPException(status_code=400, detail="File size exceeds 5MB limit")
-    
-    # TODO: Implement file upload handling
-    # This would save the file and update the phd_plan.proposal_document_id
+    await _store_plan_document(db, plan_id, file, current_user, "proposal_document_id")
     
     return {"message": "Proposal uploaded successfully"}
 
@@ -124,11 +153,6 @@ async def upload_expose_document(
     db: AsyncSession = Depends(get_db)
 ):
     """Upload exposé document (max 5MB)"""
-    # Check file size
-    if file.size > 5 * 1024 * 1024:  # 5MB
-        raise HTTPException(status_code=400, detail="File size exceeds 5MB limit")
-    
-    # TODO: Implement file upload handling
-    # This would save the file and update the phd_plan.expose_document_id
+    await _store_plan_document(db, plan_id, file, current_user, "expose_document_id")
     
     return {"message": "Exposé uploaded successfully"}
\ No newline at end of file
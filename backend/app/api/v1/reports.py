@@ -1,19 +1,31 @@
-from typing import Any, List, Optional, Dict
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import Any, List, Optional, Dict, Union, Tuple
+from datetime import date
+import io
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Body, Response, UploadFile, File
+from fastapi.responses import JSONResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
-from app.core.deps import get_current_user, require_student, require_supervisor
-from app.models import User, UserRole, ReportStatus, ReportPeriod, ReportEntry
+from app.core.deps import get_current_user, require_student, require_supervisor, require_admin, get_idempotent_request
+from app.models import User, UserRole, ReportStatus, ReportPeriod, ReportEntry, PeriodType
 from app.schemas.report import (
-    ReportPeriod as ReportPeriodSchema,
+    SupervisedReportPeriod, ReportPeriodWindow, SubmissionMatrix,
     ReportEntry as ReportEntrySchema,
     ReportEntryCreate, ReportEntryUpdate,
     CurrentPeriodResponse, ReportWithPeriod, QuickUpdate,
-    ReportComment, CommentResponse, AcknowledgmentRequest
+    ReportComment, CommentResponse, AcknowledgmentRequest,
+    BatchReportComment, BatchAcknowledgmentRequest, BatchItemResult, BatchResult,
+    ReportPatchOperation, ReportDraftDelta,
+    ReportRevisionInfo, ReportRevisionContent, ReportRevisionDiff,
+    ReportImportResult
 )
 from app.services.report import ReportService
+from app.services.idempotency import IdempotencyService, IdempotentRequest
+from app.services.report_revision import ReportRevisionService
+from app.services.report_matrix import ReportMatrixService
+from app.services.quarterly_report import QuarterlyReportService
+from app.services.report_import import ReportImportService, detect_format
 
 router = APIRouter()
 
@@ -63,77 +75,277 @@ async def get_current_period(
     )
 
 
-@router.get("/periods", response_model=List[ReportPeriodSchema])
+def _parse_period_cursor(cursor: Optional[str]) -> Optional[Tuple[date, int]]:
+    """Decode a ``<start_date>:<id>`` keyset cursor"""
+    if not cursor:
+        return None
+    try:
+        start_date, period_id = cursor.split(":")
+        return date.fromisoformat(start_date), int(period_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+@router.get("/periods", response_model=List[SupervisedReportPeriod])
 async def get_report_periods(
+    response: Response,
     status: Optional[ReportStatus] = Query(None),
+    student_id: Optional[int] = Query(None),
+    period_type: Optional[PeriodType] = Query(None),
+    start_from: Optional[date] = Query(None),
+    start_to: Optional[date] = Query(None),
+    cursor: Optional[str] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ) -> Any:
     """
-    List all report periods for a student.
-    Students see their own, supervisors see their students'.
+    List report periods, newest first.
+    Students see their own. Supervisors see their students' periods and
+    admins see all, each with the student name and report (if submitted).
+    Supervisor listings are keyset-paginated: pass the ``X-Next-Cursor``
+    response header back as ``cursor`` to get the next page.
     """
     if current_user.role == UserRole.STUDENT:
-        periods = await ReportService.get_report_periods(
+        return await ReportService.get_report_periods(
             db, current_user.id, status, limit, skip
         )
-    else:
-        # For supervisors, this would need to be modified to show all their students
-        # For now, return empty list
-        periods = []
+    
+    periods = await ReportService.get_supervised_periods(
+        db, current_user,
+        status=status,
+        student_id=student_id,
+        period_type=period_type,
+        start_from=start_from,
+        start_to=start_to,
+        after=_parse_period_cursor(cursor),
+        limit=limit
+    )
+    if len(periods) == limit:
+        last = periods[-1]
+        response.headers["X-Next-Cursor"] = f"{last['start_date'].isoformat()}:{last['id']}"
     
     return periods
 
 
+@router.get("/periods/windows", response_model=List[ReportPeriodWindow])
+async def get_report_period_windows(
+    status: Optional[ReportStatus] = Query(None),
+    student_id: Optional[int] = Query(None),
+    period_type: Optional[PeriodType] = Query(None),
+    start_from: Optional[date] = Query(None),
+    start_to: Optional[date] = Query(None),
+    before: Optional[date] = Query(None, description="Start date of the last window already fetched"),
+    limit: int = Query(6, ge=1, le=52, description="Number of window start dates"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_supervisor)
+) -> Any:
+    """
+    Students x periods for a supervisor, grouped by period window, newest first.
+    Fetched with one query.
+    """
+    return await ReportService.get_supervised_period_windows(
+        db, current_user,
+        status=status,
+        student_id=student_id,
+        period_type=period_type,
+        start_from=start_from,
+        start_to=start_to,
+        before=before,
+        limit=limit
+    )
+
+
+@router.get("/matrix", response_model=SubmissionMatrix)
+async def get_submission_matrix(
+    period_type: PeriodType = Query(PeriodType.BIWEEKLY),
+    start_from: Optional[date] = Query(None),
+    start_to: Optional[date] = Query(None),
+    encoding: str = Query("base64", pattern="^(base64|array)$"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_supervisor)
+) -> Any:
+    """
+    Submission heatmap (students x periods) for a supervisor's students.
+    Returned column-oriented with one status code per cell; cached server
+    side and tagged with an ETag until the group's reports change.
+    """
+    payload = await ReportMatrixService.get_matrix(
+        db, current_user, period_type, start_from, start_to, encoding
+    )
+    etag = f'"{payload["version"]}"'
+    if if_none_match == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    
+    # Already serialised; skip re-validating tens of thousands of cells
+    return JSONResponse(content=payload, headers={"ETag": etag})
+
+
+@router.post("/periods/{period_id}/compile", response_model=ReportEntrySchema)
+async def compile_quarterly_report(
+    period_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_student)
+) -> Any:
+    """
+    Pre-populate a quarterly report draft from the bi-weekly reports it covers.
+    Returns the existing entry unchanged if one was already started.
+    """
+    period = await db.get(ReportPeriod, period_id)
+    if not period or period.student_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Report period not found"
+        )
+    if period.period_type != PeriodType.QUARTERLY:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only quarterly periods can be compiled"
+        )
+    
+    report = await QuarterlyReportService.compile_for_period(db, period)
+    if not report:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No bi-weekly reports found in this quarter"
+        )
+    
+    return report
+
+
 @router.post("/submit", response_model=ReportEntrySchema)
 async def submit_report(
     report_data: ReportEntryCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_student)
+    current_user: User = Depends(require_student),
+    idempotency: Optional[IdempotentRequest] = Depends(get_idempotent_request)
 ) -> Any:
     """
     Submit or update report for current period.
     Supports draft saves (partial data).
     Auto-populates from previous period.
+    Retries with the same ``Idempotency-Key`` return the original response.
     """
-    # Verify the period belongs to the student
-    period = await db.get(ReportPeriod, report_data.period_id)
-    if not period or period.student_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Cannot submit report for this period"
+    async def handle() -> Any:
+        # Verify the period belongs to the student
+        period = await db.get(ReportPeriod, report_data.period_id)
+        if not period or period.student_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Cannot submit report for this period"
+            )
+        
+        # Check if period is still open
+        if period.status not in [ReportStatus.PENDING, ReportStatus.SUBMITTED, ReportStatus.OVERDUE]:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Report period is closed"
+            )
+        
+        report = await ReportService.submit_report(
+            db, current_user.id, report_data
         )
+        return ReportEntrySchema.model_validate(report)
     
-    # Check if period is still open
-    if period.status not in [ReportStatus.PENDING, ReportStatus.SUBMITTED]:
+    return await IdempotencyService.run(db, current_user.id, idempotency, handle)
+
+
+def _parse_if_match(if_match: Optional[str]) -> int:
+    """Extract the expected report version from an If-Match header"""
+    if if_match is None:
+        raise HTTPException(
+            status_code=status.HTTP_428_PRECONDITION_REQUIRED,
+            detail="If-Match header with the report version is required"
+        )
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Report period is closed"
+            detail="If-Match must contain the report version"
         )
+
+
+@router.patch("/{report_id}", response_model=ReportEntrySchema)
+async def patch_report_draft(
+    report_id: int,
+    response: Response,
+    changes: Union[List[ReportPatchOperation], ReportDraftDelta] = Body(...),
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_student)
+) -> Any:
+    """
+    Autosave a report draft with small deltas.
+    Accepts JSON-Patch operations (including text ``splice``) or a
+    field-level delta object. Requires ``If-Match: <version>``;
+    returns 409 if the report changed since that version and 422 if the
+    result would not be a valid report.
+    """
+    expected_version = _parse_if_match(if_match)
+    
+    if isinstance(changes, list):
+        operations = changes
+    else:
+        operations = ReportService.delta_to_operations(changes)
     
-    report = await ReportService.submit_report(
-        db, current_user.id, report_data
+    report = await ReportService.patch_report_draft(
+        db, report_id, current_user.id, expected_version, operations
     )
     
+    response.headers["ETag"] = f'"{report.version}"'
     return report
 
 
+@router.post("/import", response_model=ReportImportResult)
+async def import_reports(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|jsonl)$"),
+    batch_size: int = Query(5000, ge=100, le=50000),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+) -> Any:
+    """
+    Bulk import historical reports from CSV or JSONL (admin only).
+    Each row describes a period and its report. Rows are validated with
+    the normal report rules; invalid rows are reported and skipped.
+    """
+    file_format = format or detect_format(file.filename or "")
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    
+    try:
+        return await ReportImportService.import_stream(db, stream, file_format, batch_size)
+    finally:
+        stream.detach()
+
+
 @router.put("/{report_id}/quick-update", response_model=ReportEntrySchema)
 async def quick_update_report(
     update_data: QuickUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_student)
+    current_user: User = Depends(require_student),
+    idempotency: Optional[IdempotentRequest] = Depends(get_idempotent_request)
 ) -> Any:
     """
     Quick status update with optional short note.
     Creates a minimal report for the current period.
+    Retries with the same ``Idempotency-Key`` return the original response.
     """
-    report = await ReportService.quick_update_report(
-        db, None, current_user.id, update_data
-    )
-    return report
+    async def handle() -> Any:
+        report = await ReportService.quick_update_report(
+            db, None, current_user.id, update_data
+        )
+        return ReportEntrySchema.model_validate(report)
+    
+    return await IdempotencyService.run(db, current_user.id, idempotency, handle)
 
 
 @router.get("/{report_id}", response_model=ReportWithPeriod)
@@ -197,34 +409,28 @@ async def get_report_detail(
     )
 
 
-@router.post("/{report_id}/comment", response_model=CommentResponse)
-async def add_comment_to_report(
+async def _get_accessible_report(
+    db: AsyncSession,
     report_id: int,
-    comment_data: ReportComment,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-) -> Any:
-    """
-    Add comment to a report.
-    Students can comment on their own reports.
-    Supervisors can comment on their students' reports.
-    """
-    # Verify access to report
-    report = await ReportService.get_report_by_id(db, report_id)
+    current_user: User
+) -> ReportEntry:
+    """Load a report, checking the current user may view it"""
+    report = await db.get(ReportEntry, report_id)
     if not report:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Report not found"
         )
     
-    # Check permissions (similar to get_report_detail)
-    has_access = False
-    if current_user.role == UserRole.STUDENT and report.student_id == current_user.id:
-        has_access = True
-    elif current_user.role in [UserRole.SUPERVISOR, UserRole.ADMIN]:
-        # Check supervisor relationship
+    if current_user.role == UserRole.STUDENT:
+        if report.student_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Cannot access this report"
+            )
+    elif current_user.role == UserRole.SUPERVISOR:
         from app.models import StudentProfile
-        from sqlalchemy import select, or_
+        from sqlalchemy import or_
         
         result = await db.execute(
             select(StudentProfile).where(
@@ -235,53 +441,232 @@ async def add_comment_to_report(
                 )
             )
         )
-        if result.scalar_one_or_none():
-            has_access = True
+        if not result.scalar_one_or_none():
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Cannot access this student's report"
+            )
     
-    if not has_access:
+    return report
+
+
+@router.get("/{report_id}/revisions", response_model=List[ReportRevisionInfo])
+async def list_report_revisions(
+    report_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    List recorded revisions of a report, newest first.
+    """
+    await _get_accessible_report(db, report_id, current_user)
+    return await ReportRevisionService.list_revisions(db, report_id)
+
+
+@router.get("/{report_id}/revisions/diff", response_model=ReportRevisionDiff)
+async def diff_report_revisions(
+    report_id: int,
+    from_version: int = Query(..., ge=1),
+    to_version: int = Query(..., ge=1),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Diff two versions of a report field by field.
+    """
+    report = await _get_accessible_report(db, report_id, current_user)
+    
+    old = await ReportRevisionService.reconstruct(db, report_id, from_version)
+    new = await ReportRevisionService.reconstruct(db, report_id, to_version)
+    if old is None or new is None:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Cannot comment on this report"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Revision not found"
         )
     
-    comment = await ReportService.add_comment_to_report(
-        db, report_id, current_user.id,
-        comment_data.content, comment_data.visibility
+    changes = ReportRevisionService.diff(old, new, from_version, to_version)
+    if report.student_id != current_user.id:
+        changes.pop("wellbeing_note", None)  # Private to the student
+    
+    return ReportRevisionDiff(
+        report_id=report_id,
+        from_version=from_version,
+        to_version=to_version,
+        changes=changes
     )
+
+
+@router.get("/{report_id}/revisions/{version}", response_model=ReportRevisionContent)
+async def get_report_revision(
+    report_id: int,
+    version: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Reconstruct a report as it was at a given version.
+    """
+    report = await _get_accessible_report(db, report_id, current_user)
+    
+    content = await ReportRevisionService.reconstruct(db, report_id, version)
+    if content is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Revision not found"
+        )
+    if report.student_id != current_user.id:
+        content.pop("wellbeing_note", None)  # Private to the student
+    
+    return ReportRevisionContent(report_id=report_id, version=version, content=content)
+
+
+@router.post("/batch/comment", response_model=BatchResult)
+async def add_comment_to_reports(
+    comment_data: BatchReportComment,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    idempotency: Optional[IdempotentRequest] = Depends(get_idempotent_request)
+) -> Any:
+    """
+    Add the same comment to several reports.
+    Access is checked for all reports with one query; reports the user
+    cannot comment on are reported per item and do not fail the batch.
+    """
+    async def handle() -> Any:
+        accessible_ids = await ReportService.get_commentable_report_ids(
+            db, comment_data.report_ids, current_user
+        )
+        results = await ReportService.add_comments_to_reports(
+            db, comment_data.report_ids, accessible_ids, current_user.id,
+            comment_data.content, comment_data.visibility
+        )
+        return _batch_result(results)
     
-    return CommentResponse(
-        id=comment.id,
-        author_id=comment.author_id,
-        author_name=current_user.full_name,
-        content=comment.content,
-        visibility=comment.visibility,
-        created_at=comment.created_at,
-        edited_at=comment.edited_at
+    return await IdempotencyService.run(db, current_user.id, idempotency, handle)
+
+
+@router.post("/batch/acknowledge", response_model=BatchResult)
+async def acknowledge_reports(
+    ack_data: BatchAcknowledgmentRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_supervisor),
+    idempotency: Optional[IdempotentRequest] = Depends(get_idempotent_request)
+) -> Any:
+    """
+    Supervisor acknowledges several reports at once.
+    Returns a result per report.
+    """
+    async def handle() -> Any:
+        results = await ReportService.acknowledge_reports(
+            db, ack_data.report_ids, current_user.id, ack_data.comment
+        )
+        return _batch_result(results)
+    
+    return await IdempotencyService.run(db, current_user.id, idempotency, handle)
+
+
+def _batch_result(results: List[Dict[str, Any]]) -> BatchResult:
+    succeeded = sum(1 for item in results if item["success"])
+    return BatchResult(
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=[BatchItemResult(**item) for item in results]
     )
 
 
+@router.post("/{report_id}/comment", response_model=CommentResponse)
+async def add_comment_to_report(
+    report_id: int,
+    comment_data: ReportComment,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    idempotency: Optional[IdempotentRequest] = Depends(get_idempotent_request)
+) -> Any:
+    """
+    Add comment to a report.
+    Students can comment on their own reports.
+    Supervisors can comment on their students' reports.
+    Retries with the same ``Idempotency-Key`` return the original response.
+    """
+    async def handle() -> Any:
+        # Verify access to report
+        report = await ReportService.get_report_by_id(db, report_id)
+        if not report:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Report not found"
+            )
+    
+        # Check permissions (similar to get_report_detail)
+        has_access = False
+        if current_user.role == UserRole.STUDENT and report.student_id == current_user.id:
+            has_access = True
+        elif current_user.role in [UserRole.SUPERVISOR, UserRole.ADMIN]:
+            # Check supervisor relationship
+            from app.models import StudentProfile
+            from sqlalchemy import select, or_
+        
+            result = await db.execute(
+                select(StudentProfile).where(
+                    StudentProfile.user_id == report.student_id,
+                    or_(
+                        StudentProfile.supervisor_id == current_user.id,
+                        StudentProfile.co_supervisor_id == current_user.id
+                    )
+                )
+            )
+            if result.scalar_one_or_none():
+                has_access = True
+    
+        if not has_access:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Cannot comment on this report"
+            )
+    
+        comment = await ReportService.add_comment_to_report(
+            db, report_id, current_user.id,
+            comment_data.content, comment_data.visibility
+        )
+        return CommentResponse(
+            id=comment.id,
+            author_id=comment.author_id,
+            author_name=current_user.full_name,
+            content=comment.content,
+            visibility=comment.visibility,
+            created_at=comment.created_at,
+            edited_at=comment.edited_at
+        )
+    
+    return await IdempotencyService.run(db, current_user.id, idempotency, handle)
+
+
 @router.put("/{report_id}/acknowledge")
 async def acknowledge_report(
     report_id: int,
     ack_data: AcknowledgmentRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_supervisor)
+    current_user: User = Depends(require_supervisor),
+    idempotency: Optional[IdempotentRequest] = Depends(get_idempotent_request)
 ) -> Any:
     """
     Supervisor acknowledges a report.
     Adds an acknowledgment comment.
+    Retries with the same ``Idempotency-Key`` return the original response.
     """
-    success = await ReportService.acknowledge_report(
-        db, report_id, current_user.id, ack_data.comment
-    )
-    
-    if not success:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Cannot acknowledge this report"
+    async def handle() -> Any:
+        success = await ReportService.acknowledge_report(
+            db, report_id, current_user.id, ack_data.comment
         )
+        
+        if not success:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Cannot acknowledge this report"
+            )
+        return {"message": "Report acknowledged successfully"}
     
-    return {"message": "Report acknowledged successfully"}
+    return await IdempotencyService.run(db, current_user.id, idempotency, handle)
 
 
 @router.get("/supervisor/pending", response_model=List[Dict[str, Any]])
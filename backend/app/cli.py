@@ -0,0 +1,636 @@
+"""
+Command line entry point for maintenance and scheduled jobs.
+
+Usage (inside the backend container)::
+
+    python -m app.cli compile-quarterly [--date YYYY-MM-DD]
+    python -m app.cli import-reports FILE [--format csv|jsonl]
+    python -m app.cli sweep-overdue [--date YYYY-MM-DD]
+    python -m app.cli purge-idempotency-keys
+    python -m app.cli backfill-report-metrics [--all] [--batch-size N]
+    python -m app.cli process-reminders [--batch-size N]
+    python -m app.cli dispatch-emails [--once] [--batch-size N] [--concurrency N]
+    python -m app.cli replay-dead-emails [ID ...]
+    python -m app.cli dispatch-webhooks [--once] [--batch-size N]
+    python -m app.cli send-digests daily|weekly [--batch-size N]
+    python -m app.cli maintain-notification-logs [--retention-months N] [--no-summary]
+    python -m app.cli benchmark-email-rendering [--count N]
+    python -m app.cli benchmark-notification-listing USER_ID [--count N]
+    python -m app.cli benchmark-report-history STUDENT_ID [--periods N] [--repeat N]
+    python -m app.cli benchmark-reminders [--count N] [--batch-size N]
+    python -m app.cli mock-webhook-server [--port N] [--latency MS] [--rate-limit-every N]
+    python -m app.cli benchmark-webhooks URL [--count N] [--channel slack|teams] [--urls N]
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import date
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+from app.core.smtp import smtp_pool
+from app.core.webhooks import webhook_client
+
+
+async def _compile_quarterly(args: argparse.Namespace) -> None:
+    from app.services.quarterly_report import QuarterlyReportService
+
+    async with AsyncSessionLocal() as db:
+        created = await QuarterlyReportService.compile_quarter(
+            db, as_of=args.date, batch_size=args.batch_size
+        )
+    print(f"Compiled {created} quarterly report drafts")
+
+
+async def _import_reports(args: argparse.Namespace) -> None:
+    from app.services.report_import import ReportImportService, detect_format
+
+    file_format = args.format or detect_format(args.file)
+    with open(args.file, encoding="utf-8-sig", newline="") as stream:
+        async with AsyncSessionLocal() as db:
+            result = await ReportImportService.import_stream(db, stream, file_format, args.batch_size)
+
+    for error in result.errors:
+        print(f"row {error.row}: {'; '.join(error.errors)}")
+    print(
+        f"Imported {result.rows_imported} of {result.rows_total} rows "
+        f"({result.rows_skipped} already present, {result.rows_failed} failed, "
+        f"{result.periods_created} periods created) in {result.elapsed_seconds}s "
+        f"- {result.rows_per_second} rows/s"
+    )
+
+
+async def _sweep_overdue(args: argparse.Namespace) -> None:
+    from app.services.report import ReportService
+
+    async with AsyncSessionLocal() as db:
+        overdue = await ReportService.sweep_overdue_periods(db, today=args.date)
+    students = {period["student_id"] for period in overdue}
+    print(f"Marked {len(overdue)} report periods overdue for {len(students)} students")
+
+
+async def _purge_idempotency_keys(args: argparse.Namespace) -> None:
+    from app.services.idempotency import IdempotencyService
+
+    async with AsyncSessionLocal() as db:
+        purged = await IdempotencyService.purge_expired(db)
+    print(f"Purged {purged} expired idempotency keys")
+
+
+async def _backfill_report_metrics(args: argparse.Namespace) -> None:
+    from app.services.report_metrics import ReportMetricsService
+
+    async with AsyncSessionLocal() as db:
+        updated = await ReportMetricsService.backfill(
+            db, batch_size=args.batch_size, only_missing=not args.all
+        )
+    print(f"Computed metrics for {updated} report entries")
+
+
+async def _process_reminders(args: argparse.Namespace) -> None:
+    from app.services.notification_service import NotificationService
+
+    async with AsyncSessionLocal() as db:
+        queued = await NotificationService.process_due_reminders(db, batch_size=args.batch_size)
+    print(f"Queued {queued} reminder emails")
+
+
+async def _dispatch_emails(args: argparse.Namespace) -> None:
+    from app.services.email_outbox import EmailOutboxService
+
+    async with AsyncSessionLocal() as db:
+        while True:
+            totals = await EmailOutboxService.dispatch(
+                db, batch_size=args.batch_size, concurrency=args.concurrency
+            )
+            if args.once:
+                break
+            if not any(totals.values()):
+                await asyncio.sleep(settings.EMAIL_OUTBOX_POLL_SECONDS)
+    print(f"Sent {totals['sent']} emails ({totals['retried']} to retry, {totals['dead']} dead)")
+
+
+async def _dispatch_webhooks(args: argparse.Namespace) -> None:
+    from app.services.webhook_delivery import WebhookDeliveryService
+
+    async with AsyncSessionLocal() as db:
+        while True:
+            totals = await WebhookDeliveryService.dispatch(db, batch_size=args.batch_size)
+            if args.once:
+                break
+            if not any(totals.values()):
+                await asyncio.sleep(settings.WEBHOOK_OUTBOX_POLL_SECONDS)
+    print(f"Posted {totals['sent']} webhook notifications ({totals['retried']} to retry, {totals['dead']} dead)")
+
+
+async def _replay_dead_emails(args: argparse.Namespace) -> None:
+    from app.services.email_outbox import EmailOutboxService
+
+    async with AsyncSessionLocal() as db:
+        requeued = await EmailOutboxService.replay_dead(db, ids=args.ids)
+    print(f"Requeued {requeued} dead emails")
+
+
+async def _send_digests(args: argparse.Namespace) -> None:
+    from app.models import EmailFrequency
+    from app.services.email_digest import EmailDigestService
+
+    frequency = EmailFrequency.DAILY_DIGEST if args.frequency == "daily" else EmailFrequency.WEEKLY_DIGEST
+    async with AsyncSessionLocal() as db:
+        digests = await EmailDigestService.send_digests(db, frequency, batch_size=args.batch_size)
+    print(f"Queued {digests} {args.frequency} digest emails")
+
+
+async def _maintain_notification_logs(args: argparse.Namespace) -> None:
+    from app.services.notification_retention import NotificationRetentionService
+
+    async with AsyncSessionLocal() as db:
+        created = await NotificationRetentionService.ensure_partitions(db)
+        expired = await NotificationRetentionService.expire(
+            db, retention_months=args.retention_months, summarize=not args.no_summary
+        )
+    print(
+        f"Created {len(created)} notification log partitions, dropped {expired['partitions']} "
+        f"expired ones ({expired['users']} users affected)"
+    )
+
+
+async def _benchmark_email_rendering(args: argparse.Namespace) -> None:
+    import time
+
+    from app.services.email_service import email_service
+
+    email_service.preload()
+    reminder_types = ["T-3days", "T-0", "T+2days", "T+7days"]
+    emails = [
+        email_service.reminder_email(
+            user_name=f"Student {i}",
+            reminder_type=reminder_types[i % len(reminder_types)],
+            entity_type="report_period",
+            entity_details={"title": "Biweekly Report", "due_date": "October 31, 2026"}
+        )
+        for i in range(args.count)
+    ]
+
+    started = time.perf_counter()
+    for email in emails:
+        email_service.render(email["template_name"], email["context"])
+    single = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await email_service.render_many_async(emails)
+    bulk = time.perf_counter() - started
+
+    print(f"Rendered {args.count} reminder emails")
+    print(f"  one by one: {args.count / single:,.0f} emails/s")
+    print(f"  bulk:       {args.count / bulk:,.0f} emails/s")
+
+
+async def _benchmark_notification_listing(args: argparse.Namespace) -> None:
+    import time
+
+    from sqlalchemy import func, insert, literal, select, text
+
+    from app.models import NotificationLog, NotificationChannel, NotificationStatus, NotificationType
+    from app.services.notification_service import NotificationService
+
+    async with AsyncSessionLocal() as db:
+        # Seed rows inside the transaction and roll them back at the end
+        series = func.generate_series(1, args.count).table_valued("n").render_derived()
+        await db.execute(
+            insert(NotificationLog).from_select(
+                ["user_id", "type", "channel", "subject", "content", "status", "created_at", "extra_data"],
+                select(
+                    literal(args.user_id),
+                    literal(NotificationType.ALERT, NotificationLog.type.type),
+                    literal(NotificationChannel.IN_APP, NotificationLog.channel.type),
+                    literal("Benchmark notification"),
+                    literal("Benchmark notification"),
+                    literal(NotificationStatus.SENT, NotificationLog.status.type),
+                    func.timezone("utc", func.now()) - series.c.n * text("interval '1 minute'"),
+                    literal({}, NotificationLog.extra_data.type)
+                ).select_from(series)
+            )
+        )
+        await db.execute(text("ANALYZE notification_logs"))
+
+        print(f"Listing {args.limit} of {args.count} notifications for user {args.user_id}")
+        for depth in (0, args.count // 10, args.count // 2, args.count - args.limit):
+            started = time.perf_counter()
+            page = await NotificationService.list_in_app(db, args.user_id, skip=depth, limit=args.limit)
+            offset_ms = (time.perf_counter() - started) * 1000
+
+            # Keyset from the row just before the page, as a client would hold it
+            previous = await NotificationService.list_in_app(db, args.user_id, skip=depth - 1, limit=1) if depth else []
+            after = (previous[0].created_at, previous[0].id) if previous else None
+            started = time.perf_counter()
+            keyset_page = await NotificationService.list_in_app(db, args.user_id, after=after, limit=args.limit)
+            keyset_ms = (time.perf_counter() - started) * 1000
+
+            assert [row.id for row in page] == [row.id for row in keyset_page]
+            print(f"  row {depth:>7}: offset {offset_ms:8.1f} ms   cursor {keyset_ms:6.1f} ms")
+
+        await db.rollback()
+
+
+async def _benchmark_report_history(args: argparse.Namespace) -> None:
+    import statistics
+    import time
+    from datetime import timedelta
+
+    from sqlalchemy import DateTime, cast, func, insert, literal, select, text, true
+
+    from app.models import PeriodType, ReportEntry, ReportPeriod, ReportStatus, User, UserRole
+    from app.services.report import ReportService
+
+    async with AsyncSessionLocal() as db:
+        # Seed a bi-weekly history for every user inside the transaction and
+        # roll it back at the end
+        users = select(User.id.label("student_id")).subquery()
+        series = func.generate_series(1, args.periods).table_valued("n").render_derived()
+        start = func.current_date() - series.c.n * 14
+        await db.execute(
+            insert(ReportPeriod).from_select(
+                ["student_id", "period_type", "start_date", "end_date", "due_date", "status",
+                 "reminders_sent", "created_at", "updated_at"],
+                select(
+                    users.c.student_id,
+                    literal(PeriodType.BIWEEKLY, ReportPeriod.period_type.type),
+                    start,
+                    start + 13,
+                    start + 16,
+                    literal(ReportStatus.SUBMITTED, ReportPeriod.status.type),
+                    literal(0),
+                    func.timezone("utc", func.now()),
+                    func.timezone("utc", func.now())
+                ).select_from(users.join(series, true()))
+            )
+        )
+        await db.execute(
+            insert(ReportEntry).from_select(
+                ["period_id", "student_id", "submitted_at", "accomplishments", "next_period_plan",
+                 "time_allocation", "quarterly_achievements", "attachments", "tags", "is_locked", "version"],
+                select(
+                    ReportPeriod.id,
+                    ReportPeriod.student_id,
+                    cast(ReportPeriod.due_date, DateTime),
+                    literal("Benchmark accomplishments"),
+                    literal("Benchmark plan for the next period"),
+                    literal({"research": 100}, ReportEntry.time_allocation.type),
+                    literal({}, ReportEntry.quarterly_achievements.type),
+                    literal([], ReportEntry.attachments.type),
+                    literal([], ReportEntry.tags.type),
+                    literal(False),
+                    literal(1)
+                ).where(
+                    ReportPeriod.status == ReportStatus.SUBMITTED,
+                    ~select(ReportEntry.id).where(ReportEntry.period_id == ReportPeriod.id).exists()
+                )
+            )
+        )
+        await db.execute(text("ANALYZE report_periods"))
+        await db.execute(text("ANALYZE report_entries"))
+        periods = await db.scalar(select(func.count()).select_from(ReportPeriod))
+        entries = await db.scalar(select(func.count()).select_from(ReportEntry))
+
+        today = date.today()
+        # The query builder only reads the role of the listing user
+        admin = User(id=0, role=UserRole.ADMIN)
+        window_start = today - timedelta(days=14 * args.periods // 2)
+        queries = [
+            ("latest periods (student, start_date)",
+             lambda: ReportService.get_report_periods(db, args.student_id)),
+            ("submitted periods (student, status)",
+             lambda: ReportService.get_report_periods(db, args.student_id, status=ReportStatus.SUBMITTED)),
+            ("previous report (student, start_date)",
+             lambda: ReportService.get_previous_report(db, args.student_id, today)),
+            ("90-day window, all students (BRIN start_date)",
+             lambda: ReportService.get_supervised_periods(
+                 db, admin, start_from=window_start, start_to=window_start + timedelta(days=90), limit=100
+             )),
+        ]
+
+        print(f"Report history of {periods} periods and {entries} reports; median of {args.repeat} runs")
+        for label, query in queries:
+            runs = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                await query()
+                runs.append((time.perf_counter() - started) * 1000)
+            print(f"  {label:<48} {statistics.median(runs):8.2f} ms")
+
+        await db.rollback()
+
+
+async def _benchmark_reminders(args: argparse.Namespace) -> None:
+    import time
+
+    from sqlalchemy import func, insert, literal, select, text, true
+
+    from app.models import ReminderEntityType, ReminderSchedule, ReportPeriod
+    from app.services.notification_service import NotificationService
+    from app.services.unread_counter import UnreadCounterService
+
+    async with engine.connect() as connection:
+        # Everything, including the commits of each processed batch (which
+        # become savepoints), happens in one transaction that is rolled back
+        transaction = await connection.begin()
+        db = AsyncSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
+        user_ids = []
+        try:
+            periods = await db.scalar(select(func.count()).select_from(ReportPeriod))
+            if not periods:
+                print("No report periods to remind about; create some first")
+                return
+
+            # Due reminders for existing periods, several per period if needed
+            series = func.generate_series(1, -(-args.count // periods)).table_valued("n").render_derived()
+            await db.execute(
+                insert(ReminderSchedule).from_select(
+                    ["entity_type", "entity_id", "scheduled_for", "reminder_type", "processed",
+                     "user_id", "include_supervisor", "created_at"],
+                    select(
+                        literal(ReminderEntityType.REPORT_PERIOD, ReminderSchedule.entity_type.type),
+                        ReportPeriod.id,
+                        func.timezone("utc", func.now()) - series.c.n * text("interval '1 second'"),
+                        literal("T-0"),
+                        literal(False),
+                        ReportPeriod.student_id,
+                        literal(False),
+                        func.timezone("utc", func.now())
+                    )
+                    .select_from(ReportPeriod.__table__.join(series, true()))
+                    .limit(args.count)
+                )
+            )
+            pending = select(func.count()).select_from(ReminderSchedule).where(ReminderSchedule.processed == False)
+            user_ids = (await db.execute(
+                select(ReminderSchedule.user_id).where(ReminderSchedule.processed == False).distinct()
+            )).scalars().all()
+            await db.execute(text("ANALYZE reminder_schedules"))
+            await db.commit()
+
+            due = await db.scalar(pending)
+            started = time.perf_counter()
+            queued = await NotificationService.process_due_reminders(db, batch_size=args.batch_size)
+            elapsed = time.perf_counter() - started
+            processed = due - await db.scalar(pending)
+
+            print(f"Processed {processed} reminders for {len(user_ids)} users in batches of {args.batch_size}")
+            print(f"  {processed / elapsed:,.0f} reminders/s in {elapsed:.2f}s ({queued} emails queued)")
+        finally:
+            await db.close()
+            await transaction.rollback()
+
+    # Unread counters were bumped for the rolled back in-app notifications
+    await UnreadCounterService.reset(user_ids)
+
+
+async def _mock_webhook_server(args: argparse.Namespace) -> None:
+    """
+    Minimal HTTP/1.1 keep-alive server standing in for Slack/Teams: answers
+    every POST with 200 "ok" after ``--latency`` ms, and every
+    ``--rate-limit-every``-th one with 429 and Retry-After: 1.
+    """
+    stats = {"requests": 0, "limited": 0}
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                headers = dict(
+                    line.split(":", 1) for line in head.decode("latin-1").split("\r\n")[1:] if ":" in line
+                )
+                length = int(next((v for k, v in headers.items() if k.strip().lower() == "content-length"), 0))
+                await reader.readexactly(length)
+                stats["requests"] += 1
+                if args.latency:
+                    await asyncio.sleep(args.latency / 1000)
+                if args.rate_limit_every and stats["requests"] % args.rate_limit_every == 0:
+                    stats["limited"] += 1
+                    writer.write(b"HTTP/1.1 429 Too Many Requests\r\nRetry-After: 1\r\nContent-Length: 0\r\n\r\n")
+                else:
+                    writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\nContent-Length: 2\r\n\r\nok")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, args.host, args.port)
+    print(f"Mock webhook server on http://{args.host}:{args.port}/ (Ctrl+C to stop)")
+    async with server:
+        last = 0
+        while True:
+            await asyncio.sleep(5)
+            if stats["requests"] != last:
+                print(f"{stats['requests']} requests ({stats['limited']} rate limited)")
+                last = stats["requests"]
+
+
+async def _benchmark_webhooks(args: argparse.Namespace) -> None:
+    import time
+
+    from app.models import NotificationChannel, NotificationType
+    from app.services.webhook_delivery import WebhookDeliveryService
+
+    channel = NotificationChannel(args.channel)
+    # Spread the messages over several webhook URLs on the same host
+    messages = [
+        {
+            "user_id": i,
+            "channel": channel,
+            "url": f"{args.url.rstrip('/')}/hooks/{i % args.urls}",
+            "type": NotificationType.REMINDER,
+            "subject": f"Reminder {i}",
+            "content": "Your Biweekly Report is due on October 31, 2026",
+            "extra_data": {}
+        }
+        for i in range(args.count)
+    ]
+
+    started = time.perf_counter()
+    # The mock server is plain http on a local host, off the allowlist
+    errors = await WebhookDeliveryService.send(messages, check_urls=False)
+    elapsed = time.perf_counter() - started
+
+    failed = sum(1 for error in errors if error is not None)
+    print(f"Posted {args.count} {channel.value} notifications to {args.urls} webhooks ({failed} failed)")
+    print(f"  {args.count / elapsed:,.0f} notifications/s in {elapsed:.2f}s")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    compile_quarterly = subparsers.add_parser(
+        "compile-quarterly",
+        help="Pre-populate quarterly report drafts from bi-weekly entries"
+    )
+    compile_quarterly.add_argument("--date", type=date.fromisoformat, default=None,
+                                   help="Any day in the quarter to compile (default: today)")
+    compile_quarterly.add_argument("--batch-size", type=int, default=200)
+    compile_quarterly.set_defaults(handler=_compile_quarterly)
+
+    import_reports = subparsers.add_parser(
+        "import-reports",
+        help="Bulk import historical reports from CSV or JSONL"
+    )
+    import_reports.add_argument("file")
+    import_reports.add_argument("--format", choices=["csv", "jsonl"], default=None,
+                                help="Input format (default: from file extension)")
+    import_reports.add_argument("--batch-size", type=int, default=5000)
+    import_reports.set_defaults(handler=_import_reports)
+
+    sweep_overdue = subparsers.add_parser(
+        "sweep-overdue",
+        help="Mark pending report periods past their due date as overdue"
+    )
+    sweep_overdue.add_argument("--date", type=date.fromisoformat, default=None,
+                               help="Reference date (default: today)")
+    sweep_overdue.set_defaults(handler=_sweep_overdue)
+
+    purge_idempotency_keys = subparsers.add_parser(
+        "purge-idempotency-keys",
+        help="Delete expired Idempotency-Key records from the database fallback"
+    )
+    purge_idempotency_keys.set_defaults(handler=_purge_idempotency_keys)
+
+    backfill_report_metrics = subparsers.add_parser(
+        "backfill-report-metrics",
+        help="Compute derived metrics for existing report entries"
+    )
+    backfill_report_metrics.add_argument("--all", action="store_true",
+                                         help="Recompute every entry, not only those without metrics")
+    backfill_report_metrics.add_argument("--batch-size", type=int, default=1000)
+    backfill_report_metrics.set_defaults(handler=_backfill_report_metrics)
+
+    process_reminders = subparsers.add_parser(
+        "process-reminders",
+        help="Queue due reminders (safe to run in several workers at once)"
+    )
+    process_reminders.add_argument("--batch-size", type=int, default=settings.REMINDER_BATCH_SIZE)
+    process_reminders.set_defaults(handler=_process_reminders)
+
+    dispatch_emails = subparsers.add_parser(
+        "dispatch-emails",
+        help="Send queued emails from the outbox (safe to run in several workers at once)"
+    )
+    dispatch_emails.add_argument("--once", action="store_true",
+                                 help="Drain due emails and exit instead of polling")
+    dispatch_emails.add_argument("--batch-size", type=int, default=settings.EMAIL_OUTBOX_BATCH_SIZE)
+    dispatch_emails.add_argument("--concurrency", type=int, default=settings.EMAIL_OUTBOX_CONCURRENCY)
+    dispatch_emails.set_defaults(handler=_dispatch_emails)
+
+    replay_dead_emails = subparsers.add_parser(
+        "replay-dead-emails",
+        help="Requeue emails that failed too often (all, or the given outbox ids)"
+    )
+    replay_dead_emails.add_argument("ids", nargs="*", type=int)
+    replay_dead_emails.set_defaults(handler=_replay_dead_emails)
+
+    dispatch_webhooks = subparsers.add_parser(
+        "dispatch-webhooks",
+        help="Post queued Slack/Teams messages from the outbox (safe to run in several workers at once)"
+    )
+    dispatch_webhooks.add_argument("--once", action="store_true",
+                                   help="Drain due messages and exit instead of polling")
+    dispatch_webhooks.add_argument("--batch-size", type=int, default=settings.WEBHOOK_OUTBOX_BATCH_SIZE)
+    dispatch_webhooks.set_defaults(handler=_dispatch_webhooks)
+
+    send_digests = subparsers.add_parser(
+        "send-digests",
+        help="Merge held-back notifications into one digest email per user"
+    )
+    send_digests.add_argument("frequency", choices=["daily", "weekly"])
+    send_digests.add_argument("--batch-size", type=int, default=settings.EMAIL_DIGEST_BATCH_SIZE)
+    send_digests.set_defaults(handler=_send_digests)
+
+    maintain_notification_logs = subparsers.add_parser(
+        "maintain-notification-logs",
+        help="Create upcoming monthly notification log partitions and drop expired ones"
+    )
+    maintain_notification_logs.add_argument("--retention-months", type=int,
+                                            default=settings.NOTIFICATION_RETENTION_MONTHS)
+    maintain_notification_logs.add_argument("--no-summary", action="store_true",
+                                            help="Drop expired months without keeping per-user monthly counts")
+    maintain_notification_logs.set_defaults(handler=_maintain_notification_logs)
+
+    benchmark_email_rendering = subparsers.add_parser(
+        "benchmark-email-rendering",
+        help="Measure email template rendering throughput (emails/s)"
+    )
+    benchmark_email_rendering.add_argument("--count", type=int, default=5000)
+    benchmark_email_rendering.set_defaults(handler=_benchmark_email_rendering)
+
+    benchmark_notification_listing = subparsers.add_parser(
+        "benchmark-notification-listing",
+        help="Compare OFFSET and cursor pagination of a user's notifications (seeded rows are rolled back)"
+    )
+    benchmark_notification_listing.add_argument("user_id", type=int)
+    benchmark_notification_listing.add_argument("--count", type=int, default=100_000)
+    benchmark_notification_listing.add_argument("--limit", type=int, default=20)
+    benchmark_notification_listing.set_defaults(handler=_benchmark_notification_listing)
+
+    benchmark_report_history = subparsers.add_parser(
+        "benchmark-report-history",
+        help="Time the indexed report history queries over a seeded history (seeded rows are rolled back)"
+    )
+    benchmark_report_history.add_argument("student_id", type=int)
+    benchmark_report_history.add_argument("--periods", type=int, default=1000,
+                                          help="Bi-weekly periods seeded per user")
+    benchmark_report_history.add_argument("--repeat", type=int, default=20)
+    benchmark_report_history.set_defaults(handler=_benchmark_report_history)
+
+    benchmark_reminders = subparsers.add_parser(
+        "benchmark-reminders",
+        help="Measure reminder processing throughput over seeded due reminders (everything is rolled back)"
+    )
+    benchmark_reminders.add_argument("--count", type=int, default=10_000)
+    benchmark_reminders.add_argument("--batch-size", type=int, default=settings.REMINDER_BATCH_SIZE)
+    benchmark_reminders.set_defaults(handler=_benchmark_reminders)
+
+
+    mock_webhook_server = subparsers.add_parser(
+        "mock-webhook-server",
+        help="Run a local stand-in for Slack/Teams webhooks (for testing and benchmarks)"
+    )
+    mock_webhook_server.add_argument("--host", default="127.0.0.1")
+    mock_webhook_server.add_argument("--port", type=int, default=8099)
+    mock_webhook_server.add_argument("--latency", type=float, default=0, help="Response delay in ms")
+    mock_webhook_server.add_argument("--rate-limit-every", type=int, default=0,
+                                     help="Answer every Nth request with 429 (0: never)")
+    mock_webhook_server.set_defaults(handler=_mock_webhook_server)
+
+    benchmark_webhooks = subparsers.add_parser(
+        "benchmark-webhooks",
+        help="Measure webhook delivery throughput against a (mock) webhook server"
+    )
+    benchmark_webhooks.add_argument("url", help="Base URL, e.g. http://127.0.0.1:8099")
+    benchmark_webhooks.add_argument("--count", type=int, default=5000)
+    benchmark_webhooks.add_argument("--channel", choices=["slack", "teams"], default="slack")
+    benchmark_webhooks.add_argument("--urls", type=int, default=500,
+                                    help="Distinct webhook URLs (messages per URL are batched)")
+    benchmark_webhooks.set_defaults(handler=_benchmark_webhooks)
+
+    return parser
+
+
+async def _run(args: argparse.Namespace) -> None:
+    try:
+        await args.handler(args)
+    finally:
+        await smtp_pool.close()
+        await webhook_client.close()
+        await engine.dispose()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    args = build_parser().parse_args()
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -68,6 +68,58 @@ class Settings(BaseSettings):
     # Frontend URL for email links
     FRONTEND_URL: str = "http://localhost:5174"
     
+    # Quarterly reports are due this many days after the quarter ends
+    QUARTERLY_REPORT_DUE_DAYS: int = 14
+    
+    # Report revisions: store a full snapshot every N revisions, deltas in between
+    REPORT_REVISION_KEYFRAME_INTERVAL: int = 10
+    
+    # Idempotency-Key records (replayed responses) are kept this long
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 24 * 60 * 60
+    # A reservation whose request never finished (crash, cancellation) is released after this
+    IDEMPOTENCY_LOCK_TTL_SECONDS: int = 2 * 60
+    
+    # Timezone for users without a (valid) notification preference
+    DEFAULT_TIMEZONE: str = "Europe/Berlin"
+    
+    # Reminder workers: rows claimed per batch
+    REMINDER_BATCH_SIZE: int = 100
+    REMINDER_RETRY_SECONDS: int = 5 * 60  # First delay of a reminder that failed on its own
+    REMINDER_MAX_RETRY_SECONDS: int = 6 * 60 * 60
+    
+    # Email outbox dispatcher
+    EMAIL_OUTBOX_BATCH_SIZE: int = 100  # Messages leased per batch
+    EMAIL_OUTBOX_CONCURRENCY: int = 10  # SMTP sessions a batch is split across (capped by SMTP_POOL_SIZE)
+    EMAIL_OUTBOX_LEASE_SECONDS: int = 5 * 60  # Leased messages are retried after this if a worker dies
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 8  # Then the message is dead until replayed
+    EMAIL_OUTBOX_BACKOFF_SECONDS: int = 60  # First retry delay, doubled per attempt
+    EMAIL_OUTBOX_MAX_BACKOFF_SECONDS: int = 6 * 60 * 60
+    EMAIL_OUTBOX_POLL_SECONDS: float = 5  # Idle wait of a long-running dispatcher
+    
+    # Email template rendering
+    EMAIL_TEMPLATE_CACHE_DIR: Optional[str] = None  # Jinja bytecode cache (default: a temp dir)
+    EMAIL_RENDER_WORKERS: int = 2  # Threads rendering templates off the event loop
+    
+    # Digest job: users whose pending items are merged per batch
+    EMAIL_DIGEST_BATCH_SIZE: int = 500
+    
+    # Cached unread notification counters are recounted after this long
+    UNREAD_COUNT_TTL_SECONDS: int = 10 * 60
+    
+    # notification_logs is partitioned by month; expired months are dropped whole
+    NOTIFICATION_RETENTION_MONTHS: int = 12
+    NOTIFICATION_PARTITIONS_AHEAD: int = 3  # Future months created in advance
+    NOTIFICATION_RETENTION_SUMMARIZE: bool = True  # Keep per-user monthly counts of dropped months
+    
+    # Cached supervisor submission matrices (keyed by the group's last-change version)
+    REPORT_MATRIX_CACHE_TTL_SECONDS: int = 60 * 60
+    
+    # Attachment storage
+    ATTACHMENT_STORAGE_DIR: str = "/app/storage/attachments"
+    ATTACHMENT_CHUNK_SIZE: int = 1024 * 1024  # 1MB
+    ATTACHMENT_MAX_SIZE: int = 25 * 1024 * 1024  # 25MB per file
+    ATTACHMENT_USER_QUOTA: int = 500 * 1024 * 1024  # 500MB per user
+    
     @field_validator("BACKEND_CORS_ORIGINS", mode="before")
     def assemble_cors_origins(cls, v: Union[str, List[str]]) -> Union[List[str], str]:
         if isinstance(v, str) and not v.startswith("["):
@@ -85,6 +137,28 @@ class Settings(BaseSettings):
     EMAILS_FROM_EMAIL: Optional[str] = None
     EMAILS_FROM_NAME: Optional[str] = None
     
+    # SMTP connection pool
+    SMTP_POOL_SIZE: int = 4  # Persistent sessions per process
+    SMTP_TIMEOUT: float = 30  # Seconds per connect/command/message
+    SMTP_IDLE_TIMEOUT: float = 60  # Reconnect sessions idle longer than this
+    
+    # Slack/Teams webhook delivery (one pooled HTTP/2 client per process)
+    WEBHOOK_MAX_CONNECTIONS: int = 50
+    WEBHOOK_PER_HOST_CONCURRENCY: int = 10  # Requests in flight per webhook host
+    WEBHOOK_TIMEOUT: float = 10  # Seconds per request
+    WEBHOOK_KEEPALIVE_SECONDS: float = 60  # Idle connections are closed after this
+    WEBHOOK_MAX_RETRIES: int = 3  # After 429, 5xx or connection errors
+    WEBHOOK_MAX_RETRY_AFTER_SECONDS: float = 30  # A longer Retry-After fails the message
+    WEBHOOK_OUTBOX_BATCH_SIZE: int = 200  # Messages leased per batch
+    WEBHOOK_OUTBOX_LEASE_SECONDS: int = 5 * 60  # Leased messages are retried after this if a worker dies
+    WEBHOOK_OUTBOX_MAX_ATTEMPTS: int = 6  # Then the message is dead
+    WEBHOOK_OUTBOX_BACKOFF_SECONDS: int = 60  # First retry delay, doubled per attempt
+    WEBHOOK_OUTBOX_MAX_BACKOFF_SECONDS: int = 60 * 60
+    WEBHOOK_OUTBOX_POLL_SECONDS: float = 5  # Idle wait of a long-running dispatcher
+    # Webhook URLs must be https on these hosts ("*.example.com" matches subdomains)
+    SLACK_WEBHOOK_HOSTS: List[str] = ["hooks.slack.com"]
+    TEAMS_WEBHOOK_HOSTS: List[str] = ["*.webhook.office.com"]
+    
     # First superuser
     FIRST_SUPERUSER: str = "admin@example.com"
     FIRST_SUPERUSER_PASSWORD: str = "changethis"
@@ -1,5 +1,5 @@
 from typing import Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from jose import jwt, JWTError
@@ -7,6 +7,7 @@ from app.core.config import settings
 from app.core.database import get_db
 from app.models.user import User, UserRole
 from app.services.user import UserService
+from app.services.idempotency import IdempotentRequest, request_fingerprint
 from app.schemas.auth import TokenPayload
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
@@ -71,4 +72,18 @@ class RoleChecker:
 require_admin = RoleChecker([UserRole.ADMIN, UserRole.SYSTEM_ADMIN])
 require_supervisor = RoleChecker([UserRole.SUPERVISOR, UserRole.ADMIN, UserRole.SYSTEM_ADMIN])
 require_system_admin = RoleChecker([UserRole.SYSTEM_ADMIN])
-require_student = RoleChecker([UserRole.STUDENT])
\ No newline at end of file
+require_student = RoleChecker([UserRole.STUDENT])
+
+
+async def get_idempotent_request(
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, max_length=255)
+) -> Optional[IdempotentRequest]:
+    """Read the optional Idempotency-Key header and fingerprint the request"""
+    if not idempotency_key:
+        return None
+    body = await request.body()
+    return IdempotentRequest(
+        key=idempotency_key,
+        fingerprint=request_fingerprint(request.method, request.url.path, body)
+    )
@@ -0,0 +1,10 @@
+from redis.asyncio import Redis
+from app.core.config import settings
+
+# Shared client; connections are opened lazily from its pool
+redis_client = Redis.from_url(
+    settings.REDIS_URL,
+    decode_responses=True,
+    socket_connect_timeout=1,
+    socket_timeout=1
+)
@@ -0,0 +1,136 @@
+import asyncio
+import os
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import HTTPException
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+
+def parse_range_header(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range ``Range: bytes=...`` header.
+
+    Returns an inclusive (start, end) tuple, or None when the whole file
+    should be sent. Raises 416 for unsatisfiable ranges.
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+
+    spec = range_header[len("bytes="):].strip()
+    if "," in spec:
+        # Multipart ranges are not supported; fall back to the full body
+        return None
+
+    start_str, _, end_str = spec.partition("-")
+    try:
+        if start_str:
+            start = int(start_str)
+            end = int(end_str) if end_str else size - 1
+        else:
+            # Suffix range: last N bytes
+            suffix = int(end_str)
+            if suffix <= 0:
+                raise ValueError
+            start = max(size - suffix, 0)
+            end = size - 1
+    except ValueError:
+        return None
+
+    end = min(end, size - 1)
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+
+class RangeFileResponse(Response):
+    """
+    File response with HTTP Range support.
+
+    Uses the ASGI zero-copy send extension (``os.sendfile`` in the server)
+    when available, otherwise streams the requested byte range in chunks
+    read off the event loop.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        size: int,
+        media_type: str,
+        filename: str,
+        range_header: Optional[str] = None,
+        etag: Optional[str] = None
+    ):
+        byte_range = parse_range_header(range_header, size)
+        if byte_range is None:
+            self.start, self.end = 0, size - 1
+            self.status_code = 200
+        else:
+            self.start, self.end = byte_range
+            self.status_code = 206
+
+        self.path = path
+        self.media_type = media_type
+        self.background = None
+        self.body = b""
+
+        headers = {
+            "accept-ranges": "bytes",
+            "content-length": str(max(self.end - self.start + 1, 0)),
+            "content-disposition": f"attachment; filename*=utf-8''{quote(filename)}",
+        }
+        if self.status_code == 206:
+            headers["content-range"] = f"bytes {self.start}-{self.end}/{size}"
+        if etag:
+            headers["etag"] = f'"{etag}"'
+        self.init_headers(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+
+        count = self.end - self.start + 1
+        if scope.get("method") == "HEAD" or count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        fh = await asyncio.to_thread(open, self.path, "rb")
+        try:
+            if ZEROCOPY_EXTENSION in scope.get("extensions", {}):
+                await send({
+                    "type": ZEROCOPY_EXTENSION,
+                    "file": fh.fileno(),
+                    "offset": self.start,
+                    "count": count,
+                    "more_body": False,
+                })
+                return
+
+            await asyncio.to_thread(fh.seek, self.start, os.SEEK_SET)
+            remaining = count
+            while remaining > 0:
+                chunk = await asyncio.to_thread(fh.read, min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": remaining > 0,
+                })
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            await asyncio.to_thread(fh.close)
@@ -0,0 +1,192 @@
+"""Async SMTP transport with a bounded pool of persistent connections."""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from email.message import Message
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+import logging
+
+import aiosmtplib
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Errors after which a pooled connection cannot be trusted any more
+CONNECTION_ERRORS = (
+    aiosmtplib.SMTPServerDisconnected,
+    aiosmtplib.SMTPConnectError,
+    aiosmtplib.SMTPTimeoutError,
+    asyncio.TimeoutError,
+    ConnectionError,
+    OSError,
+)
+
+
+class SMTPConnectionPool:
+    """
+    Bounded pool of connected, authenticated SMTP sessions.
+
+    At most ``size`` sessions are open at once; idle sessions are reused
+    across messages (LIFO, so surplus ones age out) and dropped after
+    ``idle_timeout`` seconds, since servers close idle clients.
+    """
+
+    def __init__(
+        self,
+        hostname: Optional[str],
+        port: Optional[int],
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        start_tls: bool = False,
+        use_tls: bool = False,
+        size: int = 4,
+        timeout: float = 30,
+        idle_timeout: float = 60
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.start_tls = start_tls
+        self.use_tls = use_tls
+        self.size = size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._idle: List[Tuple[aiosmtplib.SMTP, float]] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            use_tls=self.use_tls,
+            start_tls=self.start_tls,
+            timeout=self.timeout
+        )
+        await client.connect()
+        if self.username and self.password:
+            await client.login(self.username, self.password)
+        return client
+
+    @staticmethod
+    async def _close(client: aiosmtplib.SMTP) -> None:
+        try:
+            if client.is_connected:
+                await client.quit()
+        except Exception:
+            client.close()
+
+    async def _acquire(self) -> aiosmtplib.SMTP:
+        now = time.monotonic()
+        while self._idle:
+            client, last_used = self._idle.pop()
+            if client.is_connected and now - last_used < self.idle_timeout:
+                return client
+            await self._close(client)
+        return await self._connect()
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosmtplib.SMTP]:
+        """Borrow a session; it goes back to the pool unless it failed."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.size)
+
+        async with self._semaphore:
+            client = await self._acquire()
+            try:
+                yield client
+            except CONNECTION_ERRORS:
+                client.close()
+                raise
+            except Exception:
+                # The message was rejected but the session is still usable
+                self._idle.append((client, time.monotonic()))
+                raise
+            else:
+                self._idle.append((client, time.monotonic()))
+
+    async def _send_on(
+        self,
+        client: aiosmtplib.SMTP,
+        message: Message,
+        recipients: Optional[Sequence[str]]
+    ) -> None:
+        await asyncio.wait_for(
+            client.send_message(message, recipients=recipients),
+            timeout=self.timeout
+        )
+
+    async def send(
+        self,
+        message: Message,
+        recipients: Optional[Sequence[str]] = None
+    ) -> None:
+        """Send one message, reconnecting once if the pooled session went stale."""
+        for attempt in range(2):
+            try:
+                async with self.connection() as client:
+                    await self._send_on(client, message, recipients)
+                return
+            except CONNECTION_ERRORS as e:
+                if attempt:
+                    raise
+                logger.warning(f"SMTP connection lost ({e}); reconnecting")
+
+    async def send_many(
+        self,
+        messages: Sequence[Tuple[Message, Optional[Sequence[str]]]]
+    ) -> List[Optional[str]]:
+        """
+        Send several messages back to back over one session.
+        A dropped connection is re-established and the remaining messages
+        continue on the new session. Returns the error text per message
+        (None if it was sent).
+        """
+        results: List[Optional[str]] = [None] * len(messages)
+        position = 0
+        reconnects = 0
+        while position < len(messages):
+            try:
+                async with self.connection() as client:
+                    while position < len(messages):
+                        message, recipients = messages[position]
+                        try:
+                            await self._send_on(client, message, recipients)
+                        except aiosmtplib.SMTPRecipientsRefused as e:
+                            logger.error(f"SMTP recipients refused: {e}")
+                            results[position] = f"{type(e).__name__}: {e}"
+                        except aiosmtplib.SMTPResponseException as e:
+                            logger.error(f"SMTP rejected message: {e}")
+                            results[position] = f"{type(e).__name__}: {e}"
+                        position += 1
+            except CONNECTION_ERRORS as e:
+                reconnects += 1
+                if reconnects > 1:
+                    logger.error(f"SMTP connection lost again ({e}); giving up on {len(messages) - position} messages")
+                    for i in range(position, len(messages)):
+                        results[i] = f"{type(e).__name__}: {e}"
+                    break
+                logger.warning(f"SMTP connection lost ({e}); reconnecting")
+                # The message in flight is retried on the new session
+        return results
+
+    async def close(self) -> None:
+        """Close all idle sessions."""
+        idle, self._idle = self._idle, []
+        for client, _ in idle:
+            await self._close(client)
+
+
+smtp_pool = SMTPConnectionPool(
+    hostname=settings.SMTP_HOST,
+    port=settings.SMTP_PORT,
+    username=settings.SMTP_USER,
+    password=settings.SMTP_PASSWORD,
+    start_tls=settings.SMTP_TLS,
+    use_tls=not settings.SMTP_TLS,
+    size=settings.SMTP_POOL_SIZE,
+    timeout=settings.SMTP_TIMEOUT,
+    idle_timeout=settings.SMTP_IDLE_TIMEOUT
+)
@@ -0,0 +1,164 @@
+"""Shared HTTP client for outgoing chat webhooks (Slack, Teams)."""
+
+import asyncio
+import random
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Sequence
+from urllib.parse import urlsplit
+import logging
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying; anything else 4xx means the payload or URL is wrong
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class WebhookError(Exception):
+    """A webhook post that failed for good (after retries, if any)."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Seconds from a Retry-After header (delta or HTTP date), if any."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_allowed_webhook_url(url: str, hosts: Sequence[str]) -> bool:
+    """
+    Whether ``url`` is an https URL on one of ``hosts`` (a ``*.`` prefix
+    matches any subdomain). Keeps user-supplied webhook URLs from making
+    the server post to internal addresses.
+    """
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return False
+    host = (parts.hostname or "").lower()
+    if parts.scheme != "https" or not host or parts.username or parts.password or port not in (None, 443):
+        return False
+    for pattern in hosts:
+        pattern = pattern.lower()
+        if pattern.startswith("*.") and host.endswith(pattern[1:]):
+            return True
+        if host == pattern:
+            return True
+    return False
+
+
+class WebhookClient:
+    """
+    One pooled httpx.AsyncClient for all webhook posts.
+
+    Connections are kept alive and multiplexed over HTTP/2 where the host
+    supports it, so posting to the same Slack/Teams endpoint does not pay a
+    TLS handshake per message. Each host gets at most ``per_host`` requests
+    in flight, and 429 responses are retried after their Retry-After.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 50,
+        per_host: int = 10,
+        timeout: float = 10,
+        keepalive_expiry: float = 60,
+        max_retries: int = 3,
+        max_retry_after: float = 30,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.max_connections = max_connections
+        self.per_host = per_host
+        self.timeout = timeout
+        self.keepalive_expiry = keepalive_expiry
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+        # Replaces the network, e.g. httpx.MockTransport in tests
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                timeout=self.timeout,
+                transport=self.transport,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=self.keepalive_expiry
+                )
+            )
+        return self._client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self._host_limits[host]
+
+    async def post(self, url: str, payload: Dict[str, Any]) -> None:
+        """
+        POST a JSON payload. Retries 429 (after Retry-After, when it is not
+        longer than ``max_retry_after``), 5xx and connection errors with
+        backoff; raises WebhookError once it gives up.
+        """
+        for attempt in range(self.max_retries + 1):
+            delay = min(2 ** attempt, self.max_retry_after) * random.uniform(0.8, 1.2)
+            try:
+                async with self._host_limit(url):
+                    response = await self.client.post(url, json=payload)
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    raise WebhookError(f"{type(e).__name__}: {e}")
+                logger.warning(f"Webhook post to {urlsplit(url).netloc} failed ({e}); retrying")
+            else:
+                if response.is_success:
+                    return
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    raise WebhookError(
+                        f"HTTP {response.status_code}: {response.text[:500]}", response.status_code
+                    )
+                if response.status_code == 429:
+                    retry_after = retry_after_seconds(response)
+                    if retry_after is not None:
+                        if retry_after > self.max_retry_after:
+                            raise WebhookError(f"Rate limited for {retry_after:.0f}s", 429)
+                        delay = retry_after
+            # Sleep outside the host limit so other posts can use the slot
+            await asyncio.sleep(delay)
+
+    async def close(self) -> None:
+        """Close pooled connections."""
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+
+webhook_client = WebhookClient(
+    max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+    per_host=settings.WEBHOOK_PER_HOST_CONCURRENCY,
+    timeout=settings.WEBHOOK_TIMEOUT,
+    keepalive_expiry=settings.WEBHOOK_KEEPALIVE_SECONDS,
+    max_retries=settings.WEBHOOK_MAX_RETRIES,
+    max_retry_after=settings.WEBHOOK_MAX_RETRY_AFTER_SECONDS
+)
@@ -4,14 +4,20 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.v1.api import api_router
 from app.core.database import engine
+from app.core.smtp import smtp_pool
+from app.core.webhooks import webhook_client
+from app.services.email_service import email_service
 from app.models import User, UserProfile  # Import models to ensure they're loaded
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    email_service.preload()
     yield
     # Shutdown
+    await smtp_pool.close()
+    await webhook_client.close()
     await engine.dispose()
 
 
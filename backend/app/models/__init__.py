@@ -2,6 +2,7 @@ from app.models.user import User, UserProfile, UserRole, UserStatus
 from app.models.student_profile import StudentProfile, ProgramType, StudentStatus as StudentProfileStatus
 from app.models.report_period import ReportPeriod, PeriodType, ReportStatus
 from app.models.report_entry import ReportEntry
+from app.models.report_revision import ReportRevision
 from app.models.research_project import ResearchProject, ProjectStatus, ProjectType
 from app.models.milestone import Milestone, MilestoneType, MilestoneStatus
 from app.models.meeting_note import MeetingNote
@@ -13,7 +14,12 @@ from app.models.phd_plan_version import PhDPlanVersion
 from app.models.phd_plan_approval import PhDPlanApproval
 from app.models.notification_preference import NotificationPreference, EmailFrequency
 from app.models.notification_log import NotificationLog, NotificationType, NotificationChannel, NotificationStatus
+from app.models.notification_monthly_summary import NotificationMonthlySummary
 from app.models.reminder_schedule import ReminderSchedule, ReminderEntityType
+from app.models.idempotency_key import IdempotencyKey
+from app.models.email_outbox import EmailOutbox, OutboxStatus
+from app.models.email_digest_item import EmailDigestItem
+from app.models.webhook_outbox import WebhookOutbox
 
 __all__ = [
     # User models
@@ -22,7 +28,7 @@ __all__ = [
     "StudentProfile", "ProgramType", "StudentProfileStatus",
     # Report models
     "ReportPeriod", "PeriodType", "ReportStatus",
-    "ReportEntry",
+    "ReportEntry", "ReportRevision",
     # Research models
     "ResearchProject", "ProjectStatus", "ProjectType",
     # Milestone models
@@ -41,5 +47,9 @@ __all__ = [
     # Notification models
     "NotificationPreference", "EmailFrequency",
     "NotificationLog", "NotificationType", "NotificationChannel", "NotificationStatus",
-    "ReminderSchedule", "ReminderEntityType"
+    "NotificationMonthlySummary",
+    "ReminderSchedule", "ReminderEntityType",
+    "EmailOutbox", "OutboxStatus", "EmailDigestItem", "WebhookOutbox",
+    # Request idempotency
+    "IdempotencyKey"
 ]
\ No newline at end of file
@@ -10,6 +10,7 @@ class AttachmentEntityType(str, Enum):
     PROJECT = "project"
     MEETING = "meeting"
     COMMENT = "comment"
+    PHD_PLAN = "phd_plan"
 
 
 class Attachment(Base):
@@ -23,6 +24,7 @@ class Attachment(Base):
     mime_type = Column(String(100), nullable=False)
     size = Column(Integer, nullable=False)  # File size in bytes
     path = Column(String(500), nullable=False)  # Storage path
+    sha256 = Column(String(64), nullable=True, index=True)  # Content hash, shared by deduplicated files
     
     # Ownership
     uploaded_by = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
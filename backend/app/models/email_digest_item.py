@@ -0,0 +1,35 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Index, Enum as SQLEnum, text
+from app.core.base import Base
+from app.models.notification_preference import EmailFrequency
+from app.models.notification_log import NotificationType
+
+
+class EmailDigestItem(Base):
+    """Email notification held back for a user's daily or weekly digest"""
+    __tablename__ = "email_digest_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    frequency = Column(SQLEnum(EmailFrequency), nullable=False)
+
+    type = Column(SQLEnum(NotificationType), nullable=False)
+    subject = Column(String(255), nullable=False)
+    content = Column(Text, nullable=False)
+    extra_data = Column(JSON, default=dict)
+
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Set when the item went into a digest email
+    digested_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # The digest job only reads undigested items, grouped by user
+        Index(
+            "idx_email_digest_items_pending",
+            "frequency", "user_id", "created_at",
+            postgresql_where=text("digested_at IS NULL")
+        ),
+    )
+
+    def __repr__(self):
+        return f"<EmailDigestItem(id={self.id}, user_id={self.user_id}, frequency={self.frequency})>"
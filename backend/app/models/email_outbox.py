@@ -0,0 +1,48 @@
+from datetime import datetime
+from enum import Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Index, Enum as SQLEnum, text
+from app.core.base import Base
+
+
+class OutboxStatus(str, Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    DEAD = "dead"  # Gave up after EMAIL_OUTBOX_MAX_ATTEMPTS
+
+
+class EmailOutbox(Base):
+    """Email queued in the same transaction as the change that caused it"""
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True)
+    # Log entry updated once the message is sent or given up on. No foreign
+    # key: notification_logs is partitioned and old months are dropped whole
+    notification_log_id = Column(Integer, nullable=True)
+
+    # Message, rendered by the dispatcher
+    to_email = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    template_name = Column(String(100), nullable=False)
+    context = Column(JSON, nullable=False, default=dict)
+
+    # Delivery state
+    status = Column(SQLEnum(OutboxStatus), default=OutboxStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # The dispatcher only ever scans pending rows in due order
+        Index(
+            "idx_email_outbox_due",
+            "next_attempt_at",
+            postgresql_where=text("status = 'PENDING'")
+        ),
+    )
+
+    def __repr__(self):
+        return f"<EmailOutbox(id={self.id}, to={self.to_email}, status={self.status})>"
@@ -0,0 +1,29 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, UniqueConstraint
+from app.core.base import Base
+
+
+class IdempotencyKey(Base):
+    """Database fallback for idempotency records when Redis is unavailable"""
+    __tablename__ = "idempotency_keys"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    key = Column(String(255), nullable=False)
+    
+    # SHA-256 of method, path and body of the original request
+    fingerprint = Column(String(64), nullable=False)
+    
+    # Stored response; status_code is NULL while the request is in progress
+    status_code = Column(Integer, nullable=True)
+    response = Column(JSON, nullable=True)
+    
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+    )
+    
+    def __repr__(self):
+        return f"<IdempotencyKey(user_id={self.user_id}, key={self.key}, status_code={self.status_code})>"
@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Index, Enum as SQLEnum, text
 from sqlalchemy.orm import relationship
 from app.core.base import Base
 
@@ -31,8 +31,10 @@ class NotificationStatus(str, Enum):
 class NotificationLog(Base):
     __tablename__ = "notification_logs"
     
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # The table is range-partitioned by month on created_at, which Postgres
+    # requires in the primary key; ids still come from one sequence
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     
     # Notification details
     type = Column(SQLEnum(NotificationType), nullable=False)
@@ -47,10 +49,26 @@ class NotificationLog(Base):
     
     # Additional data
     extra_data = Column(JSON, default=dict)  # For storing channel-specific info
-    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+    created_at = Column(DateTime, primary_key=True, nullable=False, default=datetime.utcnow)
     
     # Relationships
     user = relationship("User", back_populates="notification_logs")
     
+    __table_args__ = (
+        # A user's in-app list, newest first, keyset-paginated on (created_at, id)
+        Index(
+            "idx_notification_logs_user_channel_created",
+            "user_id", "channel", created_at.desc(), id.desc()
+        ),
+        # Unread-only listings and unread counts touch only unread rows
+        Index(
+            "idx_notification_logs_unread",
+            "user_id", "channel", created_at.desc(), id.desc(),
+            postgresql_where=text("read_at IS NULL")
+        ),
+        # Monthly partitions are created and dropped by NotificationRetentionService
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+    
     def __repr__(self):
         return f"<NotificationLog(id={self.id}, user_id={self.user_id}, type={self.type})>"
\ No newline at end of file
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey, Enum as SQLEnum
+from app.core.base import Base
+from app.models.notification_log import NotificationType, NotificationChannel
+
+
+class NotificationMonthlySummary(Base):
+    """Per-user monthly notification counts kept after the month's log partition is dropped"""
+    __tablename__ = "notification_monthly_summaries"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(Date, primary_key=True)  # First day of the month
+    type = Column(SQLEnum(NotificationType), primary_key=True)
+    channel = Column(SQLEnum(NotificationChannel), primary_key=True)
+
+    total = Column(Integer, nullable=False, default=0)
+    unread = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<NotificationMonthlySummary(user_id={self.user_id}, month={self.month}, type={self.type})>"
@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Index, Enum as SQLEnum, text
 from app.core.base import Base
 
 
@@ -35,5 +35,14 @@ class ReminderSchedule(Base):
     # Metadata
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     
+    __table_args__ = (
+        # Due-reminder claiming only ever scans unprocessed rows
+        Index(
+            "idx_reminder_schedules_due",
+            "scheduled_for",
+            postgresql_where=text("processed = false")
+        ),
+    )
+    
     def __repr__(self):
         return f"<ReminderSchedule(id={self.id}, entity={self.entity_type}, scheduled={self.scheduled_for})>"
\ No newline at end of file
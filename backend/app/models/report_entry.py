@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from app.core.base import Base
 
@@ -33,10 +33,23 @@ class ReportEntry(Base):
     is_locked = Column(Boolean, default=False)
     version = Column(Integer, default=1)
     
+    # Derived metrics, computed on submit (see app/services/report_metrics.py)
+    accomplishments_words = Column(Integer, nullable=True)
+    blockers_words = Column(Integer, nullable=True)
+    next_period_plan_words = Column(Integer, nullable=True)
+    has_blockers = Column(Boolean, nullable=True)
+    time_allocation_entropy = Column(Float, nullable=True)  # Shannon entropy in bits
+    days_late = Column(Integer, nullable=True)  # 0 when submitted by the due date
+    
     # Relationships
     report_period = relationship("ReportPeriod", foreign_keys=[period_id])
     student = relationship("User", foreign_keys=[student_id])
     # comments = relationship("Comment", back_populates="report_entry")
     
+    __table_args__ = (
+        # Index for a student's reports by submission time
+        Index("idx_report_entries_student_submitted_at", "student_id", "submitted_at"),
+    )
+    
     def __repr__(self):
         return f"<ReportEntry(id={self.id}, period_id={self.period_id}, student_id={self.student_id})>"
\ No newline at end of file
@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from app.core.base import Base
 
@@ -42,10 +42,15 @@ class ReportPeriod(Base):
     # report_entry = relationship("ReportEntry", back_populates="report_period", uselist=False)
     # meeting_notes = relationship("MeetingNote", back_populates="report_period")
     
-    # Indexes will be created in migration
     __table_args__ = (
         # Index for finding periods by student and status
-        # Will be created as: CREATE INDEX idx_report_periods_student_status ON report_periods(student_id, status);
+        Index("idx_report_periods_student_status", "student_id", "status"),
+        # Index for the overdue sweeper (pending periods by due date)
+        Index("idx_report_periods_status_due_date", "status", "due_date"),
+        # Index for a student's periods by recency (current/previous period lookups)
+        Index("idx_report_periods_student_start_date", "student_id", "start_date"),
+        # Block range index for date-range scans over the whole history
+        Index("brin_report_periods_start_date", "start_date", postgresql_using="brin"),
     )
     
     def __repr__(self):
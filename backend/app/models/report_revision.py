@@ -0,0 +1,31 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, Boolean, DateTime, ForeignKey, JSON, UniqueConstraint
+from sqlalchemy.orm import relationship
+from app.core.base import Base
+
+
+class ReportRevision(Base):
+    __tablename__ = "report_revisions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    report_id = Column(Integer, ForeignKey("report_entries.id", ondelete="CASCADE"), nullable=False)
+    version = Column(Integer, nullable=False)
+    
+    # Keyframes hold a full snapshot, other revisions a delta against the previous revision
+    is_keyframe = Column(Boolean, nullable=False, default=False)
+    data = Column(JSON, nullable=False)
+    
+    # Who and when
+    created_by_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    # Relationships
+    report = relationship("ReportEntry", foreign_keys=[report_id])
+    created_by = relationship("User", foreign_keys=[created_by_id])
+    
+    __table_args__ = (
+        UniqueConstraint("report_id", "version", name="uq_report_revisions_report_version"),
+    )
+    
+    def __repr__(self):
+        return f"<ReportRevision(report_id={self.report_id}, version={self.version}, keyframe={self.is_keyframe})>"
@@ -0,0 +1,43 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, Enum as SQLEnum, text
+from app.core.base import Base
+from app.models.email_outbox import OutboxStatus
+from app.models.notification_log import NotificationChannel
+
+
+class WebhookOutbox(Base):
+    """Slack/Teams message queued in the same transaction as the change that caused it"""
+    __tablename__ = "webhook_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Log entry updated once the message is sent or given up on. No foreign
+    # key: notification_logs is partitioned and old months are dropped whole
+    notification_log_id = Column(Integer, nullable=True)
+
+    # Message; messages to the same URL are merged into one post
+    channel = Column(SQLEnum(NotificationChannel), nullable=False)
+    url = Column(String(500), nullable=False)
+    subject = Column(String(255), nullable=False)
+    content = Column(Text, nullable=False)
+
+    # Delivery state
+    status = Column(SQLEnum(OutboxStatus), default=OutboxStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # The dispatcher only ever scans pending rows in due order
+        Index(
+            "idx_webhook_outbox_due",
+            "next_attempt_at",
+            postgresql_where=text("status = 'PENDING'")
+        ),
+    )
+
+    def __repr__(self):
+        return f"<WebhookOutbox(id={self.id}, channel={self.channel}, status={self.status})>"
@@ -0,0 +1,27 @@
+"""Attachment schemas."""
+
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+
+from app.models.attachment import AttachmentEntityType
+
+
+class Attachment(BaseModel):
+    id: int
+    original_name: str
+    mime_type: str
+    size: int
+    sha256: Optional[str] = None
+    uploaded_by: int
+    entity_type: AttachmentEntityType
+    entity_id: int
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class StorageUsage(BaseModel):
+    used: int
+    quota: int
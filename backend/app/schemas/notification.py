@@ -2,12 +2,24 @@
 
 from datetime import datetime
 from typing import Optional, Dict, Any, List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, validator
 
+from app.core.config import settings
+from app.core.webhooks import is_allowed_webhook_url
+from app.models.user import UserRole
+from app.models.student_profile import ProgramType
 from app.models.notification_preference import EmailFrequency
 from app.models.notification_log import NotificationType, NotificationChannel, NotificationStatus
 
 
+def _check_webhook_url(url: Optional[str], hosts: List[str], name: str) -> Optional[str]:
+    if not url:
+        return None
+    if not is_allowed_webhook_url(url, hosts):
+        raise ValueError(f"{name} webhook URL must be https on {', '.join(hosts)}")
+    return url
+
+
 # Notification Preferences
 class NotificationPreferenceBase(BaseModel):
     email_enabled: bool = True
@@ -21,7 +33,13 @@ class NotificationPreferenceBase(BaseModel):
 
 
 class NotificationPreferenceCreate(NotificationPreferenceBase):
-    pass
+    @validator('slack_webhook_url')
+    def validate_slack_webhook_url(cls, v):
+        return _check_webhook_url(v, settings.SLACK_WEBHOOK_HOSTS, "Slack")
+
+    @validator('teams_webhook_url')
+    def validate_teams_webhook_url(cls, v):
+        return _check_webhook_url(v, settings.TEAMS_WEBHOOK_HOSTS, "Teams")
 
 
 class NotificationPreferenceUpdate(BaseModel):
@@ -34,6 +52,14 @@ class NotificationPreferenceUpdate(BaseModel):
     quiet_hours: Optional[Dict[str, str]] = None
     timezone: Optional[str] = None
 
+    @validator('slack_webhook_url')
+    def validate_slack_webhook_url(cls, v):
+        return _check_webhook_url(v, settings.SLACK_WEBHOOK_HOSTS, "Slack")
+
+    @validator('teams_webhook_url')
+    def validate_teams_webhook_url(cls, v):
+        return _check_webhook_url(v, settings.TEAMS_WEBHOOK_HOSTS, "Teams")
+
 
 class NotificationPreference(NotificationPreferenceBase):
     user_id: int
@@ -84,10 +110,45 @@ class InAppNotification(BaseModel):
 
 class InAppNotificationList(BaseModel):
     items: List[InAppNotification]
-    total: int
+    total: Optional[int] = None  # Only with include_total=true
+    unread_count: int
+    next_cursor: Optional[str] = None  # None on the last page
+
+
+class UnreadCount(BaseModel):
+    unread_count: int
+
+
+class NotificationIds(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=500)
+
+
+class MarkAllRead(BaseModel):
+    # Newest notification id the client has seen; newer ones stay unread
+    up_to_id: Optional[int] = None
+
+
+class BulkNotificationResult(BaseModel):
+    updated: int
     unread_count: int
 
 
 # Test notification
 class TestNotificationRequest(BaseModel):
-    email: Optional[str] = None  # If not provided, use current user's email
\ No newline at end of file
+    email: Optional[str] = None  # If not provided, use current user's email
+
+
+# Announcements
+class AnnouncementCreate(BaseModel):
+    subject: str = Field(..., min_length=1, max_length=255)
+    content: str = Field(..., min_length=1)
+    # Audience: filters combine with AND, values within a filter with OR.
+    # Without any filter the announcement goes to all active users.
+    roles: List[UserRole] = []
+    program_types: List[ProgramType] = []
+    supervisor_ids: List[int] = []  # Students (co-)supervised by these users
+
+
+class AnnouncementResult(BaseModel):
+    announcement_id: str
+    recipients: int
@@ -1,4 +1,4 @@
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Union
 from datetime import date, datetime
 from pydantic import BaseModel, Field, validator
 from app.models.report_period import PeriodType, ReportStatus
@@ -49,6 +49,36 @@ class ReportPeriod(ReportPeriodBase):
         from_attributes = True
 
 
+class SupervisedReportPeriod(ReportPeriod):
+    """A report period as seen by a supervisor, with its student and report"""
+    student_name: Optional[str] = None
+    report_id: Optional[int] = None
+    report_submitted_at: Optional[datetime] = None
+
+
+class ReportPeriodWindow(BaseModel):
+    """All supervised students' periods sharing one period window"""
+    period_type: PeriodType
+    start_date: date
+    end_date: date
+    periods: List[SupervisedReportPeriod]
+
+
+class SubmissionMatrix(BaseModel):
+    """
+    Students x periods heatmap in columnar form.
+    ``cells`` is row-major (one row per student, one column per period start)
+    holding the status codes listed in ``codes``; with ``encoding="base64"``
+    it is the base64 of one byte per cell.
+    """
+    version: str
+    student_ids: List[int]
+    period_starts: List[date]
+    codes: Dict[str, int]
+    encoding: str
+    cells: Union[str, List[int]]
+
+
 class ReportEntryBase(BaseModel):
     accomplishments: str = Field(min_length=10)  # Reduced for testing
     blockers: Optional[str] = None
@@ -63,6 +93,45 @@ class ReportEntryCreate(ReportEntryBase):
     is_draft: bool = False
 
 
+class ReportImportRow(ReportEntryBase):
+    """One historical report row: the period plus its entry"""
+    student_email: Optional[str] = None
+    student_id: Optional[int] = None
+    period_type: PeriodType = PeriodType.BIWEEKLY
+    start_date: date
+    end_date: date
+    due_date: Optional[date] = None
+    submitted_at: Optional[datetime] = None
+    
+    @validator('end_date')
+    def validate_end_date(cls, v, values):
+        if 'start_date' in values and v < values['start_date']:
+            raise ValueError('end_date must not be before start_date')
+        return v
+    
+    @validator('student_id', always=True)
+    def validate_student(cls, v, values):
+        if v is None and not values.get('student_email'):
+            raise ValueError('student_email or student_id is required')
+        return v
+
+
+class ReportImportError(BaseModel):
+    row: int
+    errors: List[str]
+
+
+class ReportImportResult(BaseModel):
+    rows_total: int
+    rows_imported: int
+    rows_skipped: int  # Already present for that period
+    rows_failed: int
+    periods_created: int
+    elapsed_seconds: float
+    rows_per_second: float
+    errors: List[ReportImportError]
+
+
 class ReportEntryUpdate(BaseModel):
     accomplishments: Optional[str] = Field(None, min_length=10)  # Reduced for testing
     blockers: Optional[str] = None
@@ -73,6 +142,53 @@ class ReportEntryUpdate(BaseModel):
     is_draft: Optional[bool] = None
 
 
+DRAFT_TEXT_FIELDS = (
+    "accomplishments", "blockers", "next_period_plan",
+    "challenges", "goals_next_quarter", "training_completed", "wellbeing_note"
+)
+DRAFT_JSON_FIELDS = ("time_allocation", "tags", "quarterly_achievements")
+
+
+class ReportPatchOperation(BaseModel):
+    """
+    JSON-Patch style operation on a report draft.
+    
+    Supports add/replace/remove on top-level fields plus a ``splice`` op for
+    text fields, which replaces ``length`` characters at ``offset`` with
+    ``value`` so autosave only has to send the edited region.
+    """
+    op: str = Field(..., pattern="^(add|replace|remove|splice)$")
+    path: str = Field(..., pattern="^/[a-z_]+$")
+    value: Optional[Any] = None
+    offset: Optional[int] = Field(None, ge=0)
+    length: Optional[int] = Field(None, ge=0)
+    
+    @validator('path')
+    def validate_path(cls, v):
+        field = v.lstrip('/')
+        if field not in DRAFT_TEXT_FIELDS and field not in DRAFT_JSON_FIELDS:
+            raise ValueError(f'Field {field} cannot be patched')
+        return v
+    
+    @property
+    def field(self) -> str:
+        return self.path.lstrip('/')
+
+
+class ReportDraftDelta(BaseModel):
+    """Field-level delta: only the fields that changed since the last save."""
+    accomplishments: Optional[str] = None
+    blockers: Optional[str] = None
+    next_period_plan: Optional[str] = None
+    challenges: Optional[str] = None
+    goals_next_quarter: Optional[str] = None
+    training_completed: Optional[str] = None
+    wellbeing_note: Optional[str] = None
+    time_allocation: Optional[TimeAllocation] = None
+    tags: Optional[List[str]] = None
+    quarterly_achievements: Optional[Dict[str, Any]] = None
+
+
 class QuickUpdate(BaseModel):
     status: str = Field(..., pattern="^(steady_progress|focus_week|blocked)$")
     note: Optional[str] = Field(None, max_length=100)
@@ -124,4 +240,49 @@ class CommentResponse(BaseModel):
 
 class AcknowledgmentRequest(BaseModel):
     acknowledged: bool = True
-    comment: Optional[str] = Field(None, max_length=500)
\ No newline at end of file
+    comment: Optional[str] = Field(None, max_length=500)
+
+
+class BatchAcknowledgmentRequest(BaseModel):
+    report_ids: List[int] = Field(min_length=1, max_length=100)
+    comment: Optional[str] = Field(None, max_length=500)
+
+
+class BatchReportComment(ReportComment):
+    report_ids: List[int] = Field(min_length=1, max_length=100)
+
+
+class BatchItemResult(BaseModel):
+    report_id: int
+    success: bool
+    comment_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BatchResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BatchItemResult]
+
+
+class ReportRevisionInfo(BaseModel):
+    version: int
+    is_keyframe: bool
+    created_by_id: Optional[int] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class ReportRevisionContent(BaseModel):
+    report_id: int
+    version: int
+    content: Dict[str, Any]
+
+
+class ReportRevisionDiff(BaseModel):
+    report_id: int
+    from_version: int
+    to_version: int
+    changes: Dict[str, Any]  # text fields: unified diff lines, others: {"old", "new"}
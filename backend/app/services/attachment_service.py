@@ -0,0 +1,247 @@
+"""Attachment service for storing and retrieving uploaded files."""
+
+from typing import AsyncIterator, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, and_, or_
+import logging
+
+from app.core.config import settings
+from app.core.exceptions import BadRequestException, ForbiddenException, NotFoundException
+from app.models import (
+    User, UserRole, StudentProfile,
+    ReportEntry, ResearchProject, MeetingNote, Milestone,
+    Comment, EntityType, PhDPlan,
+    Attachment, AttachmentEntityType
+)
+from app.services.storage import storage_backend, StorageLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+
+ADMIN_ROLES = [UserRole.ADMIN, UserRole.SYSTEM_ADMIN]
+
+# Advisory lock namespaces (first key of pg_advisory_xact_lock)
+QUOTA_LOCK = 26001  # Second key: uploader id
+BLOB_LOCK = 26002  # Second key: hashtext(sha256)
+
+
+class AttachmentService:
+    """Service for attachment uploads, access control and cleanup."""
+
+    @staticmethod
+    async def _get_entity_student_id(
+        db: AsyncSession,
+        entity_type: AttachmentEntityType,
+        entity_id: int
+    ) -> Optional[int]:
+        """Resolve the student who owns the entity an attachment belongs to."""
+        if entity_type == AttachmentEntityType.REPORT:
+            return await db.scalar(select(ReportEntry.student_id).where(ReportEntry.id == entity_id))
+        if entity_type == AttachmentEntityType.PROJECT:
+            return await db.scalar(select(ResearchProject.student_id).where(ResearchProject.id == entity_id))
+        if entity_type == AttachmentEntityType.MEETING:
+            return await db.scalar(select(MeetingNote.student_id).where(MeetingNote.id == entity_id))
+        if entity_type == AttachmentEntityType.PHD_PLAN:
+            return await db.scalar(select(PhDPlan.student_id).where(PhDPlan.id == entity_id))
+        if entity_type == AttachmentEntityType.COMMENT:
+            comment = await db.get(Comment, entity_id)
+            if not comment:
+                return None
+            parent_models = {
+                EntityType.REPORT: ReportEntry,
+                EntityType.PROJECT: ResearchProject,
+                EntityType.MILESTONE: Milestone,
+                EntityType.MEETING: MeetingNote,
+            }
+            model = parent_models[comment.entity_type]
+            return await db.scalar(select(model.student_id).where(model.id == comment.entity_id))
+        return None
+
+    @staticmethod
+    async def check_entity_access(
+        db: AsyncSession,
+        user: User,
+        entity_type: AttachmentEntityType,
+        entity_id: int
+    ) -> None:
+        """Ensure the user may read or attach files to an entity."""
+        student_id = await AttachmentService._get_entity_student_id(db, entity_type, entity_id)
+        if student_id is None:
+            raise NotFoundException(f"{entity_type.value.capitalize()} not found")
+
+        if user.role in ADMIN_ROLES or user.id == student_id:
+            return
+
+        supervised = await db.scalar(
+            select(StudentProfile.user_id).where(
+                and_(
+                    StudentProfile.user_id == student_id,
+                    or_(
+                        StudentProfile.supervisor_id == user.id,
+                        StudentProfile.co_supervisor_id == user.id
+                    )
+                )
+            )
+        )
+        if not supervised:
+            raise ForbiddenException("Cannot access attachments for this item")
+
+    @staticmethod
+    async def _lock_quota(db: AsyncSession, user_id: int) -> None:
+        """Serialise quota checks of one uploader until the transaction ends."""
+        await db.execute(select(func.pg_advisory_xact_lock(QUOTA_LOCK, user_id)))
+
+    @staticmethod
+    async def _lock_blob(db: AsyncSession, sha256: str) -> None:
+        """
+        Serialise storing and deleting one digest's content until the
+        transaction ends, so a blob is never unlinked while an upload
+        deduplicates onto it.
+        """
+        await db.execute(select(func.pg_advisory_xact_lock(BLOB_LOCK, func.hashtext(sha256))))
+
+    @staticmethod
+    async def get_used_storage(db: AsyncSession, user_id: int) -> int:
+        """Total bytes of attachments uploaded by a user."""
+        used = await db.scalar(
+            select(func.coalesce(func.sum(Attachment.size), 0)).where(
+                Attachment.uploaded_by == user_id
+            )
+        )
+        return int(used or 0)
+
+    @staticmethod
+    async def store_upload(
+        db: AsyncSession,
+        uploader: User,
+        entity_type: AttachmentEntityType,
+        entity_id: int,
+        original_name: str,
+        mime_type: str,
+        chunks: AsyncIterator[bytes],
+        max_size: Optional[int] = None,
+        declared_size: Optional[int] = None
+    ) -> Attachment:
+        """
+        Stream an upload into storage and record it.
+
+        Size and quota limits are enforced while bytes arrive, so an
+        oversized upload is aborted without being written out in full.
+        Identical content is stored once and shared by all attachments
+        with the same SHA-256 digest.
+        """
+        max_size = max_size or settings.ATTACHMENT_MAX_SIZE
+        remaining_quota = settings.ATTACHMENT_USER_QUOTA - await AttachmentService.get_used_storage(db, uploader.id)
+        if remaining_quota <= 0:
+            raise BadRequestException("Storage quota exceeded")
+        limit = min(max_size, remaining_quota)
+
+        # Reject early when the client tells us the size up front
+        if declared_size is not None and declared_size > limit:
+            if declared_size > max_size:
+                raise BadRequestException(f"File size exceeds {max_size // (1024 * 1024)}MB limit")
+            raise BadRequestException("Storage quota exceeded")
+
+        # Do not sit idle in a transaction, holding a pooled connection, while
+        # a slow client sends the body; the quota is checked again below
+        await db.commit()
+        try:
+            sha256, size, tmp_path = await storage_backend.receive(chunks, limit)
+        except StorageLimitExceeded:
+            if limit == max_size:
+                raise BadRequestException(f"File size exceeds {max_size // (1024 * 1024)}MB limit")
+            raise BadRequestException("Storage quota exceeded")
+
+        try:
+            # Concurrent uploads may have used up the quota meanwhile; the
+            # check and the insert below run under the uploader's lock
+            await AttachmentService._lock_quota(db, uploader.id)
+            if await AttachmentService.get_used_storage(db, uploader.id) + size > settings.ATTACHMENT_USER_QUOTA:
+                raise BadRequestException("Storage quota exceeded")
+            await AttachmentService._lock_blob(db, sha256)
+            path, deduplicated = await storage_backend.store(tmp_path, sha256)
+        except BaseException:
+            await db.rollback()
+            await storage_backend.discard(tmp_path)
+            raise
+
+        attachment = Attachment(
+            filename=sha256,
+            original_name=(original_name or "upload")[:255],
+            mime_type=(mime_type or "application/octet-stream")[:100],
+            size=size,
+            path=path,
+            sha256=sha256,
+            uploaded_by=uploader.id,
+            entity_type=entity_type,
+            entity_id=entity_id
+        )
+        db.add(attachment)
+        await db.commit()
+        await db.refresh(attachment)
+
+        if deduplicated:
+            logger.info(f"Attachment {attachment.id} deduplicated against existing content {sha256}")
+
+        return attachment
+
+    @staticmethod
+    async def get_attachment(
+        db: AsyncSession,
+        attachment_id: int,
+        user: User
+    ) -> Attachment:
+        """Get an attachment the user is allowed to read."""
+        attachment = await db.get(Attachment, attachment_id)
+        if not attachment:
+            raise NotFoundException("Attachment not found")
+        await AttachmentService.check_entity_access(db, user, attachment.entity_type, attachment.entity_id)
+        return attachment
+
+    @staticmethod
+    async def list_attachments(
+        db: AsyncSession,
+        entity_type: AttachmentEntityType,
+        entity_id: int
+    ) -> List[Attachment]:
+        """List attachments for an entity."""
+        result = await db.execute(
+            select(Attachment).where(
+                and_(
+                    Attachment.entity_type == entity_type,
+                    Attachment.entity_id == entity_id
+                )
+            ).order_by(Attachment.created_at)
+        )
+        return result.scalars().all()
+
+    @staticmethod
+    async def delete_attachment(
+        db: AsyncSession,
+        attachment_id: int,
+        user: User
+    ) -> None:
+        """Delete an attachment, removing its content once no longer referenced."""
+        attachment = await db.get(Attachment, attachment_id)
+        if not attachment:
+            raise NotFoundException("Attachment not found")
+        if attachment.uploaded_by != user.id and user.role not in ADMIN_ROLES:
+            raise ForbiddenException("Only the uploader can delete this attachment")
+
+        sha256 = attachment.sha256
+        await db.delete(attachment)
+        await db.commit()
+
+        if sha256:
+            # Only once the row is gone for good, and under the digest lock so
+            # a concurrent upload of the same content cannot reuse the file
+            # while it is removed. A crash here leaves an orphaned file, never
+            # a row without content.
+            await AttachmentService._lock_blob(db, sha256)
+            still_referenced = await db.scalar(
+                select(func.count(Attachment.id)).where(Attachment.sha256 == sha256)
+            )
+            if not still_referenced:
+                await storage_backend.delete(sha256)
+            # Releases the lock
+            await db.commit()
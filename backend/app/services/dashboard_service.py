@@ -8,7 +8,7 @@ from sqlalchemy.orm import selectinload
 
 from app.models.user import User
 from app.models.student_profile import StudentProfile
-from app.models.report_period import ReportPeriod
+from app.models.report_period import ReportPeriod, ReportStatus, PeriodType
 from app.models.report_entry import ReportEntry
 from app.models.research_project import ResearchProject
 from app.models.milestone import Milestone
@@ -30,6 +30,9 @@ class DashboardService:
         today = datetime.utcnow().date()
         stmt = select(ReportPeriod).where(
             and_(
+                ReportPeriod.student_id == student_id,
+                ReportPeriod.period_type == PeriodType.BIWEEKLY,
+                ReportPeriod.start_date > today - timedelta(days=14),
                 ReportPeriod.start_date <= today,
                 ReportPeriod.end_date >= today
             )
@@ -73,9 +76,13 @@ class DashboardService:
         ).where(
             and_(
                 ReportEntry.student_id == student_id,
+                ReportPeriod.student_id == student_id,
+                ReportPeriod.start_date < current_period.start_date,
                 ReportPeriod.end_date < current_period.start_date
             )
-        ).order_by(ReportPeriod.end_date.desc()).limit(1)
+        ).options(
+            selectinload(ReportEntry.report_period)
+        ).order_by(ReportPeriod.start_date.desc()).limit(1)
         
         prev_entry = await db.scalar(prev_stmt)
         if prev_entry:
@@ -102,19 +109,6 @@ class DashboardService:
             } if not current_report else None
         }
     
-    @staticmethod
-    async def _get_current_period(db: AsyncSession) -> Optional[ReportPeriod]:
-        """Get the current active report period."""
-        today = datetime.utcnow().date()
-        stmt = select(ReportPeriod).where(
-            and_(
-                ReportPeriod.start_date <= today,
-                ReportPeriod.end_date >= today
-            )
-        ).order_by(ReportPeriod.start_date.desc()).limit(1)
-        
-        return await db.scalar(stmt)
-    
     @staticmethod
     async def get_student_dashboard(
         db: AsyncSession,
@@ -155,28 +149,31 @@ class DashboardService:
         deadlines = []
         now = datetime.utcnow()
         
-        # Get current and next report periods
-        current_period = await DashboardService._get_current_period(db)
-        if current_period:
-            # Check if report is submitted for current period
-            report_stmt = select(ReportEntry).where(
-                and_(
-                    ReportEntry.student_id == student_id,
-                    ReportEntry.period_id == current_period.id
+        # Open and overdue report periods (overdue status is maintained by the sweeper)
+        period_stmt = select(ReportPeriod).where(
+            and_(
+                ReportPeriod.student_id == student_id,
+                or_(
+                    ReportPeriod.status == ReportStatus.OVERDUE,
+                    and_(
+                        ReportPeriod.status == ReportStatus.PENDING,
+                        ReportPeriod.start_date <= now.date()
+                    )
                 )
             )
-            report = await db.scalar(report_stmt)
-            
-            if not report:
-                days_remaining = (current_period.end_date - now.date()).days
-                deadlines.append({
-                    "id": f"report-{current_period.id}",
-                    "title": f"{current_period.period_type.title()} Report Due",
-                    "type": "report",
-                    "dueDate": current_period.end_date.isoformat(),
-                    "status": "overdue" if days_remaining < 0 else "upcoming",
-                    "daysRemaining": days_remaining
-                })
+        ).order_by(ReportPeriod.due_date)
+        
+        periods = await db.scalars(period_stmt)
+        for period in periods:
+            days_remaining = (period.due_date - now.date()).days
+            deadlines.append({
+                "id": f"report-{period.id}",
+                "title": f"{period.period_type.value.title()} Report Due",
+                "type": "report",
+                "dueDate": period.due_date.isoformat(),
+                "status": "overdue" if period.status == ReportStatus.OVERDUE else "upcoming",
+                "daysRemaining": days_remaining
+            })
         
         # Get upcoming milestones
         milestone_stmt = select(Milestone).where(
@@ -349,7 +346,7 @@ class DashboardService:
         student_id: int
     ) -> int:
         """Calculate current submission streak for a student."""
-        # Get all report periods and submissions ordered by date
+        # Get the student's report periods and submissions ordered by date
         stmt = select(ReportPeriod, ReportEntry).select_from(
             ReportPeriod
         ).outerjoin(
@@ -359,13 +356,18 @@ class DashboardService:
                 ReportEntry.student_id == student_id
             )
         ).where(
-            ReportPeriod.end_date <= datetime.utcnow().date()
-        ).order_by(ReportPeriod.end_date.desc())
+            and_(
+                ReportPeriod.student_id == student_id,
+                ReportPeriod.period_type == PeriodType.BIWEEKLY,
+                ReportPeriod.end_date <= datetime.utcnow().date()
+            )
+        ).order_by(ReportPeriod.start_date.desc())
         
-        results = await db.execute(stmt)
+        # Stream newest first so a broken streak stops reading the history
+        results = await db.stream(stmt)
         
         streak = 0
-        for period, report in results:
+        async for period, report in results:
             if report and report.submitted_at <= datetime.combine(
                 period.end_date + timedelta(days=1),
                 datetime.min.time()
@@ -373,6 +375,7 @@ class DashboardService:
                 streak += 1
             else:
                 break
+        await results.close()
         
         return streak
     
@@ -500,18 +503,14 @@ class DashboardService:
         now = datetime.utcnow()
         
         # Check for overdue reports
-        current_period = await DashboardService._get_current_period(db)
-        if current_period:
-            report_stmt = select(ReportEntry).where(
-                and_(
-                    ReportEntry.student_id == student_id,
-                    ReportEntry.period_id == current_period.id
-                )
+        overdue_stmt = select(ReportPeriod.id).where(
+            and_(
+                ReportPeriod.student_id == student_id,
+                ReportPeriod.status == ReportStatus.OVERDUE
             )
-            current_report = await db.scalar(report_stmt)
-            
-            if not current_report and current_period.end_date < now.date():
-                return "needs_attention"
+        ).limit(1)
+        if await db.scalar(overdue_stmt):
+            return "needs_attention"
         
         # Check last report date
         if last_report:
@@ -536,45 +535,39 @@ class DashboardService:
     ) -> List[Dict[str, Any]]:
         """Get alerts for a supervisor."""
         alerts = []
+        today = datetime.utcnow().date()
         
-        # Get students
-        student_stmt = select(User).join(
+        # All overdue periods of supervised students in one query
+        stmt = select(ReportPeriod, User).join(
+            User, ReportPeriod.student_id == User.id
+        ).join(
             StudentProfile, User.id == StudentProfile.user_id
         ).where(
-            or_(
-                StudentProfile.supervisor_id == supervisor_id,
-                StudentProfile.co_supervisor_id == supervisor_id
+            and_(
+                or_(
+                    StudentProfile.supervisor_id == supervisor_id,
+                    StudentProfile.co_supervisor_id == supervisor_id
+                ),
+                ReportPeriod.status == ReportStatus.OVERDUE
             )
-        )
-        students = await db.scalars(student_stmt)
+        ).order_by(ReportPeriod.due_date)
         
-        for student in students:
-            # Check for overdue reports
-            current_period = await DashboardService._get_current_period(db)
-            if current_period:
-                report_stmt = select(ReportEntry).where(
-                    and_(
-                        ReportEntry.student_id == student.id,
-                        ReportEntry.period_id == current_period.id
-                    )
-                )
-                report = await db.scalar(report_stmt)
-                
-                if not report and current_period.end_date < datetime.utcnow().date():
-                    days_overdue = (datetime.utcnow().date() - current_period.end_date).days
-                    alerts.append({
-                        "id": f"overdue-{student.id}-{current_period.id}",
-                        "type": "overdue",
-                        "severity": "high" if days_overdue > 7 else "medium",
-                        "student": {
-                            "id": student.id,
-                            "email": student.email,
-                            "full_name": student.full_name
-                        },
-                        "message": f"Report is {days_overdue} days overdue",
-                        "createdAt": datetime.utcnow().isoformat(),
-                        "actionRequired": True
-                    })
+        results = await db.execute(stmt)
+        for period, student in results:
+            days_overdue = (today - period.due_date).days
+            alerts.append({
+                "id": f"overdue-{student.id}-{period.id}",
+                "type": "overdue",
+                "severity": "high" if days_overdue > 7 else "medium",
+                "student": {
+                    "id": student.id,
+                    "email": student.email,
+                    "full_name": student.full_name
+                },
+                "message": f"Report is {days_overdue} days overdue",
+                "createdAt": datetime.utcnow().isoformat(),
+                "actionRequired": True
+            })
         
         return alerts
     
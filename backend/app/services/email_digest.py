@@ -0,0 +1,143 @@
+"""Daily and weekly email digests for users who opted out of immediate emails."""
+
+import time
+from datetime import datetime
+from itertools import groupby
+from typing import Any, Dict, List
+from sqlalchemy import select, insert, update, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+from app.core.config import settings
+from app.models import User, NotificationPreference, EmailFrequency, EmailDigestItem, NotificationType
+from app.services.email_outbox import EmailOutboxService
+from app.services.email_service import email_service
+
+logger = logging.getLogger(__name__)
+
+
+class EmailDigestService:
+    """Service for holding back email notifications and merging them into digests."""
+
+    @staticmethod
+    async def queue(
+        db: AsyncSession,
+        items: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Hold notifications for the next digest.
+
+        Each dict needs user_id, frequency, type, subject and content
+        (extra_data optional). Does not commit.
+        """
+        if not items:
+            return 0
+
+        now = datetime.utcnow()
+        await db.execute(
+            insert(EmailDigestItem),
+            [
+                {
+                    "user_id": item["user_id"],
+                    "frequency": item["frequency"],
+                    "type": item["type"],
+                    "subject": item["subject"],
+                    "content": item["content"],
+                    "extra_data": item.get("extra_data") or {},
+                    "created_at": now
+                }
+                for item in items
+            ]
+        )
+        return len(items)
+
+    @staticmethod
+    async def send_digests(
+        db: AsyncSession,
+        frequency: EmailFrequency,
+        batch_size: int = settings.EMAIL_DIGEST_BATCH_SIZE
+    ) -> int:
+        """
+        Merge all pending items of one frequency into one email per user.
+
+        Users are walked in keyset-ordered batches; each batch's items are
+        read (and locked, so concurrent runs skip them) with a single query,
+        grouped per user, and turned into outbox emails in the same
+        transaction that marks the items digested.
+        Returns the number of digest emails queued.
+        """
+        started = time.monotonic()
+        digests = 0
+        items_count = 0
+        last_user_id = 0
+        while True:
+            user_batch = (
+                select(EmailDigestItem.user_id)
+                .where(
+                    and_(
+                        EmailDigestItem.frequency == frequency,
+                        EmailDigestItem.digested_at.is_(None),
+                        EmailDigestItem.user_id > last_user_id
+                    )
+                )
+                .distinct()
+                .order_by(EmailDigestItem.user_id)
+                .limit(batch_size)
+            )
+            result = await db.execute(
+                select(EmailDigestItem, User.email, User.full_name, NotificationPreference.email_enabled)
+                .join(User, User.id == EmailDigestItem.user_id)
+                .outerjoin(NotificationPreference, NotificationPreference.user_id == EmailDigestItem.user_id)
+                .where(
+                    and_(
+                        EmailDigestItem.frequency == frequency,
+                        EmailDigestItem.digested_at.is_(None),
+                        EmailDigestItem.user_id.in_(user_batch)
+                    )
+                )
+                .order_by(EmailDigestItem.user_id, EmailDigestItem.created_at)
+                .with_for_update(of=EmailDigestItem, skip_locked=True)
+            )
+            rows = result.all()
+            if not rows:
+                await db.commit()
+                break
+            last_user_id = rows[-1][0].user_id
+
+            emails = []
+            for user_id, user_rows in groupby(rows, key=lambda row: row[0].user_id):
+                user_rows = list(user_rows)
+                _, to_email, user_name, email_enabled = user_rows[0]
+                if email_enabled is False:
+                    # Email was switched off after the items were queued
+                    continue
+                items = [row[0] for row in user_rows]
+                types = {item.type for item in items}
+                emails.append({
+                    "user_id": user_id,
+                    "to_email": to_email,
+                    **email_service.digest_email(user_name, frequency, items),
+                    "log": {
+                        "type": types.pop() if len(types) == 1 else NotificationType.ANNOUNCEMENT,
+                        "subject": f"{frequency.value.split('_')[0].capitalize()} digest",
+                        "content": f"Digest of {len(items)} notifications",
+                        "extra_data": {"digest_item_ids": [item.id for item in items]}
+                    }
+                })
+
+            digests += await EmailOutboxService.enqueue(db, emails)
+            await db.execute(
+                update(EmailDigestItem)
+                .where(EmailDigestItem.id.in_([row[0].id for row in rows]))
+                .values(digested_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            items_count += len(rows)
+
+        if items_count:
+            elapsed = time.monotonic() - started
+            logger.info(
+                f"Merged {items_count} {frequency.value} items into {digests} digests in {elapsed:.1f}s"
+            )
+        return digests
@@ -0,0 +1,385 @@
+"""Transactional email outbox and its background dispatcher."""
+
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple, Union
+from sqlalchemy import select, insert, update, bindparam, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+from app.core.config import settings
+from app.models import (
+    EmailOutbox, OutboxStatus, NotificationLog, NotificationChannel, NotificationStatus, NotificationPreference
+)
+from app.services.email_service import email_service
+from app.services.quiet_hours import next_delivery_time
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Exponential backoff with +/-20% jitter so failed batches do not retry in lockstep."""
+    delay = min(
+        settings.EMAIL_OUTBOX_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0),
+        settings.EMAIL_OUTBOX_MAX_BACKOFF_SECONDS
+    )
+    return delay * random.uniform(0.8, 1.2)
+
+
+class EmailOutboxService:
+    """
+    Emails are written to the outbox in the caller's transaction and sent
+    later by the dispatcher, so an email goes out if and only if the change
+    that caused it was committed, and no request waits on SMTP.
+    """
+
+    @staticmethod
+    async def _delivery_times(
+        db: AsyncSession,
+        emails: List[Dict[str, Any]],
+        now: datetime
+    ) -> List[datetime]:
+        """First send time per email, deferred past the recipient's quiet hours."""
+        user_ids = {email["user_id"] for email in emails if email.get("user_id")}
+        prefs = {}
+        if user_ids:
+            result = await db.execute(
+                select(
+                    NotificationPreference.user_id,
+                    NotificationPreference.timezone,
+                    NotificationPreference.quiet_hours
+                ).where(NotificationPreference.user_id.in_(user_ids))
+            )
+            prefs = {user_id: (tz_name, quiet_hours) for user_id, tz_name, quiet_hours in result}
+
+        times = []
+        for email in emails:
+            tz_name, quiet_hours = prefs.get(email.get("user_id"), (None, None))
+            times.append(next_delivery_time(now, tz_name, quiet_hours))
+        return times
+
+    @staticmethod
+    async def enqueue(
+        db: AsyncSession,
+        emails: List[Dict[str, Any]],
+        respect_quiet_hours: bool = True
+    ) -> int:
+        """
+        Queue emails together with their pending NotificationLog entries.
+
+        Each dict needs to_email, subject, template_name and context, and
+        may carry user_id and a ``log`` dict (type, subject, content,
+        extra_data). Emails to users in their quiet hours are held until
+        the quiet hours end. Does not commit, so callers include it in
+        their own transaction. Returns the number of emails queued.
+        """
+        if not emails:
+            return 0
+
+        now = datetime.utcnow()
+        if respect_quiet_hours:
+            send_times = await EmailOutboxService._delivery_times(db, emails, now)
+        else:
+            send_times = [now] * len(emails)
+        log_ids: Dict[int, int] = {}
+        logged = [(i, email) for i, email in enumerate(emails) if email.get("log")]
+        if logged:
+            result = await db.execute(
+                insert(NotificationLog).returning(NotificationLog.id, sort_by_parameter_order=True),
+                [
+                    {
+                        "user_id": email["user_id"],
+                        "type": email["log"]["type"],
+                        "channel": NotificationChannel.EMAIL,
+                        "subject": email["log"]["subject"],
+                        "content": email["log"]["content"],
+                        "status": NotificationStatus.PENDING,
+                        "created_at": now,
+                        "extra_data": email["log"].get("extra_data") or {}
+                    }
+                    for _, email in logged
+                ]
+            )
+            log_ids = {i: log_id for (i, _), log_id in zip(logged, result.scalars().all())}
+
+        await db.execute(
+            insert(EmailOutbox),
+            [
+                {
+                    "user_id": email.get("user_id"),
+                    "notification_log_id": log_ids.get(i),
+                    "to_email": email["to_email"],
+                    "subject": email["subject"],
+                    "template_name": email["template_name"],
+                    "context": email["context"],
+                    "status": OutboxStatus.PENDING,
+                    "attempts": 0,
+                    "next_attempt_at": send_times[i],
+                    "created_at": now
+                }
+                for i, email in enumerate(emails)
+            ]
+        )
+        return len(emails)
+
+    @staticmethod
+    async def _claim_batch(db: AsyncSession, batch_size: int) -> List[Any]:
+        """
+        Lease a batch of due messages to this worker and commit.
+
+        Rows are picked with FOR UPDATE SKIP LOCKED and their next attempt
+        is pushed past the lease, so no lock is held while SMTP is slow and
+        a crashed worker's messages become due again when the lease ends.
+        The attempt is counted up front; messages whose lease ran out on
+        their last attempt (they keep crashing or hanging workers) are
+        marked dead here instead of being leased again.
+        """
+        now = datetime.utcnow()
+        # Out of attempts but due again: the last lease expired unanswered
+        exhausted = (
+            select(EmailOutbox.id)
+            .where(
+                and_(
+                    EmailOutbox.status == OutboxStatus.PENDING,
+                    EmailOutbox.next_attempt_at <= now,
+                    EmailOutbox.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+                )
+            )
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(exhausted))
+            .values(
+                status=OutboxStatus.DEAD,
+                last_error="Lease expired on the last attempt (worker crashed or hung)"
+            )
+            .returning(EmailOutbox.notification_log_id)
+            .execution_options(synchronize_session=False)
+        )
+        dead_log_ids = [log_id for log_id in result.scalars().all() if log_id]
+        if dead_log_ids:
+            await db.execute(
+                update(NotificationLog)
+                .where(NotificationLog.id.in_(dead_log_ids))
+                .values(status=NotificationStatus.FAILED)
+                .execution_options(synchronize_session=False)
+            )
+
+        due = (
+            select(EmailOutbox.id)
+            .where(
+                and_(
+                    EmailOutbox.status == OutboxStatus.PENDING,
+                    EmailOutbox.next_attempt_at <= now,
+                    EmailOutbox.attempts < settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+                )
+            )
+            .order_by(EmailOutbox.next_attempt_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(due))
+            .values(
+                attempts=EmailOutbox.attempts + 1,
+                next_attempt_at=now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS)
+            )
+            .returning(
+                EmailOutbox.id,
+                EmailOutbox.notification_log_id,
+                EmailOutbox.to_email,
+                EmailOutbox.subject,
+                EmailOutbox.template_name,
+                EmailOutbox.context,
+                EmailOutbox.attempts
+            )
+            .execution_options(synchronize_session=False)
+        )
+        rows = result.all()
+        await db.commit()
+        return rows
+
+    @staticmethod
+    async def _send_session(
+        messages: List[Any],
+        rendered: List[Tuple[str, str]]
+    ) -> List[Optional[str]]:
+        """Send leased, rendered messages over one SMTP session; returns the error text per message."""
+        try:
+            errors = await email_service.deliver_many_rendered([
+                (message.to_email, message.subject, body[0], body[1])
+                for message, body in zip(messages, rendered)
+            ])
+        except Exception as e:
+            errors = [f"{type(e).__name__}: {e}"] * len(messages)
+        for message, error in zip(messages, errors):
+            if error is not None:
+                logger.warning(f"Email {message.id} to {message.to_email} failed (attempt {message.attempts}): {error}")
+        return [error[:2000] if error else None for error in errors]
+
+    @staticmethod
+    async def _send(
+        messages: List[Any],
+        rendered: List[Union[Tuple[str, str], Exception]],
+        sessions: int
+    ) -> List[Optional[str]]:
+        """
+        Send a leased batch split across up to ``sessions`` SMTP sessions,
+        each sending its share back to back. Returns the error text per
+        message (None if sent).
+        """
+        errors: List[Optional[str]] = [
+            f"{type(body).__name__}: {body}"[:2000] if isinstance(body, Exception) else None
+            for body in rendered
+        ]
+        sendable = [i for i, body in enumerate(rendered) if not isinstance(body, Exception)]
+        if not sendable:
+            return errors
+
+        size = -(-len(sendable) // max(sessions, 1))
+        chunks = [sendable[start:start + size] for start in range(0, len(sendable), size)]
+        results = await asyncio.gather(*(
+            EmailOutboxService._send_session([messages[i] for i in chunk], [rendered[i] for i in chunk])
+            for chunk in chunks
+        ))
+        for chunk, chunk_errors in zip(chunks, results):
+            for i, error in zip(chunk, chunk_errors):
+                errors[i] = error
+        return errors
+
+    @staticmethod
+    async def _record_results(
+        db: AsyncSession,
+        messages: List[Any],
+        errors: List[Optional[str]]
+    ) -> Dict[str, int]:
+        """Write the outcome of a batch with a few bulk statements and one commit."""
+        now = datetime.utcnow()
+        sent = [message for message, error in zip(messages, errors) if error is None]
+        failed = [
+            {
+                "outbox_id": message.id,
+                "status": OutboxStatus.DEAD if message.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS else OutboxStatus.PENDING,
+                "next_attempt_at": now + timedelta(seconds=backoff_seconds(message.attempts)),
+                "last_error": error
+            }
+            for message, error in zip(messages, errors) if error is not None
+        ]
+        dead_log_ids = [
+            message.notification_log_id
+            for message, error in zip(messages, errors)
+            if error is not None and message.notification_log_id
+            and message.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+        ]
+
+        if sent:
+            await db.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id.in_([message.id for message in sent]))
+                .values(status=OutboxStatus.SENT, sent_at=now, last_error=None)
+                .execution_options(synchronize_session=False)
+            )
+            sent_log_ids = [message.notification_log_id for message in sent if message.notification_log_id]
+            if sent_log_ids:
+                await db.execute(
+                    update(NotificationLog)
+                    .where(NotificationLog.id.in_(sent_log_ids))
+                    .values(status=NotificationStatus.SENT, sent_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+
+        if failed:
+            outbox = EmailOutbox.__table__
+            await db.execute(
+                update(outbox)
+                .where(outbox.c.id == bindparam("outbox_id"))
+                .values(
+                    status=bindparam("status"),
+                    next_attempt_at=bindparam("next_attempt_at"),
+                    last_error=bindparam("last_error")
+                ),
+                failed
+            )
+        if dead_log_ids:
+            await db.execute(
+                update(NotificationLog)
+                .where(NotificationLog.id.in_(dead_log_ids))
+                .values(status=NotificationStatus.FAILED)
+                .execution_options(synchronize_session=False)
+            )
+
+        await db.commit()
+        dead = sum(1 for item in failed if item["status"] == OutboxStatus.DEAD)
+        return {"sent": len(sent), "retried": len(failed) - dead, "dead": dead}
+
+    @staticmethod
+    async def dispatch(
+        db: AsyncSession,
+        batch_size: int = settings.EMAIL_OUTBOX_BATCH_SIZE,
+        concurrency: int = settings.EMAIL_OUTBOX_CONCURRENCY
+    ) -> Dict[str, int]:
+        """
+        Drain all due messages in leased batches.
+        Each batch is sent over up to ``concurrency`` pooled SMTP sessions.
+        Any number of dispatchers may run at once. Returns sent/retried/dead counts.
+        """
+        started = time.monotonic()
+        totals = {"sent": 0, "retried": 0, "dead": 0}
+        while True:
+            messages = await EmailOutboxService._claim_batch(db, batch_size)
+            if not messages:
+                break
+
+            # One render per distinct layout, off the event loop
+            rendered = await email_service.render_many_async([
+                {"template_name": message.template_name, "context": message.context or {}}
+                for message in messages
+            ])
+            errors = await EmailOutboxService._send(messages, rendered, concurrency)
+            for key, count in (await EmailOutboxService._record_results(db, messages, errors)).items():
+                totals[key] += count
+
+        processed = sum(totals.values())
+        if processed:
+            elapsed = time.monotonic() - started
+            logger.info(
+                f"Dispatched {processed} emails ({totals['sent']} sent, {totals['retried']} to retry, "
+                f"{totals['dead']} dead) in {elapsed:.1f}s"
+            )
+        return totals
+
+    @staticmethod
+    async def replay_dead(
+        db: AsyncSession,
+        ids: Optional[List[int]] = None
+    ) -> int:
+        """
+        Put dead messages (all, or the given ids) back in the queue with a
+        fresh attempt budget. Returns the number of messages requeued.
+        """
+        conditions = [EmailOutbox.status == OutboxStatus.DEAD]
+        if ids:
+            conditions.append(EmailOutbox.id.in_(ids))
+
+        result = await db.execute(
+            update(EmailOutbox)
+            .where(and_(*conditions))
+            .values(status=OutboxStatus.PENDING, attempts=0, next_attempt_at=datetime.utcnow())
+            .returning(EmailOutbox.notification_log_id)
+            .execution_options(synchronize_session=False)
+        )
+        log_ids = result.scalars().all()
+        pending_log_ids = [log_id for log_id in log_ids if log_id]
+        if pending_log_ids:
+            await db.execute(
+                update(NotificationLog)
+                .where(NotificationLog.id.in_(pending_log_ids))
+                .values(status=NotificationStatus.PENDING)
+                .execution_options(synchronize_session=False)
+            )
+        await db.commit()
+        return len(log_ids)
@@ -1,18 +1,33 @@
 """Email notification service."""
 
-import smtplib
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Union
 import logging
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, select_autoescape
+from markupsafe import escape
 import os
 from datetime import datetime
 
 from app.core.config import settings
+from app.core.smtp import smtp_pool
+from app.models.notification_preference import EmailFrequency
 
 logger = logging.getLogger(__name__)
 
+# Context fields that differ per recipient in otherwise identical emails.
+# Templates must output them verbatim (no filters) for bulk rendering.
+PER_RECIPIENT_FIELDS = ("user_name",)
+_PLACEHOLDER = "\x00{}\x00"
+
+
+def _is_configured() -> bool:
+    """Without a real SMTP host (development, mailhog) emails are only logged."""
+    return bool(settings.SMTP_HOST) and settings.SMTP_HOST != "localhost"
+
 
 class EmailService:
     """Service for sending email notifications."""
@@ -22,9 +37,205 @@ class EmailService:
         template_dir = os.path.join(os.path.dirname(__file__), '..', 'templates', 'emails')
         self.env = Environment(
             loader=FileSystemLoader(template_dir),
-            autoescape=select_autoescape(['html', 'xml'])
+            autoescape=select_autoescape(['html', 'xml']),
+            # Compiled templates survive restarts
+            bytecode_cache=FileSystemBytecodeCache(settings.EMAIL_TEMPLATE_CACHE_DIR),
+            # Templates only change with a deploy; skip the mtime check per lookup
+            auto_reload=False
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.EMAIL_RENDER_WORKERS,
+            thread_name_prefix="email-render"
+        )
+    
+    def preload(self) -> int:
+        """
+        Compile every template up front so syntax errors fail at startup and
+        no request pays for compilation. Returns the number of templates.
+        """
+        names = self.env.list_templates(extensions=["html", "txt"])
+        for name in names:
+            self.env.get_template(name)
+        
+        html = {name[:-len(".html")] for name in names if name.endswith(".html")}
+        text = {name[:-len(".txt")] for name in names if name.endswith(".txt")}
+        # base.html is a layout, not an email
+        missing = sorted((html - {"base"}) ^ text)
+        if missing:
+            raise RuntimeError(f"Email templates without an HTML/text counterpart: {', '.join(missing)}")
+        return len(names)
+    
+    def render(self, template_name: str, context: Dict[str, Any]) -> Tuple[str, str]:
+        """Render the (html, text) bodies of a template."""
+        return (
+            self.env.get_template(f"{template_name}.html").render(**context),
+            self.env.get_template(f"{template_name}.txt").render(**context)
         )
     
+    def render_many(
+        self,
+        emails: List[Dict[str, Any]]
+    ) -> List[Union[Tuple[str, str], Exception]]:
+        """
+        Render (html, text) for many emails of the form
+        {"template_name": ..., "context": {...}}.
+        
+        Emails whose contexts differ only in PER_RECIPIENT_FIELDS are
+        rendered once with placeholders, which are then replaced per
+        recipient. A failed render is returned as the exception, in place.
+        """
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for i, email in enumerate(emails):
+            shared = {
+                key: value for key, value in email["context"].items()
+                if key not in PER_RECIPIENT_FIELDS
+            }
+            key = (email["template_name"], json.dumps(shared, sort_keys=True, default=str))
+            groups.setdefault(key, []).append(i)
+        
+        results: List[Union[Tuple[str, str], Exception]] = [None] * len(emails)
+        for (template_name, _), indexes in groups.items():
+            first = emails[indexes[0]]["context"]
+            placeholders = {
+                field: _PLACEHOLDER.format(field) for field in PER_RECIPIENT_FIELDS if field in first
+            }
+            try:
+                html, text = self.render(template_name, {**first, **placeholders})
+            except Exception as e:
+                logger.error(f"Failed to render email template {template_name}: {e}")
+                for i in indexes:
+                    results[i] = e
+                continue
+            
+            for i in indexes:
+                context = emails[i]["context"]
+                html_i, text_i = html, text
+                for field, placeholder in placeholders.items():
+                    value = str(context.get(field, ""))
+                    html_i = html_i.replace(placeholder, str(escape(value)))
+                    text_i = text_i.replace(placeholder, value)
+                results[i] = (html_i, text_i)
+        return results
+    
+    async def render_many_async(
+        self,
+        emails: List[Dict[str, Any]]
+    ) -> List[Union[Tuple[str, str], Exception]]:
+        """render_many on the render thread pool, keeping the event loop free."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.render_many, emails)
+    
+    def compose(
+        self,
+        to_email: str,
+        subject: str,
+        html_content: str,
+        text_content: str,
+        cc: Optional[List[str]] = None,
+        bcc: Optional[List[str]] = None
+    ) -> MIMEMultipart:
+        """Build a multipart (text + HTML) message from rendered bodies."""
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = f"{settings.PROJECT_NAME} <{settings.EMAILS_FROM_EMAIL}>"
+        msg['To'] = to_email
+        
+        if cc:
+            msg['Cc'] = ', '.join(cc)
+        if bcc:
+            msg['Bcc'] = ', '.join(bcc)
+        
+        # Add parts
+        text_part = MIMEText(text_content, 'plain')
+        html_part = MIMEText(html_content, 'html')
+        
+        msg.attach(text_part)
+        msg.attach(html_part)
+        return msg
+    
+    def build_message(
+        self,
+        to_email: str,
+        subject: str,
+        template_name: str,
+        context: Dict[str, Any],
+        cc: Optional[List[str]] = None,
+        bcc: Optional[List[str]] = None
+    ) -> MIMEMultipart:
+        """Render a template into a multipart (text + HTML) message."""
+        html_content, text_content = self.render(template_name, context)
+        return self.compose(to_email, subject, html_content, text_content, cc, bcc)
+    
+    async def deliver_rendered(
+        self,
+        to_email: str,
+        subject: str,
+        html_content: str,
+        text_content: str,
+        cc: Optional[List[str]] = None,
+        bcc: Optional[List[str]] = None
+    ) -> None:
+        """Send already rendered bodies, raising on failure."""
+        if not _is_configured():
+            logger.info(f"Email service not configured. Would send email to {to_email}: {subject}")
+            return
+        
+        msg = self.compose(to_email, subject, html_content, text_content, cc, bcc)
+        
+        recipients = [to_email]
+        if cc:
+            recipients.extend(cc)
+        if bcc:
+            recipients.extend(bcc)
+        
+        # Send over a pooled, already authenticated session
+        await smtp_pool.send(msg, recipients=recipients)
+        
+        logger.info(f"Email sent successfully to {to_email}")
+    
+    async def deliver_many_rendered(
+        self,
+        emails: List[Tuple[str, str, str, str]]
+    ) -> List[Optional[str]]:
+        """
+        Send already rendered (to_email, subject, html, text) emails back to
+        back over one pooled session. Returns the error text per email
+        (None if it was sent).
+        """
+        if not _is_configured():
+            for to_email, subject, _, _ in emails:
+                logger.info(f"Email service not configured. Would send email to {to_email}: {subject}")
+            return [None] * len(emails)
+        
+        errors = await smtp_pool.send_many([
+            (self.compose(to_email, subject, html_content, text_content), [to_email])
+            for to_email, subject, html_content, text_content in emails
+        ])
+        logger.info(f"Sent {errors.count(None)} of {len(emails)} emails over one SMTP session")
+        return errors
+    
+    async def deliver(
+        self,
+        to_email: str,
+        subject: str,
+        template_name: str,
+        context: Dict[str, Any],
+        cc: Optional[List[str]] = None,
+        bcc: Optional[List[str]] = None
+    ) -> None:
+        """Render (on the render thread pool) and send an email, raising on failure."""
+        # For development with mailhog or when SMTP is not configured
+        if not _is_configured():
+            logger.info(f"Email service not configured. Would send email to {to_email}: {subject}")
+            logger.info(f"Email content preview: {context}")
+            return
+        
+        loop = asyncio.get_running_loop()
+        html_content, text_content = await loop.run_in_executor(
+            self._executor, self.render, template_name, context
+        )
+        await self.deliver_rendered(to_email, subject, html_content, text_content, cc, bcc)
+    
     async def send_email(
         self,
         to_email: str,
@@ -49,92 +260,20 @@ class EmailService:
             bool: True if email was sent successfully
         """
         try:
-            # For development with mailhog or when SMTP is not configured
-            if not settings.SMTP_HOST or settings.SMTP_HOST == "localhost":
-                logger.info(f"Email service not configured. Would send email to {to_email}: {subject}")
-                logger.info(f"Email content preview: {context}")
-                return True
-            
-            # Render templates
-            html_template = self.env.get_template(f"{template_name}.html")
-            text_template = self.env.get_template(f"{template_name}.txt")
-            
-            html_content = html_template.render(**context)
-            text_content = text_template.render(**context)
-            
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = f"{settings.PROJECT_NAME} <{settings.EMAILS_FROM_EMAIL}>"
-            msg['To'] = to_email
-            
-            if cc:
-                msg['Cc'] = ', '.join(cc)
-            if bcc:
-                msg['Bcc'] = ', '.join(bcc)
-            
-            # Add parts
-            text_part = MIMEText(text_content, 'plain')
-            html_part = MIMEText(html_content, 'html')
-            
-            msg.attach(text_part)
-            msg.attach(html_part)
-            
-            # Send email
-            if settings.SMTP_TLS:
-                with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-                    server.starttls()
-                    if settings.SMTP_USER and settings.SMTP_PASSWORD:
-                        server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-                    
-                    recipients = [to_email]
-                    if cc:
-                        recipients.extend(cc)
-                    if bcc:
-                        recipients.extend(bcc)
-                    
-                    server.send_message(msg, to_addrs=recipients)
-            else:
-                with smtplib.SMTP_SSL(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-                    if settings.SMTP_USER and settings.SMTP_PASSWORD:
-                        server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-                    
-                    recipients = [to_email]
-                    if cc:
-                        recipients.extend(cc)
-                    if bcc:
-                        recipients.extend(bcc)
-                    
-                    server.send_message(msg, to_addrs=recipients)
-            
-            logger.info(f"Email sent successfully to {to_email}")
+            await self.deliver(to_email, subject, template_name, context, cc, bcc)
             return True
-            
         except Exception as e:
             logger.error(f"Failed to send email to {to_email}: {str(e)}")
             return False
     
-    async def send_reminder_email(
+    def reminder_email(
         self,
-        to_email: str,
         user_name: str,
         reminder_type: str,
         entity_type: str,
         entity_details: Dict[str, Any]
-    ) -> bool:
-        """
-        Send a reminder email.
-        
-        Args:
-            to_email: Recipient email
-            user_name: Name of the user
-            reminder_type: Type of reminder (e.g., 'T-3days', 'T-0')
-            entity_type: What the reminder is for (e.g., 'report_period')
-            entity_details: Details about the entity
-            
-        Returns:
-            bool: True if sent successfully
-        """
+    ) -> Dict[str, Any]:
+        """Subject, template name and context of a reminder email."""
         subject_map = {
             'T-3days': f"Reminder: {entity_details.get('title', 'Deadline')} due in 3 days",
             'T-0': f"Due Today: {entity_details.get('title', 'Deadline')}",
@@ -151,28 +290,84 @@ class EmailService:
             'app_url': settings.FRONTEND_URL
         }
         
-        return await self.send_email(
-            to_email=to_email,
-            subject=subject_map.get(reminder_type, "Reminder from PhD Progress Tracker"),
-            template_name='reminder',
-            context=context
-        )
+        return {
+            'subject': subject_map.get(reminder_type, "Reminder from PhD Progress Tracker"),
+            'template_name': 'reminder',
+            'context': context
+        }
     
-    async def send_test_email(self, to_email: str) -> bool:
-        """Send a test email to verify configuration."""
+    def digest_email(
+        self,
+        user_name: str,
+        frequency: EmailFrequency,
+        items: List[Any]
+    ) -> Dict[str, Any]:
+        """Subject, template name and context of a daily/weekly digest."""
+        period = "daily" if frequency == EmailFrequency.DAILY_DIGEST else "weekly"
         context = {
-            'user_name': 'Test User',
+            'user_name': user_name,
+            'period': period,
+            'items': [
+                {
+                    'subject': item.subject,
+                    'content': item.content,
+                    'date': item.created_at.strftime('%B %d, %Y')
+                }
+                for item in items
+            ],
             'current_year': datetime.utcnow().year,
             'app_url': settings.FRONTEND_URL
         }
         
+        count = len(items)
+        return {
+            'subject': f"Your {period} digest: {count} notification{'s' if count != 1 else ''}",
+            'template_name': 'digest',
+            'context': context
+        }
+    
+    def test_email(self) -> Dict[str, Any]:
+        """Subject, template name and context of the configuration test email."""
+        return {
+            'subject': "PhD Progress Tracker - Test Email",
+            'template_name': 'test',
+            'context': {
+                'user_name': 'Test User',
+                'current_year': datetime.utcnow().year,
+                'app_url': settings.FRONTEND_URL
+            }
+        }
+    
+    async def send_reminder_email(
+        self,
+        to_email: str,
+        user_name: str,
+        reminder_type: str,
+        entity_type: str,
+        entity_details: Dict[str, Any]
+    ) -> bool:
+        """
+        Send a reminder email.
+        
+        Args:
+            to_email: Recipient email
+            user_name: Name of the user
+            reminder_type: Type of reminder (e.g., 'T-3days', 'T-0')
+            entity_type: What the reminder is for (e.g., 'report_period')
+            entity_details: Details about the entity
+            
+        Returns:
+            bool: True if sent successfully
+        """
         return await self.send_email(
             to_email=to_email,
-            subject="PhD Progress Tracker - Test Email",
-            template_name='test',
-            context=context
+            **self.reminder_email(user_name, reminder_type, entity_type, entity_details)
         )
+    
+    async def send_test_email(self, to_email: str) -> bool:
+        """Send a test email to verify configuration."""
+        return await self.send_email(to_email=to_email, **self.test_email())
 
 
 # Global instance
-email_service = EmailService()
\ No newline at end of file
+email_service = EmailService()
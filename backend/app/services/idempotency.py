@@ -0,0 +1,284 @@
+"""Idempotency-Key handling for retry-safe write endpoints."""
+
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from redis.exceptions import RedisError
+from sqlalchemy import select, delete, and_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+from app.core.config import settings
+from app.core.exceptions import ConflictException, ValidationException
+from app.core.redis import redis_client
+from app.models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+@dataclass
+class IdempotentRequest:
+    """An incoming request carrying an Idempotency-Key header"""
+    key: str
+    fingerprint: str
+    use_database: bool = False  # Set when Redis was unavailable at reservation
+
+
+def request_fingerprint(method: str, path: str, body: bytes) -> str:
+    """Hash the parts of a request that must match for a retry to be replayed."""
+    digest = hashlib.sha256(f"{method} {path}\n".encode())
+    digest.update(body)
+    return digest.hexdigest()
+
+
+class IdempotencyService:
+    """
+    Store responses by (user, Idempotency-Key) so retried requests are
+    answered from the store instead of being executed again.
+
+    Records live in Redis with a TTL; the idempotency_keys table is used
+    when Redis cannot be reached. A reservation only lives for
+    IDEMPOTENCY_LOCK_TTL_SECONDS until the response is stored, so a
+    request that died without releasing its key blocks retries briefly.
+    """
+
+    @staticmethod
+    def _redis_key(user_id: int, key: str) -> str:
+        return f"idempotency:{user_id}:{key}"
+
+    @staticmethod
+    def _replay(record: Dict[str, Any], request: IdempotentRequest) -> JSONResponse:
+        """Answer a retry from a stored record."""
+        if record["fingerprint"] != request.fingerprint:
+            raise ValidationException("Idempotency-Key was already used for a different request")
+        if record.get("status_code") is None:
+            raise ConflictException("A request with this Idempotency-Key is still being processed")
+        return JSONResponse(
+            status_code=record["status_code"],
+            content=record["response"],
+            headers={REPLAYED_HEADER: "true"}
+        )
+
+    @staticmethod
+    async def begin(
+        db: AsyncSession,
+        user_id: int,
+        request: Optional[IdempotentRequest]
+    ) -> Optional[JSONResponse]:
+        """
+        Reserve the key for this request.
+        Returns the stored response for a retry, or None if the request should run.
+        """
+        if request is None:
+            return None
+
+        try:
+            return await IdempotencyService._begin_redis(db, user_id, request)
+        except RedisError as e:
+            logger.warning(f"Redis unavailable for idempotency keys, using database: {e}")
+            request.use_database = True
+            return await IdempotencyService._begin_db(db, user_id, request)
+
+    @staticmethod
+    async def _db_record(db: AsyncSession, user_id: int, key: str) -> Optional[Dict[str, Any]]:
+        """The unexpired database record of a key, if any."""
+        record = await db.scalar(
+            select(IdempotencyKey).where(
+                and_(
+                    IdempotencyKey.user_id == user_id,
+                    IdempotencyKey.key == key,
+                    IdempotencyKey.expires_at > datetime.utcnow()
+                )
+            )
+        )
+        if record is None:
+            return None
+        return {
+            "fingerprint": record.fingerprint,
+            "status_code": record.status_code,
+            "response": record.response
+        }
+
+    @staticmethod
+    async def _begin_redis(
+        db: AsyncSession,
+        user_id: int,
+        request: IdempotentRequest
+    ) -> Optional[JSONResponse]:
+        redis_key = IdempotencyService._redis_key(user_id, request.key)
+        pending = json.dumps({"fingerprint": request.fingerprint})
+
+        # SET NX makes the reservation atomic across workers
+        if await redis_client.set(redis_key, pending, nx=True, ex=settings.IDEMPOTENCY_LOCK_TTL_SECONDS):
+            return None
+
+        stored = await redis_client.get(redis_key)
+        if stored is None:
+            # Expired between the two calls
+            return await IdempotencyService._begin_redis(db, user_id, request)
+        record = json.loads(stored)
+        if record.get("status_code") is None:
+            # complete() keeps the response in the database when Redis failed
+            fallback = await IdempotencyService._db_record(db, user_id, request.key)
+            if fallback and fallback["status_code"] is not None:
+                record = fallback
+        return IdempotencyService._replay(record, request)
+
+    @staticmethod
+    async def _begin_db(
+        db: AsyncSession,
+        user_id: int,
+        request: IdempotentRequest
+    ) -> Optional[JSONResponse]:
+        now = datetime.utcnow()
+        key_filter = and_(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == request.key
+        )
+
+        # An expired record no longer protects the key
+        await db.execute(
+            delete(IdempotencyKey).where(and_(key_filter, IdempotencyKey.expires_at <= now))
+        )
+        result = await db.execute(
+            pg_insert(IdempotencyKey).values(
+                user_id=user_id,
+                key=request.key,
+                fingerprint=request.fingerprint,
+                created_at=now,
+                expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_TTL_SECONDS)
+            ).on_conflict_do_nothing(
+                index_elements=["user_id", "key"]
+            ).returning(IdempotencyKey.id)
+        )
+        reserved = result.scalar_one_or_none()
+        await db.commit()
+        if reserved:
+            return None
+
+        record = await IdempotencyService._db_record(db, user_id, request.key)
+        if record is None:
+            return None
+        return IdempotencyService._replay(record, request)
+
+    @staticmethod
+    async def complete(
+        db: AsyncSession,
+        user_id: int,
+        request: Optional[IdempotentRequest],
+        response: Any,
+        status_code: int = 200
+    ) -> Any:
+        """
+        Store the response for the reserved key and return it for sending.
+        If Redis fails after the reservation, the response goes to the
+        database instead, where retries find it (see _begin_redis) rather
+        than getting 409 until the pending Redis key expires.
+        """
+        if request is None:
+            return response
+
+        content = jsonable_encoder(response)
+        if not request.use_database:
+            try:
+                await redis_client.set(
+                    IdempotencyService._redis_key(user_id, request.key),
+                    json.dumps({
+                        "fingerprint": request.fingerprint,
+                        "status_code": status_code,
+                        "response": content
+                    }),
+                    ex=settings.IDEMPOTENCY_KEY_TTL_SECONDS
+                )
+                return content
+            except RedisError as e:
+                logger.error(f"Failed to store idempotent response for key {request.key} in Redis, using database: {e}")
+
+        now = datetime.utcnow()
+        await db.execute(
+            pg_insert(IdempotencyKey).values(
+                user_id=user_id,
+                key=request.key,
+                fingerprint=request.fingerprint,
+                status_code=status_code,
+                response=content,
+                created_at=now,
+                expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+            ).on_conflict_do_update(
+                index_elements=["user_id", "key"],
+                set_={
+                    "status_code": status_code,
+                    "response": content,
+                    "expires_at": now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+                }
+            )
+        )
+        await db.commit()
+        return content
+
+    @staticmethod
+    async def abort(
+        db: AsyncSession,
+        user_id: int,
+        request: Optional[IdempotentRequest]
+    ) -> None:
+        """Release the key after a failed request so a retry executes again."""
+        if request is None:
+            return
+
+        if request.use_database:
+            await db.rollback()
+            await db.execute(
+                delete(IdempotencyKey).where(
+                    and_(
+                        IdempotencyKey.user_id == user_id,
+                        IdempotencyKey.key == request.key
+                    )
+                )
+            )
+            await db.commit()
+        else:
+            try:
+                await redis_client.delete(IdempotencyService._redis_key(user_id, request.key))
+            except RedisError as e:
+                logger.error(f"Failed to release idempotency key {request.key}: {e}")
+
+    @staticmethod
+    async def run(
+        db: AsyncSession,
+        user_id: int,
+        request: Optional[IdempotentRequest],
+        handler: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Run ``handler`` under the request's Idempotency-Key: a retry gets the
+        stored response, a handler that fails or is cancelled releases the
+        key, and a handler that succeeds has its response stored.
+        """
+        replay = await IdempotencyService.begin(db, user_id, request)
+        if replay:
+            return replay
+
+        try:
+            response = await handler()
+        except BaseException:
+            # Includes asyncio.CancelledError when the client goes away
+            await IdempotencyService.abort(db, user_id, request)
+            raise
+        return await IdempotencyService.complete(db, user_id, request, response)
+
+    @staticmethod
+    async def purge_expired(db: AsyncSession) -> int:
+        """Delete expired database records. Returns the number removed."""
+        result = await db.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.utcnow())
+        )
+        await db.commit()
+        return result.rowcount
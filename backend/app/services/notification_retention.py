@@ -0,0 +1,168 @@
+"""Monthly notification_logs partitions and their retention."""
+
+import re
+import time
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+from app.core.config import settings
+from app.services.unread_counter import UnreadCounterService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARTITION = "notification_logs_default"
+_PARTITION_NAME = re.compile(r"^notification_logs_p(\d{4})(\d{2})$")
+
+
+def add_months(month: date, months: int) -> date:
+    """First day of the month ``months`` after (or before) ``month``."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"notification_logs_p{month:%Y%m}"
+
+
+class NotificationRetentionService:
+    """
+    notification_logs is range-partitioned by month on created_at.
+
+    Upcoming months are created ahead of time; months past the retention
+    window are optionally folded into notification_monthly_summaries and
+    then detached and dropped, which frees their space at once instead of
+    leaving a row-by-row DELETE for vacuum. Rows outside every monthly
+    partition land in notification_logs_default, which is trimmed with a
+    DELETE (it should stay empty).
+    """
+
+    @staticmethod
+    async def list_partitions(db: AsyncSession) -> List[Tuple[str, date]]:
+        """Monthly partitions as (table name, first day of month), oldest first."""
+        result = await db.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = 'notification_logs'"
+            )
+        )
+        partitions = []
+        for (name,) in result:
+            match = _PARTITION_NAME.match(name)
+            if match:
+                partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+        return sorted(partitions, key=lambda partition: partition[1])
+
+    @staticmethod
+    async def ensure_partitions(
+        db: AsyncSession,
+        months_ahead: int = settings.NOTIFICATION_PARTITIONS_AHEAD,
+        today: Optional[date] = None
+    ) -> List[str]:
+        """Create the partitions of this month and the next ``months_ahead``; returns those created."""
+        this_month = (today or datetime.utcnow().date()).replace(day=1)
+        existing = {name for name, _ in await NotificationRetentionService.list_partitions(db)}
+        created = []
+        for offset in range(months_ahead + 1):
+            month = add_months(this_month, offset)
+            name = partition_name(month)
+            if name in existing:
+                continue
+            await db.execute(
+                text(
+                    f"CREATE TABLE {name} PARTITION OF notification_logs "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+                )
+            )
+            created.append(name)
+        await db.commit()
+        if created:
+            logger.info(f"Created notification log partitions {', '.join(created)}")
+        return created
+
+    @staticmethod
+    async def _expire_rows(
+        db: AsyncSession,
+        table: str,
+        before: Optional[date],
+        summarize: bool
+    ) -> Tuple[List[int], List[int]]:
+        """
+        Summarize the expired rows of one partition (all of them, or those
+        created before ``before``); returns the users they belong to and
+        those of them with unread in-app rows.
+        """
+        where = "WHERE created_at < :before" if before else ""
+        params = {"before": before} if before else {}
+        if summarize:
+            await db.execute(
+                text(
+                    "INSERT INTO notification_monthly_summaries (user_id, month, type, channel, total, unread) "
+                    "SELECT user_id, date_trunc('month', created_at)::date, type, channel, "
+                    "count(*), count(*) FILTER (WHERE read_at IS NULL) "
+                    f"FROM {table} {where} "
+                    "GROUP BY 1, 2, 3, 4 "
+                    "ON CONFLICT (user_id, month, type, channel) DO UPDATE SET "
+                    "total = notification_monthly_summaries.total + excluded.total, "
+                    "unread = notification_monthly_summaries.unread + excluded.unread"
+                ),
+                params
+            )
+        result = await db.execute(
+            text(
+                "SELECT user_id, count(*) FILTER (WHERE channel = 'IN_APP' AND read_at IS NULL) "
+                f"FROM {table} {where} GROUP BY user_id"
+            ),
+            params
+        )
+        rows = result.all()
+        return [user_id for user_id, _ in rows], [user_id for user_id, unread in rows if unread]
+
+    @staticmethod
+    async def expire(
+        db: AsyncSession,
+        retention_months: int = settings.NOTIFICATION_RETENTION_MONTHS,
+        summarize: bool = settings.NOTIFICATION_RETENTION_SUMMARIZE,
+        today: Optional[date] = None
+    ) -> Dict[str, int]:
+        """
+        Drop the months that ended more than ``retention_months`` ago, one
+        partition per transaction. Returns partitions dropped and users
+        whose notifications were removed.
+        """
+        started = time.monotonic()
+        cutoff = add_months((today or datetime.utcnow().date()).replace(day=1), -retention_months)
+        dropped = 0
+        users = set()
+        for name, month in await NotificationRetentionService.list_partitions(db):
+            if month >= cutoff:
+                break
+            expired_users, unread_users = await NotificationRetentionService._expire_rows(db, name, None, summarize)
+            users.update(expired_users)
+            # DETACH only takes a brief lock on notification_logs and DROP
+            # frees the whole file, with no dead rows left for vacuum
+            await db.execute(text(f"ALTER TABLE notification_logs DETACH PARTITION {name}"))
+            await db.execute(text(f"DROP TABLE {name}"))
+            await db.commit()
+            await UnreadCounterService.reset(unread_users)
+            dropped += 1
+            logger.info(f"Dropped notification log partition {name}")
+
+        # Stray rows older than the oldest partition
+        expired_users, unread_users = await NotificationRetentionService._expire_rows(
+            db, DEFAULT_PARTITION, cutoff, summarize
+        )
+        if expired_users:
+            await db.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at < :before"), {"before": cutoff})
+        await db.commit()
+        await UnreadCounterService.reset(unread_users)
+        users.update(expired_users)
+
+        if dropped:
+            elapsed = time.monotonic() - started
+            logger.info(f"Expired {dropped} notification log partitions before {cutoff} in {elapsed:.1f}s")
+        return {"partitions": dropped, "users": len(users)}
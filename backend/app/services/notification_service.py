@@ -1,20 +1,33 @@
 """Notification service for managing notifications."""
 
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, time as dt_time
+from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, insert, update, delete, and_, or_, cast, literal, JSON
 import logging
 
-from app.models.user import User
-from app.models.notification_preference import NotificationPreference
+from app.core.config import settings
+from app.models.user import User, UserRole, UserStatus
+from app.models.student_profile import StudentProfile, ProgramType
+from app.models.notification_preference import NotificationPreference, EmailFrequency
 from app.models.notification_log import NotificationLog, NotificationType, NotificationChannel, NotificationStatus
 from app.models.reminder_schedule import ReminderSchedule, ReminderEntityType
 from app.models.report_period import ReportPeriod
+from app.services.email_digest import EmailDigestService
+from app.services.email_outbox import EmailOutboxService
 from app.services.email_service import email_service
+from app.services.quiet_hours import local_delivery_time
+from app.services.unread_counter import UnreadCounterService
+from app.services.webhook_delivery import WebhookDeliveryService
 
 logger = logging.getLogger(__name__)
 
+# Local wall-clock time at which reminders are delivered
+REMINDER_LOCAL_TIME = dt_time(9, 0)
+
 
 class NotificationService:
     """Service for handling notifications and reminders."""
@@ -42,16 +55,226 @@ class NotificationService:
         db.add(notification)
         await db.commit()
         await db.refresh(notification)
+        await UnreadCounterService.adjust([user_id])
         return notification
     
+    @staticmethod
+    async def create_in_app_notifications(
+        db: AsyncSession,
+        notifications: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Insert many in-app notifications in one statement.
+        
+        Each dict needs user_id, type, subject and content (extra_data optional).
+        Does not commit, so callers can include it in their own transaction;
+        they adjust the unread counters after committing.
+        """
+        if not notifications:
+            return 0
+        
+        now = datetime.utcnow()
+        await db.execute(
+            insert(NotificationLog),
+            [
+                {
+                    "user_id": item["user_id"],
+                    "type": item["type"],
+                    "channel": NotificationChannel.IN_APP,
+                    "subject": item["subject"],
+                    "content": item["content"],
+                    "status": NotificationStatus.SENT,
+                    "sent_at": now,
+                    "created_at": now,
+                    "extra_data": item.get("extra_data") or {}
+                }
+                for item in notifications
+            ]
+        )
+        return len(notifications)
+    
+    @staticmethod
+    async def list_in_app(
+        db: AsyncSession,
+        user_id: int,
+        unread_only: bool = False,
+        after: Optional[Tuple[datetime, int]] = None,
+        skip: int = 0,
+        limit: int = 20
+    ) -> List[NotificationLog]:
+        """
+        The user's in-app notifications, newest first.
+        Keyset-paginated on (created_at, id): pass the last row's values as
+        ``after``. ``skip`` is the OFFSET fallback for clients without a
+        cursor; both are served by idx_notification_logs_user_channel_created.
+        """
+        conditions = [
+            NotificationLog.user_id == user_id,
+            NotificationLog.channel == NotificationChannel.IN_APP
+        ]
+        if unread_only:
+            conditions.append(NotificationLog.read_at.is_(None))
+        if after:
+            after_created_at, after_id = after
+            conditions.append(
+                or_(
+                    NotificationLog.created_at < after_created_at,
+                    and_(NotificationLog.created_at == after_created_at, NotificationLog.id < after_id)
+                )
+            )
+        
+        query = (
+            select(NotificationLog)
+            .where(and_(*conditions))
+            .order_by(NotificationLog.created_at.desc(), NotificationLog.id.desc())
+            .limit(limit)
+        )
+        if skip and not after:
+            query = query.offset(skip)
+        
+        result = await db.execute(query)
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def mark_read(
+        db: AsyncSession,
+        user_id: int,
+        ids: Optional[List[int]] = None,
+        up_to_id: Optional[int] = None
+    ) -> List[int]:
+        """
+        Mark the user's unread in-app notifications read with one
+        UPDATE ... RETURNING: the given ids, everything up to the
+        ``up_to_id`` watermark, or (neither given) everything.
+        Returns the ids that changed; the unread counter drops by that many.
+        """
+        conditions = [
+            NotificationLog.user_id == user_id,
+            NotificationLog.channel == NotificationChannel.IN_APP,
+            NotificationLog.read_at.is_(None)
+        ]
+        if ids is not None:
+            conditions.append(NotificationLog.id.in_(ids))
+        if up_to_id is not None:
+            conditions.append(NotificationLog.id <= up_to_id)
+        
+        result = await db.execute(
+            update(NotificationLog)
+            .where(and_(*conditions))
+            .values(read_at=datetime.utcnow())
+            .returning(NotificationLog.id)
+            .execution_options(synchronize_session=False)
+        )
+        marked = result.scalars().all()
+        await db.commit()
+        await UnreadCounterService.adjust([user_id] * len(marked), -1)
+        return marked
+    
+    @staticmethod
+    async def delete_older_than(
+        db: AsyncSession,
+        user_id: int,
+        before: datetime
+    ) -> int:
+        """
+        Delete the user's in-app notifications created before ``before``
+        with one DELETE ... RETURNING; unread ones are taken off the counter.
+        Returns the number deleted.
+        """
+        result = await db.execute(
+            delete(NotificationLog)
+            .where(
+                and_(
+                    NotificationLog.user_id == user_id,
+                    NotificationLog.channel == NotificationChannel.IN_APP,
+                    NotificationLog.created_at < before
+                )
+            )
+            .returning(NotificationLog.read_at)
+            .execution_options(synchronize_session=False)
+        )
+        read_at = result.scalars().all()
+        await db.commit()
+        await UnreadCounterService.adjust([user_id] * sum(1 for value in read_at if value is None), -1)
+        return len(read_at)
+    
+    @staticmethod
+    async def create_announcement(
+        db: AsyncSession,
+        sender: User,
+        subject: str,
+        content: str,
+        roles: List[UserRole] = None,
+        program_types: List[ProgramType] = None,
+        supervisor_ids: List[int] = None
+    ) -> Tuple[str, int]:
+        """
+        Fan an announcement out to every matching active user as in-app
+        notifications with a single INSERT ... SELECT, whatever the audience size.
+        
+        Filters combine with AND; program and supervisor filters only match
+        students. Returns (announcement_id, number of recipients).
+        """
+        conditions = [User.status == UserStatus.ACTIVE.value]
+        if roles:
+            conditions.append(User.role.in_([role.value for role in roles]))
+        if program_types:
+            conditions.append(StudentProfile.program_type.in_(program_types))
+        if supervisor_ids:
+            conditions.append(
+                or_(
+                    StudentProfile.supervisor_id.in_(supervisor_ids),
+                    StudentProfile.co_supervisor_id.in_(supervisor_ids)
+                )
+            )
+        
+        audience = select(User.id).select_from(User)
+        if program_types or supervisor_ids:
+            audience = audience.join(StudentProfile, StudentProfile.user_id == User.id)
+        
+        announcement_id = uuid.uuid4().hex
+        now = datetime.utcnow()
+        extra_data = json.dumps({"announcement_id": announcement_id, "sender_id": sender.id})
+        result = await db.execute(
+            insert(NotificationLog).from_select(
+                ["user_id", "type", "channel", "subject", "content", "status",
+                 "sent_at", "created_at", "extra_data"],
+                audience.add_columns(
+                    literal(NotificationType.ANNOUNCEMENT, NotificationLog.type.type),
+                    literal(NotificationChannel.IN_APP, NotificationLog.channel.type),
+                    literal(subject),
+                    literal(content),
+                    literal(NotificationStatus.SENT, NotificationLog.status.type),
+                    literal(now),
+                    literal(now),
+                    cast(literal(extra_data), JSON)
+                ).where(and_(*conditions))
+            ).returning(NotificationLog.user_id)
+        )
+        user_ids = result.scalars().all()
+        await db.commit()
+        await UnreadCounterService.adjust(user_ids)
+        
+        recipients = len(user_ids)
+        logger.info(f"Announcement {announcement_id} by user {sender.id} sent to {recipients} users")
+        return announcement_id, recipients
+    
     @staticmethod
     async def schedule_report_reminders(
         db: AsyncSession,
         report_period: ReportPeriod,
         student_id: int
     ) -> List[ReminderSchedule]:
-        """Schedule reminders for a report period."""
+        """
+        Schedule reminders for a report period at 09:00 in the student's
+        timezone, moved past their quiet hours.
+        """
         reminders = []
+        prefs = await db.scalar(
+            select(NotificationPreference).where(NotificationPreference.user_id == student_id)
+        )
+        tz_name = prefs.timezone if prefs else None
+        quiet_hours = prefs.quiet_hours if prefs else None
         
         # Define reminder schedule
         reminder_schedule = [
@@ -61,18 +284,20 @@ class NotificationService:
             ("T+7days", timedelta(days=7), True),    # 7 days after (notify supervisor)
         ]
         
+        now = datetime.utcnow()
         for reminder_type, delta, include_supervisor in reminder_schedule:
             scheduled_date = report_period.end_date + delta
+            scheduled_for = local_delivery_time(scheduled_date, REMINDER_LOCAL_TIME, tz_name, quiet_hours)
             
             # Skip if scheduled date is in the past
-            if scheduled_date.date() < datetime.utcnow().date():
+            if scheduled_for < now:
                 continue
             
             # Create reminder
             reminder = ReminderSchedule(
                 entity_type=ReminderEntityType.REPORT_PERIOD,
                 entity_id=report_period.id,
-                scheduled_for=datetime.combine(scheduled_date, datetime.min.time().replace(hour=9)),
+                scheduled_for=scheduled_for,
                 reminder_type=reminder_type,
                 user_id=student_id,
                 include_supervisor=include_supervisor
@@ -84,105 +309,282 @@ class NotificationService:
         return reminders
     
     @staticmethod
-    async def process_reminder(
+    async def _resolve_reminders(
         db: AsyncSession,
-        reminder: ReminderSchedule
-    ) -> bool:
-        """Process a single reminder."""
-        try:
-            # Get user
-            user_stmt = select(User).where(User.id == reminder.user_id)
-            user = await db.scalar(user_stmt)
-            
+        reminders: List[ReminderSchedule]
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Load users, preferences and entities for a whole batch with one
+        IN query each, and return per-reminder details keyed by reminder id.
+        Reminders whose user no longer exists are left out.
+        """
+        user_ids = {reminder.user_id for reminder in reminders}
+        period_ids = {
+            reminder.entity_id for reminder in reminders
+            if reminder.entity_type == ReminderEntityType.REPORT_PERIOD
+        }
+        
+        users = {
+            user.id: user
+            for user in (await db.execute(select(User).where(User.id.in_(user_ids)))).scalars()
+        }
+        prefs = {
+            pref.user_id: pref
+            for pref in (await db.execute(
+                select(NotificationPreference).where(NotificationPreference.user_id.in_(user_ids))
+            )).scalars()
+        }
+        periods = {}
+        if period_ids:
+            periods = {
+                period.id: period
+                for period in (await db.execute(
+                    select(ReportPeriod).where(ReportPeriod.id.in_(period_ids))
+                )).scalars()
+            }
+        
+        resolved = {}
+        for reminder in reminders:
+            user = users.get(reminder.user_id)
             if not user:
                 logger.error(f"User {reminder.user_id} not found for reminder {reminder.id}")
-                return False
-            
-            # Get user preferences
-            prefs_stmt = select(NotificationPreference).where(
-                NotificationPreference.user_id == user.id
-            )
-            prefs = await db.scalar(prefs_stmt)
+                continue
             
             # Get entity details based on type
             entity_details = {}
-            if reminder.entity_type == ReminderEntityType.REPORT_PERIOD:
-                period_stmt = select(ReportPeriod).where(ReportPeriod.id == reminder.entity_id)
-                period = await db.scalar(period_stmt)
-                if period:
-                    entity_details = {
-                        'title': f'{period.period_type.value.capitalize()} Report',
-                        'due_date': period.end_date.strftime('%B %d, %Y')
-                    }
-            
-            # Send notifications through enabled channels
-            success = False
+            period = periods.get(reminder.entity_id) if reminder.entity_type == ReminderEntityType.REPORT_PERIOD else None
+            if period:
+                entity_details = {
+                    'title': f'{period.period_type.value.capitalize()} Report',
+                    'due_date': period.end_date.strftime('%B %d, %Y')
+                }
             
-            # Email notification
+            resolved[reminder.id] = {
+                "user": user,
+                "prefs": prefs.get(user.id),
+                "entity_details": entity_details
+            }
+        return resolved
+    
+    @staticmethod
+    async def _claim_due_reminders(
+        db: AsyncSession,
+        batch_size: int
+    ) -> List[ReminderSchedule]:
+        """
+        Lock a batch of due reminders for this worker.
+        Rows locked by other workers are skipped, so concurrent workers
+        never claim the same reminder. Locks are held until the batch commits.
+        """
+        result = await db.execute(
+            select(ReminderSchedule)
+            .where(
+                and_(
+                    ReminderSchedule.processed == False,
+                    ReminderSchedule.scheduled_for <= datetime.utcnow()
+                )
+            )
+            .order_by(ReminderSchedule.scheduled_for)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        return result.scalars().all()
+    
+    @staticmethod
+    async def process_reminder_batch(
+        db: AsyncSession,
+        reminders: List[ReminderSchedule]
+    ) -> int:
+        """
+        Process claimed reminders: queue reminder emails in the outbox (or
+        hold them for users on digests), write the in-app notifications and
+        mark every reminder processed, all in one transaction, with the
+        Slack/Teams messages queued in the webhook outbox. The dispatchers
+        send both afterwards.
+        Returns the number of emails queued for immediate sending.
+        """
+        if not reminders:
+            return 0
+        
+        resolved = await NotificationService._resolve_reminders(db, reminders)
+        
+        now = datetime.utcnow()
+        emails = []
+        digest_items = []
+        logs = []
+        webhook_messages = []
+        for reminder in reminders:
+            details = resolved.get(reminder.id)
+            if not details:
+                continue
+            user = details["user"]
+            prefs = details["prefs"]
+            title = details["entity_details"].get('title', 'Deadline')
+            content = (
+                f"Your {details['entity_details'].get('title', 'deadline')} is due on "
+                f"{details['entity_details'].get('due_date', 'soon')}"
+            )
             if not prefs or prefs.email_enabled:
-                email_sent = await email_service.send_reminder_email(
-                    to_email=user.email,
+                email = email_service.reminder_email(
                     user_name=user.full_name,
                     reminder_type=reminder.reminder_type,
                     entity_type=reminder.entity_type.value,
-                    entity_details=entity_details
+                    entity_details=details["entity_details"]
                 )
-                
-                if email_sent:
-                    # Log email notification
-                    email_log = NotificationLog(
-                        user_id=user.id,
-                        type=NotificationType.REMINDER,
-                        channel=NotificationChannel.EMAIL,
-                        subject=f"Reminder: {entity_details.get('title', 'Deadline')}",
-                        content=f"Reminder sent for {reminder.reminder_type}",
-                        sent_at=datetime.utcnow(),
-                        status=NotificationStatus.SENT,
-                        extra_data={'reminder_id': reminder.id}
-                    )
-                    db.add(email_log)
-                    success = True
-            
-            # In-app notification
-            await NotificationService.create_in_app_notification(
-                db=db,
-                user_id=user.id,
-                type=NotificationType.REMINDER,
-                subject=f"Reminder: {entity_details.get('title', 'Deadline')}",
-                content=f"Your {entity_details.get('title', 'deadline')} is due on {entity_details.get('due_date', 'soon')}",
-                extra_data={'reminder_id': reminder.id, 'entity_type': reminder.entity_type.value}
-            )
-            
-            # Mark reminder as processed
-            reminder.processed = True
-            reminder.processed_at = datetime.utcnow()
-            
-            await db.commit()
-            
-            return success
-            
+                if prefs and prefs.email_frequency != EmailFrequency.IMMEDIATE:
+                    # Held back for the user's daily/weekly digest
+                    digest_items.append({
+                        "user_id": user.id,
+                        "frequency": prefs.email_frequency,
+                        "type": NotificationType.REMINDER,
+                        "subject": email["subject"],
+                        "content": content,
+                        "extra_data": {'reminder_id': reminder.id}
+                    })
+                else:
+                    emails.append({
+                        "user_id": user.id,
+                        "to_email": user.email,
+                        **email,
+                        "log": {
+                            "type": NotificationType.REMINDER,
+                            "subject": f"Reminder: {title}",
+                            "content": f"Reminder sent for {reminder.reminder_type}",
+                            "extra_data": {'reminder_id': reminder.id}
+                        }
+                    })
+            logs.append({
+                "user_id": user.id,
+                "type": NotificationType.REMINDER,
+                "channel": NotificationChannel.IN_APP,
+                "subject": f"Reminder: {title}",
+                "content": content,
+                "status": NotificationStatus.SENT,
+                "sent_at": now,
+                "created_at": now,
+                "extra_data": {'reminder_id': reminder.id, 'entity_type': reminder.entity_type.value}
+            })
+            webhook_messages.extend(WebhookDeliveryService.messages_for(
+                prefs, user.id, NotificationType.REMINDER,
+                subject=f"Reminder: {title}",
+                content=content,
+                extra_data={'reminder_id': reminder.id}
+            ))
+        
+        queued = await EmailOutboxService.enqueue(db, emails)
+        await EmailDigestService.queue(db, digest_items)
+        await WebhookDeliveryService.enqueue(db, webhook_messages)
+        if logs:
+            await db.execute(insert(NotificationLog), logs)
+        
+        # Reminders whose user no longer exists are closed too, so they are not retried forever
+        await db.execute(
+            update(ReminderSchedule)
+            .where(ReminderSchedule.id.in_([reminder.id for reminder in reminders]))
+            .values(processed=True, processed_at=now)
+        )
+        await db.commit()
+        await UnreadCounterService.adjust(log["user_id"] for log in logs)
+        
+        return queued
+    
+    @staticmethod
+    async def process_reminder(
+        db: AsyncSession,
+        reminder: ReminderSchedule
+    ) -> bool:
+        """Process a single reminder."""
+        try:
+            return await NotificationService.process_reminder_batch(db, [reminder]) > 0
         except Exception as e:
             logger.error(f"Error processing reminder {reminder.id}: {str(e)}")
             await db.rollback()
             return False
     
     @staticmethod
-    async def process_due_reminders(db: AsyncSession) -> int:
-        """Process all due reminders."""
-        # Get unprocessed reminders due now or in the past
-        stmt = select(ReminderSchedule).where(
-            and_(
-                ReminderSchedule.processed == False,
-                ReminderSchedule.scheduled_for <= datetime.utcnow()
+    async def _process_one_by_one(
+        db: AsyncSession,
+        reminder_ids: List[int]
+    ) -> Tuple[int, int]:
+        """
+        Process reminders of a failed batch one at a time, each in its own
+        transaction. A reminder that fails again is pushed back: its next
+        try waits as long as it is already overdue (at least
+        REMINDER_RETRY_SECONDS, at most REMINDER_MAX_RETRY_SECONDS), so
+        retries back off exponentially. Returns emails queued and
+        reminders processed.
+        """
+        queued = 0
+        processed = 0
+        for reminder_id in reminder_ids:
+            reminder = await db.scalar(
+                select(ReminderSchedule)
+                .where(and_(ReminderSchedule.id == reminder_id, ReminderSchedule.processed == False))
+                .with_for_update(skip_locked=True)
             )
-        )
-        
-        result = await db.execute(stmt)
-        reminders = result.scalars().all()
+            if reminder is None:
+                await db.commit()
+                continue
+            scheduled_for = reminder.scheduled_for
+            try:
+                queued += await NotificationService.process_reminder_batch(db, [reminder])
+                processed += 1
+            except Exception as e:
+                await db.rollback()
+                now = datetime.utcnow()
+                delay = min(
+                    max((now - scheduled_for).total_seconds(), settings.REMINDER_RETRY_SECONDS),
+                    settings.REMINDER_MAX_RETRY_SECONDS
+                )
+                logger.error(f"Error processing reminder {reminder_id}, retrying in {delay:.0f}s: {str(e)}")
+                await db.execute(
+                    update(ReminderSchedule)
+                    .where(ReminderSchedule.id == reminder_id)
+                    .values(scheduled_for=now + timedelta(seconds=delay))
+                )
+                await db.commit()
+        return queued, processed
+    
+    @staticmethod
+    async def process_due_reminders(
+        db: AsyncSession,
+        batch_size: int = settings.REMINDER_BATCH_SIZE
+    ) -> int:
+        """
+        Drain all due reminders in claimed batches.
         
+        Each batch is claimed with SELECT ... FOR UPDATE SKIP LOCKED, so any
+        number of workers can run this at once without queueing a reminder twice.
+        A batch that fails is retried one reminder at a time, and reminders
+        that fail on their own are pushed back, so they never block the rest.
+        Returns the number of emails queued.
+        """
+        started = time.monotonic()
+        queued_count = 0
         processed_count = 0
-        for reminder in reminders:
-            if await NotificationService.process_reminder(db, reminder):
-                processed_count += 1
+        while True:
+            reminders = await NotificationService._claim_due_reminders(db, batch_size)
+            if not reminders:
+                # Release the (empty) claim transaction
+                await db.commit()
+                break
+            
+            reminder_ids = [reminder.id for reminder in reminders]
+            try:
+                queued_count += await NotificationService.process_reminder_batch(db, reminders)
+                processed_count += len(reminders)
+            except Exception as e:
+                # Retry the batch one by one so a bad reminder cannot block the others
+                logger.error(f"Error processing reminder batch, retrying one by one: {str(e)}")
+                await db.rollback()
+                queued, processed = await NotificationService._process_one_by_one(db, reminder_ids)
+                queued_count += queued
+                processed_count += processed
         
-        return processed_count
\ No newline at end of file
+        elapsed = time.monotonic() - started
+        if processed_count:
+            logger.info(
+                f"Processed {processed_count} reminders ({queued_count} emails queued) in {elapsed:.1f}s "
+                f"({processed_count / elapsed if elapsed else 0:.0f} reminders/s)"
+            )
+        return queued_count
@@ -0,0 +1,296 @@
+"""Compile quarterly report drafts from the bi-weekly entries they cover."""
+
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Optional, List, Dict, Any, Tuple
+from sqlalchemy import select, insert, and_, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import aliased
+import logging
+
+from app.core.config import settings
+from app.models import (
+    StudentProfile, StudentProfileStatus,
+    ReportPeriod, PeriodType, ReportStatus,
+    ReportEntry
+)
+from app.schemas.report import TimeAllocation
+
+logger = logging.getLogger(__name__)
+
+TIME_ALLOCATION_KEYS = list(TimeAllocation.model_fields.keys())
+
+# Used when none of the covered entries has a valid time allocation
+DEFAULT_ALLOCATION = {"research": 60, "writing": 30, "meetings": 10}
+
+# Required report text (ReportEntryBase) needs at least this many characters
+MIN_TEXT_LENGTH = 10
+NO_ACCOMPLISHMENTS = "No accomplishments were recorded in this quarter's bi-weekly reports."
+NO_NEXT_PLAN = "See goals for next quarter."
+
+
+def quarter_bounds(day: date) -> Tuple[date, date]:
+    """Return the first and last day of the calendar quarter containing ``day``."""
+    first_month = 3 * ((day.month - 1) // 3) + 1
+    start = date(day.year, first_month, 1)
+    if first_month == 10:
+        end = date(day.year, 12, 31)
+    else:
+        end = date(day.year, first_month + 3, 1) - timedelta(days=1)
+    return start, end
+
+
+def _valid_allocation(allocation: Any) -> Optional[Dict[str, int]]:
+    """The entry's time allocation if it passes TimeAllocation (sums to 100), else None."""
+    if not isinstance(allocation, dict):
+        return None
+    try:
+        return TimeAllocation(**allocation).model_dump()
+    except (TypeError, ValueError):
+        return None
+
+
+def _average_allocation(totals: Dict[str, int], count: int) -> Dict[str, int]:
+    """
+    Average the summed percentages of ``count`` valid allocations, rounding
+    with the largest remainder method so the result sums to exactly 100.
+    """
+    if not count:
+        return {key: DEFAULT_ALLOCATION.get(key, 0) for key in TIME_ALLOCATION_KEYS}
+    exact = {key: totals.get(key, 0) / count for key in TIME_ALLOCATION_KEYS}
+    rounded = {key: int(value) for key, value in exact.items()}
+    by_remainder = sorted(exact, key=lambda k: exact[k] - rounded[k], reverse=True)
+    for i in range(max(100 - sum(rounded.values()), 0)):
+        rounded[by_remainder[i % len(by_remainder)]] += 1
+    return rounded
+
+
+def compile_entries(entries: List[Tuple[ReportEntry, ReportPeriod]]) -> Dict[str, Any]:
+    """
+    Aggregate bi-weekly entries (ordered by period start) into quarterly fields.
+
+    Accomplishments are concatenated under a heading per period, blockers
+    are de-duplicated line by line, valid time allocations are averaged
+    and tags are merged in first-seen order. The result always passes
+    ReportEntryBase, with placeholder text where the entries had none.
+    """
+    accomplishments = []
+    blockers: List[str] = []
+    seen_blockers = set()
+    tags: List[str] = []
+    seen_tags = set()
+    totals: Dict[str, int] = defaultdict(int)
+    allocations = 0
+    next_plan = None
+
+    for entry, period in entries:
+        if entry.accomplishments:
+            heading = f"{period.start_date.isoformat()} – {period.end_date.isoformat()}"
+            accomplishments.append(f"{heading}:\n{entry.accomplishments.strip()}")
+
+        for line in (entry.blockers or "").splitlines():
+            normalized = " ".join(line.strip(" -*•").split()).lower()
+            if normalized and normalized not in seen_blockers:
+                seen_blockers.add(normalized)
+                blockers.append(line.strip())
+
+        allocation = _valid_allocation(entry.time_allocation)
+        if allocation:
+            allocations += 1
+            for key, value in allocation.items():
+                totals[key] += value
+
+        for tag in entry.tags or []:
+            if tag not in seen_tags:
+                seen_tags.add(tag)
+                tags.append(tag)
+
+        if entry.next_period_plan and len(entry.next_period_plan.strip()) >= MIN_TEXT_LENGTH:
+            next_plan = entry.next_period_plan
+
+    blockers_text = "\n".join(blockers) or None
+
+    return {
+        "accomplishments": "\n\n".join(accomplishments) or NO_ACCOMPLISHMENTS,
+        "blockers": blockers_text,
+        "challenges": blockers_text,
+        "next_period_plan": next_plan or NO_NEXT_PLAN,
+        "time_allocation": _average_allocation(totals, allocations),
+        "tags": tags,
+        "quarterly_achievements": {
+            "periods_covered": len(entries),
+            "period_ids": [period.id for _, period in entries],
+            "time_allocation_total": {key: totals.get(key, 0) for key in TIME_ALLOCATION_KEYS},
+        },
+    }
+
+
+class QuarterlyReportService:
+    """Service for pre-populating quarterly reports."""
+
+    @staticmethod
+    def _covered_entries_query(quarterly_ids: List[int]):
+        """Bi-weekly entries falling inside each of the given quarterly periods."""
+        quarter = aliased(ReportPeriod)
+        return (
+            select(quarter.id, ReportEntry, ReportPeriod)
+            .join(ReportPeriod, ReportEntry.period_id == ReportPeriod.id)
+            .join(
+                quarter,
+                and_(
+                    quarter.student_id == ReportEntry.student_id,
+                    ReportPeriod.start_date >= quarter.start_date,
+                    ReportPeriod.end_date <= quarter.end_date
+                )
+            )
+            .where(
+                and_(
+                    quarter.id.in_(quarterly_ids),
+                    ReportPeriod.period_type == PeriodType.BIWEEKLY
+                )
+            )
+            .order_by(quarter.id, ReportPeriod.start_date)
+        )
+
+    @staticmethod
+    async def compile_for_period(
+        db: AsyncSession,
+        period: ReportPeriod
+    ) -> Optional[ReportEntry]:
+        """
+        Pre-populate the draft for one quarterly period.
+        An existing entry is returned untouched so student edits are never
+        overwritten; the insert is ON CONFLICT DO NOTHING, so a concurrent
+        compile or submit for the same period wins instead of failing.
+        """
+        if period.period_type != PeriodType.QUARTERLY:
+            raise ValueError("Only quarterly periods can be compiled")
+
+        existing_query = select(ReportEntry).where(ReportEntry.period_id == period.id)
+        existing = await db.scalar(existing_query)
+        if existing:
+            return existing
+
+        result = await db.execute(QuarterlyReportService._covered_entries_query([period.id]))
+        entries = [(entry, biweekly) for _, entry, biweekly in result]
+        if not entries:
+            return None
+
+        result = await db.execute(
+            pg_insert(ReportEntry)
+            .values(period_id=period.id, student_id=period.student_id, **compile_entries(entries))
+            .on_conflict_do_nothing(index_elements=["period_id"])
+            .returning(ReportEntry)
+        )
+        report = result.scalar_one_or_none()
+        await db.commit()
+        return report or await db.scalar(existing_query)
+
+    @staticmethod
+    async def ensure_quarterly_periods(
+        db: AsyncSession,
+        quarter_start: date,
+        quarter_end: date
+    ) -> None:
+        """Create the quarterly period for every active student that lacks one, in one statement."""
+        existing = select(ReportPeriod.id).where(
+            and_(
+                ReportPeriod.student_id == StudentProfile.user_id,
+                ReportPeriod.period_type == PeriodType.QUARTERLY,
+                ReportPeriod.start_date == quarter_start
+            )
+        ).correlate(StudentProfile).exists()
+
+        await db.execute(
+            insert(ReportPeriod).from_select(
+                ["student_id", "period_type", "start_date", "end_date", "due_date", "status", "reminders_sent"],
+                select(
+                    StudentProfile.user_id,
+                    literal(PeriodType.QUARTERLY, ReportPeriod.period_type.type),
+                    literal(quarter_start),
+                    literal(quarter_end),
+                    literal(quarter_end + timedelta(days=settings.QUARTERLY_REPORT_DUE_DAYS)),
+                    literal(ReportStatus.PENDING, ReportPeriod.status.type),
+                    literal(0)
+                ).where(
+                    and_(
+                        StudentProfile.status == StudentProfileStatus.ACTIVE,
+                        StudentProfile.start_date <= quarter_end,
+                        ~existing
+                    )
+                )
+            )
+        )
+        await db.commit()
+
+    @staticmethod
+    async def compile_quarter(
+        db: AsyncSession,
+        as_of: Optional[date] = None,
+        batch_size: int = 200
+    ) -> int:
+        """
+        Quarter-end job: compile drafts for all students.
+
+        Quarterly periods without an entry are processed in keyset-paginated
+        batches; each batch reads all covered bi-weekly entries with a single
+        set-based query and is inserted with one commit.
+        Returns the number of drafts created.
+        """
+        quarter_start, quarter_end = quarter_bounds(as_of or date.today())
+        await QuarterlyReportService.ensure_quarterly_periods(db, quarter_start, quarter_end)
+
+        created = 0
+        last_id = 0
+        while True:
+            result = await db.execute(
+                select(ReportPeriod.id, ReportPeriod.student_id)
+                .outerjoin(ReportEntry, ReportEntry.period_id == ReportPeriod.id)
+                .where(
+                    and_(
+                        ReportPeriod.period_type == PeriodType.QUARTERLY,
+                        ReportPeriod.start_date == quarter_start,
+                        ReportPeriod.id > last_id,
+                        ReportEntry.id.is_(None)
+                    )
+                )
+                .order_by(ReportPeriod.id)
+                .limit(batch_size)
+            )
+            batch = result.all()
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            grouped: Dict[int, List[Tuple[ReportEntry, ReportPeriod]]] = defaultdict(list)
+            result = await db.execute(
+                QuarterlyReportService._covered_entries_query([row.id for row in batch])
+            )
+            for quarterly_id, entry, biweekly in result:
+                grouped[quarterly_id].append((entry, biweekly))
+
+            drafts = [
+                {
+                    "period_id": row.id,
+                    "student_id": row.student_id,
+                    **compile_entries(grouped[row.id])
+                }
+                for row in batch
+                if grouped.get(row.id)
+            ]
+            if drafts:
+                # Periods that got an entry meanwhile are skipped
+                result = await db.execute(
+                    pg_insert(ReportEntry)
+                    .values(drafts)
+                    .on_conflict_do_nothing(index_elements=["period_id"])
+                    .returning(ReportEntry.id)
+                )
+                created += len(result.all())
+                await db.commit()
+            # Entries loaded for this batch are no longer needed
+            db.expunge_all()
+
+        logger.info(f"Compiled {created} quarterly report drafts for {quarter_start.isoformat()}")
+        return created
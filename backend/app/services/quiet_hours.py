@@ -0,0 +1,151 @@
+"""Per-user delivery times: local timezones and quiet hours."""
+
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from typing import Any, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Offset tables cover this many days from when they are built
+OFFSET_TABLE_DAYS = 400
+
+
+class OffsetTable:
+    """
+    UTC offsets of one timezone as a sorted list of transitions.
+
+    Built once per timezone from zoneinfo (a daily scan, narrowed to the
+    minute around each DST change); lookups are then a bisect on naive UTC
+    instants, so scheduling many notifications does not touch zoneinfo.
+    """
+
+    def __init__(self, zone: tzinfo, start: datetime, days: int = OFFSET_TABLE_DAYS):
+        self.zone = zone
+        self.start = start
+        self.end = start + timedelta(days=days)
+        self.transitions: List[datetime] = [start]
+        self.offsets: List[timedelta] = [self._zone_offset(start)]
+
+        day = start
+        while day < self.end:
+            next_day = day + timedelta(days=1)
+            if self._zone_offset(next_day) != self.offsets[-1]:
+                # Narrow the change down to the minute
+                low, high = day, next_day
+                while high - low > timedelta(minutes=1):
+                    middle = low + (high - low) / 2
+                    if self._zone_offset(middle) == self.offsets[-1]:
+                        low = middle
+                    else:
+                        high = middle
+                high = high.replace(second=0, microsecond=0)
+                self.transitions.append(high)
+                self.offsets.append(self._zone_offset(high))
+            day = next_day
+
+    def _zone_offset(self, at: datetime) -> timedelta:
+        return at.replace(tzinfo=timezone.utc).astimezone(self.zone).utcoffset()
+
+    def offset(self, at: datetime) -> timedelta:
+        """UTC offset in effect at a naive UTC instant."""
+        if not self.start <= at < self.end:
+            return self._zone_offset(at)
+        return self.offsets[bisect_right(self.transitions, at) - 1]
+
+
+_tables: Dict[str, OffsetTable] = {}
+
+
+def offset_table(tz_name: Optional[str]) -> OffsetTable:
+    """
+    The cached offset table of a timezone.
+
+    Unknown names use DEFAULT_TIMEZONE, and UTC if that is unknown too.
+    """
+    tz_name = tz_name or settings.DEFAULT_TIMEZONE
+    table = _tables.get(tz_name)
+    now = datetime.utcnow()
+    if table is None or now >= table.end - timedelta(days=30):
+        zone = _load_zone(tz_name)
+        if zone is None:
+            zone = _load_zone(settings.DEFAULT_TIMEZONE) or timezone.utc
+            logger.warning(f"Unknown timezone {tz_name!r}, using {zone}")
+        table = OffsetTable(zone, now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1))
+        _tables[tz_name] = table
+    return table
+
+
+def _load_zone(tz_name: str) -> Optional[tzinfo]:
+    try:
+        return ZoneInfo(tz_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def to_local(at: datetime, tz_name: Optional[str]) -> datetime:
+    """Naive UTC instant to naive local time."""
+    return at + offset_table(tz_name).offset(at)
+
+
+def to_utc(local: datetime, tz_name: Optional[str]) -> datetime:
+    """
+    Naive local time to naive UTC. Times skipped by a DST change resolve
+    to the instant after it; repeated times to their first occurrence.
+    """
+    table = offset_table(tz_name)
+    guess = local - table.offset(local)
+    return local - table.offset(guess)
+
+
+def parse_quiet_hours(quiet_hours: Optional[Dict[str, Any]]) -> Optional[Tuple[time, time]]:
+    """(start, end) local times from {"start": "22:00", "end": "08:00"}, or None if unset."""
+    if not quiet_hours or not quiet_hours.get("start") or not quiet_hours.get("end"):
+        return None
+    try:
+        start = time.fromisoformat(quiet_hours["start"])
+        end = time.fromisoformat(quiet_hours["end"])
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring invalid quiet hours {quiet_hours!r}")
+        return None
+    return (start, end) if start != end else None
+
+
+def next_delivery_time(
+    at: datetime,
+    tz_name: Optional[str],
+    quiet_hours: Optional[Dict[str, Any]]
+) -> datetime:
+    """
+    The first naive UTC instant at or after ``at`` outside the user's quiet
+    hours. Windows may wrap past midnight (22:00-08:00).
+    """
+    window = parse_quiet_hours(quiet_hours)
+    if window is None:
+        return at
+
+    start, end = window
+    local = to_local(at, tz_name)
+    now = local.time()
+    if start < end:
+        if not start <= now < end:
+            return at
+        resume_day = local.date()
+    else:
+        if end <= now < start:
+            return at
+        resume_day = local.date() + timedelta(days=1) if now >= start else local.date()
+    return max(to_utc(datetime.combine(resume_day, end), tz_name), at)
+
+
+def local_delivery_time(
+    day: date,
+    local_time: time,
+    tz_name: Optional[str],
+    quiet_hours: Optional[Dict[str, Any]] = None
+) -> datetime:
+    """Naive UTC instant of a local wall-clock time, pushed out of quiet hours."""
+    return next_delivery_time(to_utc(datetime.combine(day, local_time), tz_name), tz_name, quiet_hours)
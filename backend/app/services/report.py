@@ -1,19 +1,34 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Set, Tuple
 from datetime import date, datetime, timedelta
-from sqlalchemy import select, and_, or_, desc
+from sqlalchemy import select, insert, update, func, and_, or_, desc
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import selectinload, aliased
+from pydantic import ValidationError as PydanticValidationError
 
 from app.models import (
-    User, StudentProfile,
+    User, UserRole, StudentProfile,
     ReportPeriod, PeriodType, ReportStatus,
     ReportEntry,
-    Comment, EntityType
+    Comment, EntityType, CommentVisibility,
+    NotificationType
 )
 from app.schemas.report import (
     ReportPeriodCreate, ReportEntryCreate, ReportEntryUpdate,
-    QuickUpdate, TimeAllocation
+    QuickUpdate, TimeAllocation,
+    ReportPatchOperation, ReportDraftDelta, ReportEntryBase,
+    DRAFT_TEXT_FIELDS, DRAFT_JSON_FIELDS
 )
+from app.core.exceptions import (
+    BadRequestException, ForbiddenException, NotFoundException, ConflictException, ValidationException
+)
+from app.services.report_revision import ReportRevisionService
+from app.services.report_metrics import ReportMetricsService
+from app.services.notification_service import NotificationService
+from app.services.unread_counter import UnreadCounterService
+
+# Draft fields a report cannot be without (see ReportEntryBase)
+REQUIRED_DRAFT_FIELDS = ("accomplishments", "next_period_plan", "time_allocation")
 
 
 class ReportService:
@@ -32,12 +47,15 @@ class ReportService:
         if not profile:
             raise ValueError(f"Student profile not found for user {student_id}")
         
-        # Find current period
+        # Find current period; bounding start_date keeps this a short
+        # range scan on (student_id, start_date) however long the history
         today = date.today()
         result = await db.execute(
             select(ReportPeriod).where(
                 and_(
                     ReportPeriod.student_id == student_id,
+                    ReportPeriod.period_type == PeriodType.BIWEEKLY,
+                    ReportPeriod.start_date > today - timedelta(days=14),
                     ReportPeriod.start_date <= today,
                     ReportPeriod.end_date >= today
                 )
@@ -71,6 +89,59 @@ class ReportService:
         
         return new_period
     
+    @staticmethod
+    async def sweep_overdue_periods(
+        db: AsyncSession,
+        today: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Mark every pending period past its due date as OVERDUE.
+        
+        Runs as a single ``UPDATE ... RETURNING`` and notifies the affected
+        students with one multi-row insert in the same transaction.
+        Returns the periods that changed.
+        """
+        today = today or date.today()
+        result = await db.execute(
+            update(ReportPeriod)
+            .where(
+                and_(
+                    ReportPeriod.status == ReportStatus.PENDING,
+                    ReportPeriod.due_date < today
+                )
+            )
+            .values(status=ReportStatus.OVERDUE, updated_at=datetime.utcnow())
+            .returning(
+                ReportPeriod.id,
+                ReportPeriod.student_id,
+                ReportPeriod.period_type,
+                ReportPeriod.start_date,
+                ReportPeriod.end_date,
+                ReportPeriod.due_date
+            )
+            .execution_options(synchronize_session=False)
+        )
+        overdue = [dict(row._mapping) for row in result]
+        
+        await NotificationService.create_in_app_notifications(db, [
+            {
+                "user_id": period["student_id"],
+                "type": NotificationType.DEADLINE,
+                "subject": f"Overdue: {period['period_type'].value.capitalize()} Report",
+                "content": (
+                    f"Your report for {period['start_date'].strftime('%B %d')} - "
+                    f"{period['end_date'].strftime('%B %d, %Y')} was due on "
+                    f"{period['due_date'].strftime('%B %d, %Y')}"
+                ),
+                "extra_data": {"period_id": period["id"], "entity_type": "report_period"}
+            }
+            for period in overdue
+        ])
+        
+        await db.commit()
+        await UnreadCounterService.adjust(period["student_id"] for period in overdue)
+        return overdue
+    
     @staticmethod
     async def get_report_periods(
         db: AsyncSession,
@@ -92,6 +163,147 @@ class ReportService:
         result = await db.execute(query)
         return result.scalars().all()
     
+    @staticmethod
+    def _supervised_periods_query(
+        user: User,
+        status: Optional[ReportStatus] = None,
+        student_id: Optional[int] = None,
+        period_type: Optional[PeriodType] = None,
+        start_from: Optional[date] = None,
+        start_to: Optional[date] = None
+    ):
+        """
+        Periods of the students a supervisor (or co-supervisor) looks after,
+        or of all students for admins, with the report if one exists.
+        """
+        query = (
+            select(
+                ReportPeriod,
+                User.full_name.label("student_name"),
+                ReportEntry.id.label("report_id"),
+                ReportEntry.submitted_at.label("report_submitted_at")
+            )
+            .select_from(StudentProfile)
+            .join(ReportPeriod, ReportPeriod.student_id == StudentProfile.user_id)
+            .join(User, User.id == StudentProfile.user_id)
+            .outerjoin(ReportEntry, ReportEntry.period_id == ReportPeriod.id)
+        )
+        
+        if user.role not in [UserRole.ADMIN, UserRole.SYSTEM_ADMIN]:
+            query = query.where(
+                or_(
+                    StudentProfile.supervisor_id == user.id,
+                    StudentProfile.co_supervisor_id == user.id
+                )
+            )
+        if status:
+            query = query.where(ReportPeriod.status == status)
+        if student_id:
+            query = query.where(ReportPeriod.student_id == student_id)
+        if period_type:
+            query = query.where(ReportPeriod.period_type == period_type)
+        if start_from:
+            query = query.where(ReportPeriod.start_date >= start_from)
+        if start_to:
+            query = query.where(ReportPeriod.start_date <= start_to)
+        return query
+    
+    @staticmethod
+    def _supervised_period_row(period: ReportPeriod, row) -> Dict[str, Any]:
+        return {
+            **{column.key: getattr(period, column.key) for column in ReportPeriod.__table__.columns},
+            "student_name": row.student_name,
+            "report_id": row.report_id,
+            "report_submitted_at": row.report_submitted_at
+        }
+    
+    @staticmethod
+    async def get_supervised_periods(
+        db: AsyncSession,
+        user: User,
+        status: Optional[ReportStatus] = None,
+        student_id: Optional[int] = None,
+        period_type: Optional[PeriodType] = None,
+        start_from: Optional[date] = None,
+        start_to: Optional[date] = None,
+        after: Optional[Tuple[date, int]] = None,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        List supervised students' periods, newest first.
+        Keyset-paginated on (start_date, id): pass the last row's values as ``after``.
+        """
+        query = ReportService._supervised_periods_query(
+            user, status, student_id, period_type, start_from, start_to
+        )
+        if after:
+            after_date, after_id = after
+            query = query.where(
+                or_(
+                    ReportPeriod.start_date < after_date,
+                    and_(ReportPeriod.start_date == after_date, ReportPeriod.id < after_id)
+                )
+            )
+        query = query.order_by(desc(ReportPeriod.start_date), desc(ReportPeriod.id)).limit(limit)
+        
+        result = await db.execute(query)
+        return [ReportService._supervised_period_row(row.ReportPeriod, row) for row in result]
+    
+    @staticmethod
+    async def get_supervised_period_windows(
+        db: AsyncSession,
+        user: User,
+        status: Optional[ReportStatus] = None,
+        student_id: Optional[int] = None,
+        period_type: Optional[PeriodType] = None,
+        start_from: Optional[date] = None,
+        start_to: Optional[date] = None,
+        before: Optional[date] = None,
+        limit: int = 6
+    ) -> List[Dict[str, Any]]:
+        """
+        Supervised students' periods grouped by period window (students x periods),
+        newest window first, in one query. ``limit`` counts distinct start dates.
+        Keyset-paginated on window start: pass the last window's start_date as ``before``.
+        """
+        query = ReportService._supervised_periods_query(
+            user, status, student_id, period_type, start_from, start_to
+        )
+        if before:
+            query = query.where(ReportPeriod.start_date < before)
+        
+        # Number the window start dates so only the newest ``limit`` are fetched
+        window_rank = func.dense_rank().over(
+            order_by=desc(ReportPeriod.start_date)
+        ).label("window_rank")
+        ranked = query.add_columns(window_rank).subquery()
+        period_alias = aliased(ReportPeriod, ranked)
+        
+        result = await db.execute(
+            select(
+                period_alias,
+                ranked.c.student_name,
+                ranked.c.report_id,
+                ranked.c.report_submitted_at
+            )
+            .where(ranked.c.window_rank <= limit)
+            .order_by(ranked.c.window_rank, period_alias.period_type, ranked.c.student_name)
+        )
+        
+        windows: Dict[Tuple, Dict[str, Any]] = {}
+        for row in result:
+            period = row[0]
+            key = (period.period_type, period.start_date, period.end_date)
+            if key not in windows:
+                windows[key] = {
+                    "period_type": period.period_type,
+                    "start_date": period.start_date,
+                    "end_date": period.end_date,
+                    "periods": []
+                }
+            windows[key]["periods"].append(ReportService._supervised_period_row(period, row))
+        return list(windows.values())
+    
     @staticmethod
     async def get_previous_report(
         db: AsyncSession,
@@ -105,11 +317,13 @@ class ReportService:
             .where(
                 and_(
                     ReportEntry.student_id == student_id,
+                    ReportPeriod.student_id == student_id,
+                    ReportPeriod.start_date < before_date,
                     ReportPeriod.end_date < before_date,
                     ReportPeriod.status == ReportStatus.SUBMITTED
                 )
             )
-            .order_by(desc(ReportPeriod.end_date))
+            .order_by(desc(ReportPeriod.start_date))
             .limit(1)
         )
         return result.scalar_one_or_none()
@@ -143,48 +357,185 @@ class ReportService:
         student_id: int,
         report_data: ReportEntryCreate
     ) -> ReportEntry:
-        """Submit or update a report"""
-        # Check if report already exists
-        result = await db.execute(
-            select(ReportEntry).where(
-                and_(
-                    ReportEntry.period_id == report_data.period_id,
-                    ReportEntry.student_id == student_id
-                )
-            )
-        )
-        existing = result.scalar_one_or_none()
-        
-        if existing:
-            # Update existing report
-            for field, value in report_data.dict(exclude_unset=True).items():
-                if field == "time_allocation":
-                    # value is already a dict from Pydantic
-                    setattr(existing, field, value)
-                elif field != "is_draft":  # Skip is_draft field
-                    setattr(existing, field, value)
-            existing.version += 1
-            report = existing
-        else:
-            # Create new report
-            report_dict = report_data.dict(exclude={"is_draft"})  # Exclude is_draft
-            report_dict["time_allocation"] = report_data.time_allocation.dict()
-            report = ReportEntry(
-                student_id=student_id,
-                **report_dict
-            )
-            db.add(report)
+        """
+        Submit or update a report.
+        Runs as a single INSERT ... ON CONFLICT (period_id) DO UPDATE so
+        concurrent or retried submissions cannot race into a duplicate insert.
+        """
+        values = report_data.dict(exclude={"is_draft"})
+        values["time_allocation"] = report_data.time_allocation.dict()
+        
+        # On conflict only the fields sent by the client are overwritten
+        insert_stmt = pg_insert(ReportEntry).values(student_id=student_id, **values)
+        update_fields = set(report_data.dict(exclude_unset=True)) - {"is_draft", "period_id"}
+        stmt = insert_stmt.on_conflict_do_update(
+            index_elements=[ReportEntry.period_id],
+            set_={
+                **{field: insert_stmt.excluded[field] for field in update_fields},
+                "version": ReportEntry.version + 1
+            },
+            where=ReportEntry.student_id == student_id
+        ).returning(ReportEntry)
+        
+        result = await db.execute(stmt, execution_options={"populate_existing": True})
+        report = result.scalar_one_or_none()
+        if not report:
+            raise ForbiddenException("Cannot submit report for this period")
+        
+        period = await db.get(ReportPeriod, report_data.period_id)
         
         # Update period status if not a draft
-        if not report_data.is_draft:
-            period = await db.get(ReportPeriod, report_data.period_id)
-            if period:
-                period.status = ReportStatus.SUBMITTED
+        if period and not report_data.is_draft:
+            period.status = ReportStatus.SUBMITTED
+        
+        # Derived metrics are stored once here instead of recomputed on every read
+        ReportMetricsService.apply(report, period.due_date if period else None)
+        
+        # Keep the previous text recoverable as part of the same transaction
+        await ReportRevisionService.record_revision(db, report, student_id)
         
         await db.commit()
         await db.refresh(report)
         return report
     
+    @staticmethod
+    def delta_to_operations(delta: ReportDraftDelta) -> List[ReportPatchOperation]:
+        """Convert a field-level delta into replace operations"""
+        return [
+            ReportPatchOperation(op="replace", path=f"/{field}", value=value)
+            for field, value in delta.dict(exclude_unset=True).items()
+        ]
+    
+    @staticmethod
+    def _build_patch_values(operations: List[ReportPatchOperation]) -> Dict[str, Any]:
+        """Translate patch operations into column values / SQL expressions"""
+        values: Dict[str, Any] = {}
+        
+        for operation in operations:
+            field = operation.field
+            
+            if field in REQUIRED_DRAFT_FIELDS and (
+                operation.op == "remove" or (operation.op in ("add", "replace") and operation.value is None)
+            ):
+                raise ValidationException(f"Field {field} is required and cannot be removed")
+            
+            if operation.op == "remove":
+                if field == "tags":
+                    values[field] = []
+                elif field in DRAFT_JSON_FIELDS:
+                    values[field] = {}
+                else:
+                    values[field] = None
+                continue
+            
+            if operation.op == "splice":
+                if field not in DRAFT_TEXT_FIELDS:
+                    raise BadRequestException(f"Cannot splice non-text field {field}")
+                if operation.offset is None or not isinstance(operation.value, str):
+                    raise BadRequestException("Splice requires an offset and a string value")
+                # Splice in SQL so the stored text never has to be read back;
+                # successive splices on one field nest in order
+                current = values.get(field, getattr(ReportEntry, field))
+                values[field] = func.overlay(
+                    func.coalesce(current, ""),
+                    operation.value,
+                    operation.offset + 1,
+                    operation.length or 0
+                )
+                continue
+            
+            # add / replace
+            value = operation.value
+            if field == "time_allocation":
+                try:
+                    value = TimeAllocation(**(value or {})).dict()
+                except (TypeError, ValueError) as e:
+                    raise BadRequestException(f"Invalid time allocation: {e}")
+            elif field == "tags":
+                if not isinstance(value, list) or not all(isinstance(tag, str) for tag in value):
+                    raise BadRequestException("Tags must be a list of strings")
+            elif field == "quarterly_achievements":
+                if not isinstance(value, dict):
+                    raise BadRequestException("Quarterly achievements must be an object")
+            elif value is not None and not isinstance(value, str):
+                raise BadRequestException(f"Field {field} must be a string")
+            values[field] = value
+        
+        return values
+    
+    @staticmethod
+    async def patch_report_draft(
+        db: AsyncSession,
+        report_id: int,
+        student_id: int,
+        expected_version: int,
+        operations: List[ReportPatchOperation]
+    ) -> ReportEntry:
+        """
+        Apply small deltas to a report with optimistic concurrency.
+        
+        The changes are written in a single conditional
+        ``UPDATE ... WHERE version = :expected`` so concurrent editors can
+        never silently overwrite each other; a stale version raises 409.
+        Changes that would leave an invalid report (missing or too short
+        required text, a time allocation not summing to 100) raise 422 and
+        are rolled back.
+        """
+        values = ReportService._build_patch_values(operations)
+        if not values:
+            raise BadRequestException("No changes supplied")
+        
+        period_open = select(ReportPeriod.id).where(
+            and_(
+                ReportPeriod.id == ReportEntry.period_id,
+                ReportPeriod.status.in_([ReportStatus.PENDING, ReportStatus.SUBMITTED, ReportStatus.OVERDUE])
+            )
+        ).exists()
+        
+        stmt = (
+            update(ReportEntry)
+            .where(
+                and_(
+                    ReportEntry.id == report_id,
+                    ReportEntry.student_id == student_id,
+                    ReportEntry.version == expected_version,
+                    ReportEntry.is_locked.is_not(True),
+                    period_open
+                )
+            )
+            .values(**values, version=ReportEntry.version + 1)
+            .returning(ReportEntry)
+            .execution_options(populate_existing=True)
+        )
+        result = await db.execute(stmt)
+        report = result.scalar_one_or_none()
+        
+        if report:
+            # Splices are applied in SQL, so the merged draft is only known
+            # now; it must still be a valid report before it is committed
+            try:
+                ReportEntryBase.model_validate(report, from_attributes=True)
+            except PydanticValidationError as e:
+                await db.rollback()
+                raise ValidationException(
+                    "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors())
+                )
+            await db.commit()
+            return report
+        
+        # Nothing matched - work out why
+        await db.rollback()
+        existing = await db.get(ReportEntry, report_id)
+        if not existing or existing.student_id != student_id:
+            raise NotFoundException("Report not found")
+        if existing.is_locked:
+            raise BadRequestException("Report is locked")
+        if existing.version != expected_version:
+            raise ConflictException(
+                f"Report has been modified (current version {existing.version}, expected {expected_version})"
+            )
+        raise BadRequestException("Report period is closed")
+    
     @staticmethod
     async def quick_update_report(
         db: AsyncSession,
@@ -300,6 +651,107 @@ class ReportService:
         
         return True
     
+    @staticmethod
+    async def get_supervised_report_ids(
+        db: AsyncSession,
+        report_ids: List[int],
+        supervisor_id: int
+    ) -> Set[int]:
+        """Return the subset of report IDs belonging to this supervisor's students"""
+        result = await db.execute(
+            select(ReportEntry.id)
+            .join(StudentProfile, StudentProfile.user_id == ReportEntry.student_id)
+            .where(
+                and_(
+                    ReportEntry.id.in_(report_ids),
+                    or_(
+                        StudentProfile.supervisor_id == supervisor_id,
+                        StudentProfile.co_supervisor_id == supervisor_id
+                    )
+                )
+            )
+        )
+        return set(result.scalars().all())
+    
+    @staticmethod
+    async def get_commentable_report_ids(
+        db: AsyncSession,
+        report_ids: List[int],
+        user: User
+    ) -> Set[int]:
+        """Return the subset of report IDs the user may comment on"""
+        if user.role == UserRole.STUDENT:
+            result = await db.execute(
+                select(ReportEntry.id).where(
+                    and_(
+                        ReportEntry.id.in_(report_ids),
+                        ReportEntry.student_id == user.id
+                    )
+                )
+            )
+            return set(result.scalars().all())
+        if user.role in [UserRole.SUPERVISOR, UserRole.ADMIN]:
+            return await ReportService.get_supervised_report_ids(db, report_ids, user.id)
+        return set()
+    
+    @staticmethod
+    async def add_comments_to_reports(
+        db: AsyncSession,
+        report_ids: List[int],
+        accessible_ids: Set[int],
+        author_id: int,
+        content: str,
+        visibility: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Add the same comment to many reports with one multi-row insert and one commit.
+        Returns a result per requested report, in request order.
+        """
+        # Preserve request order, ignore duplicates
+        report_ids = list(dict.fromkeys(report_ids))
+        targets = [report_id for report_id in report_ids if report_id in accessible_ids]
+        
+        comment_ids: Dict[int, int] = {}
+        if targets:
+            now = datetime.utcnow()
+            result = await db.execute(
+                insert(Comment).values([
+                    {
+                        "entity_type": EntityType.REPORT,
+                        "entity_id": report_id,
+                        "author_id": author_id,
+                        "content": content,
+                        "visibility": visibility,
+                        "created_at": now
+                    }
+                    for report_id in targets
+                ]).returning(Comment.entity_id, Comment.id)
+            )
+            comment_ids = {entity_id: comment_id for entity_id, comment_id in result}
+            await db.commit()
+        
+        return [
+            {"report_id": report_id, "success": True, "comment_id": comment_ids[report_id]}
+            if report_id in comment_ids else
+            {"report_id": report_id, "success": False, "error": "Report not found or not accessible"}
+            for report_id in report_ids
+        ]
+    
+    @staticmethod
+    async def acknowledge_reports(
+        db: AsyncSession,
+        report_ids: List[int],
+        supervisor_id: int,
+        comment: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Supervisor acknowledges many reports with one access query and one commit"""
+        accessible_ids = await ReportService.get_supervised_report_ids(db, report_ids, supervisor_id)
+        content = f"Acknowledged. {comment}" if comment else "Report acknowledged."
+        return await ReportService.add_comments_to_reports(
+            db, report_ids, accessible_ids, supervisor_id,
+            content, CommentVisibility.SUPERVISOR_ONLY
+        )
+    
     @staticmethod
     async def get_student_reports_for_supervisor(
         db: AsyncSession,
@@ -0,0 +1,329 @@
+"""Bulk import of historical progress reports."""
+
+import asyncio
+import csv
+import io
+import json
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Iterator, Iterable, List, Dict, Any, Optional, Tuple, Union
+from pydantic import ValidationError
+from sqlalchemy import (
+    MetaData, Table, Column, Integer, String, Text, Date, DateTime,
+    select, insert, and_, or_, cast, literal, func, JSON
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+from app.models import User, ReportPeriod, ReportStatus, ReportEntry
+from app.schemas.report import ReportImportRow, ReportImportError, ReportImportResult, TimeAllocation
+
+logger = logging.getLogger(__name__)
+
+MAX_REPORTED_ERRORS = 1000
+TIME_ALLOCATION_COLUMNS = list(TimeAllocation.model_fields.keys())
+
+# Staging table, created per batch as a temporary table dropped on commit
+staging_metadata = MetaData()
+report_import_staging = Table(
+    "report_import_staging",
+    staging_metadata,
+    Column("row_number", Integer, nullable=False),
+    Column("student_id", Integer, nullable=False),
+    Column("period_type", String(20), nullable=False),
+    Column("start_date", Date, nullable=False),
+    Column("end_date", Date, nullable=False),
+    Column("due_date", Date, nullable=False),
+    Column("submitted_at", DateTime, nullable=False),
+    Column("accomplishments", Text),
+    Column("blockers", Text),
+    Column("next_period_plan", Text),
+    Column("time_allocation", Text),
+    Column("tags", Text),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+STAGING_COLUMNS = [column.name for column in report_import_staging.columns]
+
+
+def _parse_tags(value: Any) -> List[str]:
+    if isinstance(value, list):
+        return value
+    if not value:
+        return []
+    value = value.strip()
+    if value.startswith("["):
+        return json.loads(value)
+    return [tag.strip() for tag in value.split(";") if tag.strip()]
+
+
+def _normalize_csv_row(row: Dict[str, str]) -> Dict[str, Any]:
+    """Map a flat CSV row onto ReportImportRow fields."""
+    data: Dict[str, Any] = {key: value for key, value in row.items() if key and value not in (None, "")}
+    if "time_allocation" in data:
+        data["time_allocation"] = json.loads(data["time_allocation"])
+    else:
+        data["time_allocation"] = {
+            key: int(data.pop(key)) for key in TIME_ALLOCATION_COLUMNS if key in data
+        }
+    if "tags" in data:
+        data["tags"] = _parse_tags(data["tags"])
+    return data
+
+
+def detect_format(filename: str) -> str:
+    """Infer the import format from a file name."""
+    return "jsonl" if filename.lower().endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def iter_rows(stream: io.TextIOBase, file_format: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Yield (row_number, raw_row) from a CSV or JSONL text stream.
+    Rows that cannot be parsed are yielded as exceptions so they are reported, not fatal.
+    """
+    if file_format == "csv":
+        reader = csv.DictReader(stream)
+        for row_number, row in enumerate(reader, start=2):  # Header is line 1
+            try:
+                yield row_number, _normalize_csv_row(row)
+            except (ValueError, TypeError) as e:
+                yield row_number, e
+    elif file_format == "jsonl":
+        for row_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+                if "tags" in data:
+                    data["tags"] = _parse_tags(data["tags"])
+                yield row_number, data
+            except ValueError as e:
+                yield row_number, e
+    else:
+        raise ValueError(f"Unsupported import format: {file_format}")
+
+
+def _format_validation_error(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}"
+        for item in error.errors()
+    ]
+
+
+class ReportImportService:
+    """Service for bulk-loading historical report periods and entries."""
+
+    @staticmethod
+    async def _resolve_students(
+        db: AsyncSession,
+        rows: Iterable[ReportImportRow],
+        cache: Dict[Union[int, str], Optional[int]]
+    ) -> None:
+        """
+        Look up user IDs for all unseen emails and check all unseen explicit
+        student IDs with one query. The cache maps lower-cased emails and
+        explicit IDs to the user ID, or None if there is no such user.
+        """
+        missing_ids = set()
+        missing_emails = set()
+        for row in rows:
+            if row.student_id is not None:
+                if row.student_id not in cache:
+                    missing_ids.add(row.student_id)
+            elif row.student_email.lower() not in cache:
+                missing_emails.add(row.student_email.lower())
+        if not missing_ids and not missing_emails:
+            return
+        result = await db.execute(
+            select(User.id, func.lower(User.email)).where(
+                or_(User.id.in_(missing_ids), func.lower(User.email).in_(missing_emails))
+            )
+        )
+        found_ids = set()
+        found_emails = {}
+        for user_id, email in result:
+            found_ids.add(user_id)
+            found_emails[email] = user_id
+        for student_id in missing_ids:
+            cache[student_id] = student_id if student_id in found_ids else None
+        for email in missing_emails:
+            cache[email] = found_emails.get(email)
+
+    @staticmethod
+    async def _copy_batch(db: AsyncSession, records: List[Tuple]) -> Tuple[int, int]:
+        """
+        COPY a validated batch into staging and merge it.
+        Returns (entries_inserted, periods_created).
+        """
+        conn = await db.connection()
+        await conn.run_sync(lambda sync_conn: report_import_staging.create(sync_conn))
+
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            report_import_staging.name,
+            records=records,
+            columns=STAGING_COLUMNS
+        )
+
+        staging = report_import_staging
+        period_type = cast(staging.c.period_type, ReportPeriod.period_type.type)
+
+        # Periods that do not exist yet
+        period_exists = select(ReportPeriod.id).where(
+            and_(
+                ReportPeriod.student_id == staging.c.student_id,
+                ReportPeriod.period_type == period_type,
+                ReportPeriod.start_date == staging.c.start_date
+            )
+        ).correlate(staging).exists()
+        now = datetime.utcnow()
+        periods_result = await db.execute(
+            insert(ReportPeriod).from_select(
+                ["student_id", "period_type", "start_date", "end_date", "due_date",
+                 "status", "reminders_sent", "created_at", "updated_at"],
+                select(
+                    staging.c.student_id,
+                    period_type,
+                    staging.c.start_date,
+                    staging.c.end_date,
+                    staging.c.due_date,
+                    literal(ReportStatus.SUBMITTED, ReportPeriod.status.type),
+                    literal(0),
+                    literal(now),
+                    literal(now)
+                ).where(~period_exists)
+                .distinct(staging.c.student_id, staging.c.period_type, staging.c.start_date)
+                .order_by(staging.c.student_id, staging.c.period_type, staging.c.start_date, staging.c.row_number)
+            )
+        )
+
+        # Entries, leaving any report that already exists for a period untouched
+        entries_stmt = pg_insert(ReportEntry).from_select(
+            ["period_id", "student_id", "submitted_at", "accomplishments", "blockers",
+             "next_period_plan", "time_allocation", "tags", "attachments",
+             "quarterly_achievements", "is_locked", "version"],
+            select(
+                ReportPeriod.id,
+                staging.c.student_id,
+                staging.c.submitted_at,
+                staging.c.accomplishments,
+                staging.c.blockers,
+                staging.c.next_period_plan,
+                cast(staging.c.time_allocation, JSON),
+                cast(staging.c.tags, JSON),
+                cast(literal("[]"), JSON),
+                cast(literal("{}"), JSON),
+                literal(False),
+                literal(1)
+            ).join(
+                ReportPeriod,
+                and_(
+                    ReportPeriod.student_id == staging.c.student_id,
+                    ReportPeriod.period_type == period_type,
+                    ReportPeriod.start_date == staging.c.start_date
+                )
+            ).order_by(staging.c.row_number)
+        ).on_conflict_do_nothing(index_elements=["period_id"])
+        entries_result = await db.execute(entries_stmt)
+
+        await db.commit()
+        return max(entries_result.rowcount, 0), max(periods_result.rowcount, 0)
+
+    @staticmethod
+    async def import_stream(
+        db: AsyncSession,
+        stream: io.TextIOBase,
+        file_format: str,
+        batch_size: int = 5000
+    ) -> ReportImportResult:
+        """
+        Validate and import rows from a CSV/JSONL stream in batches.
+
+        Each batch is validated with the regular report rules, COPY'd into
+        a temporary staging table and merged with two set-based inserts.
+        Invalid rows are reported individually and do not stop the import.
+        """
+        started = time.monotonic()
+        rows = iter_rows(stream, file_format)
+        student_cache: Dict[Union[int, str], Optional[int]] = {}
+        errors: List[ReportImportError] = []
+        rows_total = rows_failed = rows_imported = periods_created = 0
+
+        def record_error(row_number: int, messages: List[str]) -> None:
+            nonlocal rows_failed
+            rows_failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(ReportImportError(row=row_number, errors=messages))
+
+        while True:
+            # Read the next batch off the event loop
+            batch = await asyncio.to_thread(lambda: list(islice(rows, batch_size)))
+            if not batch:
+                break
+            rows_total += len(batch)
+
+            validated: List[Tuple[int, ReportImportRow]] = []
+            for row_number, raw in batch:
+                if isinstance(raw, Exception):
+                    record_error(row_number, [f"Could not parse row: {raw}"])
+                    continue
+                try:
+                    validated.append((row_number, ReportImportRow(**raw)))
+                except ValidationError as e:
+                    record_error(row_number, _format_validation_error(e))
+                except TypeError as e:
+                    record_error(row_number, [str(e)])
+
+            await ReportImportService._resolve_students(
+                db, (row for _, row in validated), student_cache
+            )
+
+            records = []
+            for row_number, row in validated:
+                if row.student_id is not None:
+                    student_id = student_cache.get(row.student_id)
+                else:
+                    student_id = student_cache.get(row.student_email.lower())
+                if not student_id:
+                    record_error(row_number, [f"Unknown student: {row.student_id or row.student_email}"])
+                    continue
+                due_date = row.due_date or row.end_date + timedelta(days=3)
+                records.append((
+                    row_number,
+                    student_id,
+                    row.period_type.name,
+                    row.start_date,
+                    row.end_date,
+                    due_date,
+                    row.submitted_at or datetime.combine(due_date, datetime.min.time()),
+                    row.accomplishments,
+                    row.blockers,
+                    row.next_period_plan,
+                    json.dumps(row.time_allocation.dict()),
+                    json.dumps(row.tags or []),
+                ))
+
+            if records:
+                inserted, created = await ReportImportService._copy_batch(db, records)
+                rows_imported += inserted
+                periods_created += created
+
+        elapsed = time.monotonic() - started
+        rows_skipped = rows_total - rows_failed - rows_imported
+        logger.info(
+            f"Imported {rows_imported}/{rows_total} report rows in {elapsed:.1f}s "
+            f"({rows_total / elapsed if elapsed else 0:.0f} rows/s)"
+        )
+
+        return ReportImportResult(
+            rows_total=rows_total,
+            rows_imported=rows_imported,
+            rows_skipped=rows_skipped,
+            rows_failed=rows_failed,
+            periods_created=periods_created,
+            elapsed_seconds=round(elapsed, 3),
+            rows_per_second=round(rows_total / elapsed, 1) if elapsed else 0.0,
+            errors=errors
+        )
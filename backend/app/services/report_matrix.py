@@ -0,0 +1,199 @@
+"""Students x periods submission matrix in a compact columnar encoding."""
+
+import base64
+import hashlib
+import json
+from datetime import date
+from typing import Any, Dict, List, Optional
+from fastapi.encoders import jsonable_encoder
+from redis.exceptions import RedisError
+from sqlalchemy import select, func, case, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.models import User, UserRole, StudentProfile, ReportPeriod, PeriodType, ReportStatus, ReportEntry
+
+logger = logging.getLogger(__name__)
+
+# Cell status codes (0 = the student has no period in that column)
+CELL_CODES = {
+    "none": 0,
+    "on_time": 1,
+    "late": 2,
+    "missing": 3,
+    "excused": 4,
+    "pending": 5,
+}
+
+
+class ReportMatrixService:
+    """Service for the supervisor submission heatmap."""
+
+    @staticmethod
+    def _group_filter(user: User):
+        """Students visible to the user: supervised ones, or all for admins."""
+        if user.role in [UserRole.ADMIN, UserRole.SYSTEM_ADMIN]:
+            return True
+        return or_(
+            StudentProfile.supervisor_id == user.id,
+            StudentProfile.co_supervisor_id == user.id
+        )
+
+    @staticmethod
+    def _period_filter(
+        period_type: PeriodType,
+        start_from: Optional[date],
+        start_to: Optional[date]
+    ) -> List[Any]:
+        conditions = [ReportPeriod.period_type == period_type]
+        if start_from:
+            conditions.append(ReportPeriod.start_date >= start_from)
+        if start_to:
+            conditions.append(ReportPeriod.start_date <= start_to)
+        return conditions
+
+    @staticmethod
+    async def get_version(
+        db: AsyncSession,
+        user: User,
+        period_type: PeriodType,
+        start_from: Optional[date] = None,
+        start_to: Optional[date] = None
+    ) -> str:
+        """
+        Last-change version of the user's group of students.
+        A narrow aggregate over the group's periods: it changes whenever a
+        period is added, removed or changes status.
+        """
+        result = await db.execute(
+            select(
+                func.count(ReportPeriod.id),
+                func.max(ReportPeriod.id),
+                func.max(ReportPeriod.updated_at)
+            )
+            .select_from(StudentProfile)
+            .join(ReportPeriod, ReportPeriod.student_id == StudentProfile.user_id)
+            .where(
+                and_(
+                    ReportMatrixService._group_filter(user),
+                    *ReportMatrixService._period_filter(period_type, start_from, start_to)
+                )
+            )
+        )
+        count, max_id, last_update = result.one()
+        # Cells turn from pending to missing as days pass
+        raw = f"{count}:{max_id}:{last_update.isoformat() if last_update else ''}:{date.today().isoformat()}"
+        return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+    @staticmethod
+    async def build_matrix(
+        db: AsyncSession,
+        user: User,
+        period_type: PeriodType,
+        start_from: Optional[date] = None,
+        start_to: Optional[date] = None
+    ) -> Dict[str, Any]:
+        """
+        Compute the matrix with one query returning (student, start, code) rows.
+        Cells are laid out row-major: student index * len(period_starts) + period index.
+        """
+        today = date.today()
+        status_code = case(
+            (ReportPeriod.status == ReportStatus.EXCUSED, CELL_CODES["excused"]),
+            (
+                and_(
+                    ReportPeriod.status == ReportStatus.SUBMITTED,
+                    ReportEntry.submitted_at.is_not(None)
+                ),
+                case(
+                    (func.date(ReportEntry.submitted_at) <= ReportPeriod.due_date, CELL_CODES["on_time"]),
+                    else_=CELL_CODES["late"]
+                )
+            ),
+            (
+                or_(ReportPeriod.status == ReportStatus.OVERDUE, ReportPeriod.due_date < today),
+                CELL_CODES["missing"]
+            ),
+            else_=CELL_CODES["pending"]
+        )
+
+        result = await db.execute(
+            select(ReportPeriod.student_id, ReportPeriod.start_date, status_code)
+            .select_from(StudentProfile)
+            .join(ReportPeriod, ReportPeriod.student_id == StudentProfile.user_id)
+            .outerjoin(ReportEntry, ReportEntry.period_id == ReportPeriod.id)
+            .where(
+                and_(
+                    ReportMatrixService._group_filter(user),
+                    *ReportMatrixService._period_filter(period_type, start_from, start_to)
+                )
+            )
+            .order_by(ReportPeriod.student_id, ReportPeriod.start_date)
+        )
+        rows = result.all()
+
+        student_ids = sorted({row[0] for row in rows})
+        period_starts = sorted({row[1] for row in rows})
+        student_index = {student_id: i for i, student_id in enumerate(student_ids)}
+        period_index = {start: i for i, start in enumerate(period_starts)}
+
+        cells = bytearray(len(student_ids) * len(period_starts))
+        for student_id, start, code in rows:
+            cells[student_index[student_id] * len(period_starts) + period_index[start]] = code
+
+        return {
+            "student_ids": student_ids,
+            "period_starts": period_starts,
+            "cells": cells,
+        }
+
+    @staticmethod
+    def encode(matrix: Dict[str, Any], version: str, encoding: str) -> Dict[str, Any]:
+        """Serialise cells as a small-int array or base64-encoded bytes."""
+        cells = matrix["cells"]
+        return jsonable_encoder({
+            "version": version,
+            "student_ids": matrix["student_ids"],
+            "period_starts": matrix["period_starts"],
+            "codes": CELL_CODES,
+            "encoding": encoding,
+            "cells": base64.b64encode(bytes(cells)).decode("ascii") if encoding == "base64" else list(cells),
+        })
+
+    @staticmethod
+    async def get_matrix(
+        db: AsyncSession,
+        user: User,
+        period_type: PeriodType = PeriodType.BIWEEKLY,
+        start_from: Optional[date] = None,
+        start_to: Optional[date] = None,
+        encoding: str = "base64"
+    ) -> Dict[str, Any]:
+        """
+        Return the encoded matrix, served from Redis while the group's
+        version is unchanged. Cache failures fall back to computing it.
+        """
+        version = await ReportMatrixService.get_version(db, user, period_type, start_from, start_to)
+        cache_key = (
+            f"report_matrix:{user.id}:{period_type.name}:{start_from}:{start_to}:{encoding}:{version}"
+        )
+
+        try:
+            cached = await redis_client.get(cache_key)
+            if cached:
+                return json.loads(cached)
+        except RedisError as e:
+            logger.warning(f"Redis unavailable for report matrix cache: {e}")
+
+        matrix = await ReportMatrixService.build_matrix(db, user, period_type, start_from, start_to)
+        payload = ReportMatrixService.encode(matrix, version, encoding)
+
+        try:
+            await redis_client.set(
+                cache_key, json.dumps(payload), ex=settings.REPORT_MATRIX_CACHE_TTL_SECONDS
+            )
+        except RedisError as e:
+            logger.warning(f"Failed to cache report matrix: {e}")
+        return payload
@@ -0,0 +1,132 @@
+"""Derived per-report metrics, computed at write time and stored on the entry."""
+
+import math
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import select, update, bindparam, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+from app.models import ReportEntry, ReportPeriod
+
+logger = logging.getLogger(__name__)
+
+WORD_COUNT_FIELDS = ["accomplishments", "blockers", "next_period_plan"]
+
+
+def word_count(text: Optional[str]) -> int:
+    return len(text.split()) if text else 0
+
+
+def allocation_entropy(time_allocation: Optional[Dict[str, Any]]) -> float:
+    """
+    Shannon entropy (bits) of a time allocation.
+    0 means all time in one category; higher values mean time is spread out.
+    """
+    values = [
+        value for value in (time_allocation or {}).values()
+        if isinstance(value, (int, float)) and value > 0
+    ]
+    total = sum(values)
+    if not total:
+        return 0.0
+    return round(-sum((value / total) * math.log2(value / total) for value in values), 4)
+
+
+def days_late(submitted_at: Optional[datetime], due_date: Optional[date]) -> Optional[int]:
+    """Whole days the submission came after the due date (0 if on time)."""
+    if not submitted_at or not due_date:
+        return None
+    return max((submitted_at.date() - due_date).days, 0)
+
+
+def compute_report_metrics(
+    report: Any,
+    due_date: Optional[date]
+) -> Dict[str, Any]:
+    """
+    Compute the derived metric columns for a report.
+    ``report`` may be a ReportEntry or any row with the same attribute names.
+    """
+    metrics = {
+        f"{field}_words": word_count(getattr(report, field))
+        for field in WORD_COUNT_FIELDS
+    }
+    metrics["has_blockers"] = bool(report.blockers and report.blockers.strip())
+    metrics["time_allocation_entropy"] = allocation_entropy(report.time_allocation)
+    metrics["days_late"] = days_late(report.submitted_at, due_date)
+    return metrics
+
+
+class ReportMetricsService:
+    """Service for maintaining derived report metrics."""
+
+    @staticmethod
+    def apply(report: ReportEntry, due_date: Optional[date]) -> None:
+        """Set the metric columns on a report; written with the caller's commit."""
+        for column, value in compute_report_metrics(report, due_date).items():
+            setattr(report, column, value)
+
+    @staticmethod
+    async def backfill(
+        db: AsyncSession,
+        batch_size: int = 1000,
+        only_missing: bool = True
+    ) -> int:
+        """
+        Compute metrics for existing entries.
+
+        Entries are read in keyset-paginated batches of narrow rows and
+        written back with one executemany UPDATE and one commit per batch,
+        so memory stays flat however many reports exist.
+        Returns the number of entries updated.
+        """
+        stmt = update(ReportEntry.__table__).where(
+            ReportEntry.__table__.c.id == bindparam("entry_id")
+        ).values(
+            **{
+                column: bindparam(column)
+                for column in [f"{field}_words" for field in WORD_COUNT_FIELDS]
+                + ["has_blockers", "time_allocation_entropy", "days_late"]
+            }
+        )
+
+        updated = 0
+        last_id = 0
+        while True:
+            conditions = [ReportEntry.id > last_id]
+            if only_missing:
+                conditions.append(ReportEntry.time_allocation_entropy.is_(None))
+
+            result = await db.execute(
+                select(
+                    ReportEntry.id,
+                    ReportEntry.accomplishments,
+                    ReportEntry.blockers,
+                    ReportEntry.next_period_plan,
+                    ReportEntry.time_allocation,
+                    ReportEntry.submitted_at,
+                    ReportPeriod.due_date
+                )
+                .join(ReportPeriod, ReportEntry.period_id == ReportPeriod.id)
+                .where(and_(*conditions))
+                .order_by(ReportEntry.id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            await db.execute(
+                stmt,
+                [
+                    {"entry_id": row.id, **compute_report_metrics(row, row.due_date)}
+                    for row in rows
+                ]
+            )
+            await db.commit()
+            updated += len(rows)
+
+        logger.info(f"Backfilled metrics for {updated} report entries")
+        return updated
@@ -0,0 +1,212 @@
+"""Report revision history stored as compact deltas with periodic keyframes."""
+
+import difflib
+from typing import Optional, List, Dict, Any, Tuple
+from sqlalchemy import select, func, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import ReportEntry, ReportRevision
+from app.schemas.report import DRAFT_TEXT_FIELDS, DRAFT_JSON_FIELDS
+
+TRACKED_FIELDS = DRAFT_TEXT_FIELDS + DRAFT_JSON_FIELDS
+
+
+def encode_text_delta(old: str, new: str) -> List[Any]:
+    """
+    Encode the change from ``old`` to ``new`` as a compact op list.
+
+    Positive ints keep that many characters, negative ints skip (delete)
+    that many, strings are inserted. Matching is done line by line,
+    which keeps diffing cheap for multi-kilobyte texts.
+    """
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    ops: List[Any] = []
+
+    def push(op):
+        # Merge runs of the same kind to keep the delta small
+        if ops and type(ops[-1]) is type(op) and (isinstance(op, str) or (ops[-1] > 0) == (op > 0)):
+            ops[-1] += op
+        else:
+            ops.append(op)
+
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            push(sum(len(line) for line in old_lines[i1:i2]))
+            continue
+        if tag in ("delete", "replace"):
+            push(-sum(len(line) for line in old_lines[i1:i2]))
+        if tag in ("insert", "replace"):
+            push("".join(new_lines[j1:j2]))
+
+    # Trailing "keep" is implied
+    if ops and isinstance(ops[-1], int) and ops[-1] > 0:
+        ops.pop()
+    return ops
+
+
+def apply_text_delta(old: str, ops: List[Any]) -> str:
+    """Apply an op list produced by ``encode_text_delta``."""
+    out = []
+    pos = 0
+    for op in ops:
+        if isinstance(op, str):
+            out.append(op)
+        elif op >= 0:
+            out.append(old[pos:pos + op])
+            pos += op
+        else:
+            pos -= op
+    out.append(old[pos:])
+    return "".join(out)
+
+
+class ReportRevisionService:
+    """Service for recording and reconstructing report revisions."""
+
+    @staticmethod
+    def snapshot(report: ReportEntry) -> Dict[str, Any]:
+        """Capture the tracked fields of a report."""
+        return {field: getattr(report, field) for field in TRACKED_FIELDS}
+
+    @staticmethod
+    def _make_delta(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a delta holding only the fields that changed."""
+        delta = {}
+        for field in TRACKED_FIELDS:
+            old, new = previous.get(field), current.get(field)
+            if old == new:
+                continue
+            if field in DRAFT_TEXT_FIELDS and old is not None and new is not None:
+                delta[field] = {"d": encode_text_delta(old, new)}
+            else:
+                delta[field] = {"v": new}
+        return delta
+
+    @staticmethod
+    def _apply_delta(previous: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+        current = dict(previous)
+        for field, change in delta.items():
+            if "d" in change:
+                current[field] = apply_text_delta(previous.get(field) or "", change["d"])
+            else:
+                current[field] = change["v"]
+        return current
+
+    @staticmethod
+    async def _load_chain(
+        db: AsyncSession,
+        report_id: int,
+        version: Optional[int] = None
+    ) -> List[ReportRevision]:
+        """Load revisions from the nearest keyframe up to ``version`` (latest if None)."""
+        conditions = [ReportRevision.report_id == report_id]
+        if version is not None:
+            conditions.append(ReportRevision.version <= version)
+
+        keyframe_version = select(func.max(ReportRevision.version)).where(
+            and_(*conditions, ReportRevision.is_keyframe.is_(True))
+        ).scalar_subquery()
+
+        result = await db.execute(
+            select(ReportRevision).where(
+                and_(*conditions, ReportRevision.version >= keyframe_version)
+            ).order_by(ReportRevision.version)
+        )
+        return result.scalars().all()
+
+    @staticmethod
+    def _replay(chain: List[ReportRevision]) -> Dict[str, Any]:
+        content = dict(chain[0].data)
+        for revision in chain[1:]:
+            content = ReportRevisionService._apply_delta(content, revision.data)
+        return content
+
+    @staticmethod
+    async def reconstruct(
+        db: AsyncSession,
+        report_id: int,
+        version: int
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Rebuild report content at a given version.
+        Reads at most REPORT_REVISION_KEYFRAME_INTERVAL revisions.
+        """
+        chain = await ReportRevisionService._load_chain(db, report_id, version)
+        if not chain or chain[-1].version != version:
+            return None
+        return ReportRevisionService._replay(chain)
+
+    @staticmethod
+    async def record_revision(
+        db: AsyncSession,
+        report: ReportEntry,
+        author_id: Optional[int]
+    ) -> ReportRevision:
+        """
+        Record the report's current state as a new revision.
+        Does not commit; the caller commits together with the report change.
+        """
+        chain = await ReportRevisionService._load_chain(db, report.id)
+        current = ReportRevisionService.snapshot(report)
+
+        if not chain or len(chain) >= settings.REPORT_REVISION_KEYFRAME_INTERVAL:
+            revision = ReportRevision(
+                report_id=report.id,
+                version=report.version,
+                is_keyframe=True,
+                data=current,
+                created_by_id=author_id
+            )
+        else:
+            previous = ReportRevisionService._replay(chain)
+            revision = ReportRevision(
+                report_id=report.id,
+                version=report.version,
+                is_keyframe=False,
+                data=ReportRevisionService._make_delta(previous, current),
+                created_by_id=author_id
+            )
+
+        db.add(revision)
+        return revision
+
+    @staticmethod
+    async def list_revisions(
+        db: AsyncSession,
+        report_id: int
+    ) -> List[ReportRevision]:
+        """List revision metadata for a report, newest first."""
+        result = await db.execute(
+            select(ReportRevision)
+            .where(ReportRevision.report_id == report_id)
+            .order_by(ReportRevision.version.desc())
+        )
+        return result.scalars().all()
+
+    @staticmethod
+    def diff(
+        old: Dict[str, Any],
+        new: Dict[str, Any],
+        from_version: int,
+        to_version: int
+    ) -> Dict[str, Any]:
+        """Per-field diff between two reconstructed versions."""
+        changes = {}
+        for field in TRACKED_FIELDS:
+            old_value, new_value = old.get(field), new.get(field)
+            if old_value == new_value:
+                continue
+            if field in DRAFT_TEXT_FIELDS:
+                changes[field] = list(difflib.unified_diff(
+                    (old_value or "").splitlines(),
+                    (new_value or "").splitlines(),
+                    fromfile=f"v{from_version}",
+                    tofile=f"v{to_version}",
+                    lineterm=""
+                ))
+            else:
+                changes[field] = {"old": old_value, "new": new_value}
+        return changes
@@ -0,0 +1,156 @@
+"""Local directory storage backend for attachment content."""
+
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from typing import AsyncIterator, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class StorageLimitExceeded(Exception):
+    """Raised when an upload grows past its size or quota limit."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        super().__init__(f"Upload exceeds limit of {limit} bytes")
+
+
+class LocalStorageBackend:
+    """
+    Content-addressed file storage on the local filesystem.
+
+    Files are stored once per SHA-256 digest under ``objects/ab/cd/<digest>``.
+    Uploads are written to ``tmp/`` chunk by chunk while being hashed, then
+    atomically moved into place (or discarded if the content already exists).
+    """
+
+    def __init__(self, root: str, chunk_size: int = 1024 * 1024):
+        self.root = root
+        self.chunk_size = chunk_size
+        self.objects_dir = os.path.join(root, "objects")
+        self.tmp_dir = os.path.join(root, "tmp")
+
+    def _ensure_dirs(self) -> None:
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def object_path(self, sha256: str) -> str:
+        """Return the storage path for a content digest."""
+        return os.path.join(self.objects_dir, sha256[:2], sha256[2:4], sha256)
+
+    def exists(self, sha256: str) -> bool:
+        return os.path.exists(self.object_path(sha256))
+
+    async def receive(
+        self,
+        chunks: AsyncIterator[bytes],
+        max_bytes: int
+    ) -> Tuple[str, int, str]:
+        """
+        Stream chunks to a temporary file, hashing as they are written.
+
+        Args:
+            chunks: Async iterator yielding file content
+            max_bytes: Hard limit on the number of bytes accepted
+
+        Returns:
+            Tuple of (sha256, size, tmp_path); pass tmp_path to ``store``
+            or ``discard``
+
+        Raises:
+            StorageLimitExceeded: As soon as more than ``max_bytes`` arrive
+        """
+        await asyncio.to_thread(self._ensure_dirs)
+
+        tmp_path = os.path.join(self.tmp_dir, uuid.uuid4().hex)
+        digest = hashlib.sha256()
+        size = 0
+
+        fh = await asyncio.to_thread(open, tmp_path, "wb")
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if size > max_bytes:
+                    raise StorageLimitExceeded(max_bytes)
+                digest.update(chunk)
+                await asyncio.to_thread(fh.write, chunk)
+            await asyncio.to_thread(fh.close)
+        except BaseException:
+            fh.close()
+            await asyncio.to_thread(self._unlink, tmp_path)
+            raise
+
+        return digest.hexdigest(), size, tmp_path
+
+    async def store(self, tmp_path: str, sha256: str) -> Tuple[str, bool]:
+        """
+        Move a received upload into place under its digest.
+        Returns (path, deduplicated); deduplicated uploads are discarded.
+        """
+        final_path = self.object_path(sha256)
+        deduplicated = await asyncio.to_thread(self._commit, tmp_path, final_path)
+        return final_path, deduplicated
+
+    async def discard(self, tmp_path: str) -> None:
+        """Drop a received upload that will not be stored."""
+        await asyncio.to_thread(self._unlink, tmp_path)
+
+    async def save_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        max_bytes: int
+    ) -> Tuple[str, int, str, bool]:
+        """
+        ``receive`` and ``store`` in one go.
+
+        Returns:
+            Tuple of (sha256, size, path, deduplicated)
+        """
+        sha256, size, tmp_path = await self.receive(chunks, max_bytes)
+        path, deduplicated = await self.store(tmp_path, sha256)
+        return sha256, size, path, deduplicated
+
+    def _commit(self, tmp_path: str, final_path: str) -> bool:
+        """Move a finished upload into place. Returns True if content already existed."""
+        if os.path.exists(final_path):
+            self._unlink(tmp_path)
+            return True
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(tmp_path, final_path)
+        return False
+
+    @staticmethod
+    def _unlink(path: str) -> None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    async def delete(self, sha256: str) -> None:
+        """Remove stored content for a digest."""
+        await asyncio.to_thread(self._unlink, self.object_path(sha256))
+        logger.info(f"Removed attachment blob {sha256}")
+
+
+async def iter_upload_file(upload, chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+    """Yield an UploadFile's content in fixed-size chunks."""
+    chunk_size = chunk_size or settings.ATTACHMENT_CHUNK_SIZE
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+# Global instance
+storage_backend = LocalStorageBackend(
+    settings.ATTACHMENT_STORAGE_DIR,
+    settings.ATTACHMENT_CHUNK_SIZE
+)
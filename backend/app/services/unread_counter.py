@@ -0,0 +1,104 @@
+"""Per-user unread in-app notification counters kept in Redis."""
+
+from collections import Counter
+from typing import Iterable
+from redis.exceptions import RedisError
+from sqlalchemy import select, func, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.models import NotificationLog, NotificationChannel
+
+logger = logging.getLogger(__name__)
+
+# Adjust a counter only if it is cached (a missing one is recounted on the
+# next read) and never below zero
+_ADJUST_SCRIPT = redis_client.register_script("""
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return nil
+end
+local value = redis.call('INCRBY', KEYS[1], ARGV[1])
+if value < 0 then
+    redis.call('SET', KEYS[1], 0, 'KEEPTTL')
+    value = 0
+end
+return value
+""")
+
+
+class UnreadCounterService:
+    """
+    Unread counts served from Redis instead of a COUNT per poll.
+
+    Counters are adjusted after the commit that creates or reads
+    notifications. A missing counter is recounted from the database and
+    cached for UNREAD_COUNT_TTL_SECONDS, so any drift (Redis outage, a race
+    with a recount) corrects itself when the key expires.
+    """
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"unread_notifications:{user_id}"
+
+    @staticmethod
+    async def count_from_db(db: AsyncSession, user_id: int) -> int:
+        return await db.scalar(
+            select(func.count(NotificationLog.id)).where(
+                and_(
+                    NotificationLog.user_id == user_id,
+                    NotificationLog.channel == NotificationChannel.IN_APP,
+                    NotificationLog.read_at.is_(None)
+                )
+            )
+        )
+
+    @staticmethod
+    async def get(db: AsyncSession, user_id: int) -> int:
+        """The user's unread count, recounted and cached on a miss."""
+        key = UnreadCounterService._key(user_id)
+        try:
+            cached = await redis_client.get(key)
+            if cached is not None:
+                return max(int(cached), 0)
+        except RedisError as e:
+            logger.warning(f"Redis unavailable for unread counters: {e}")
+            return await UnreadCounterService.count_from_db(db, user_id)
+
+        count = await UnreadCounterService.count_from_db(db, user_id)
+        try:
+            await redis_client.set(key, count, ex=settings.UNREAD_COUNT_TTL_SECONDS, nx=True)
+        except RedisError as e:
+            logger.warning(f"Failed to cache unread count: {e}")
+        return count
+
+    @staticmethod
+    async def adjust(user_ids: Iterable[int], delta: int = 1) -> None:
+        """Add ``delta`` per occurrence of each user id (negative when read)."""
+        changes = Counter(user_ids)
+        if not changes:
+            return
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for user_id, occurrences in changes.items():
+                    await _ADJUST_SCRIPT(
+                        keys=[UnreadCounterService._key(user_id)],
+                        args=[occurrences * delta],
+                        client=pipe
+                    )
+                await pipe.execute()
+        except RedisError as e:
+            # Counters are recounted once their keys expire
+            logger.warning(f"Failed to adjust unread counters: {e}")
+
+    @staticmethod
+    async def reset(user_ids: Iterable[int]) -> None:
+        """Drop cached counters so the next read recounts them."""
+        keys = [UnreadCounterService._key(user_id) for user_id in set(user_ids)]
+        if not keys:
+            return
+        try:
+            await redis_client.delete(*keys)
+        except RedisError as e:
+            logger.warning(f"Failed to reset unread counters: {e}")
@@ -0,0 +1,409 @@
+"""Slack and Teams notification delivery through incoming webhooks."""
+
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import select, insert, update, bindparam, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+from app.core.config import settings
+from app.core.webhooks import webhook_client, is_allowed_webhook_url, WebhookError
+from app.models import (
+    NotificationLog, NotificationChannel, NotificationStatus, NotificationPreference, NotificationType,
+    OutboxStatus, WebhookOutbox
+)
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Exponential backoff with +/-20% jitter so failed batches do not retry in lockstep."""
+    delay = min(
+        settings.WEBHOOK_OUTBOX_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0),
+        settings.WEBHOOK_OUTBOX_MAX_BACKOFF_SECONDS
+    )
+    return delay * random.uniform(0.8, 1.2)
+
+
+class SlackAdapter:
+    """Slack incoming webhook: one message with a section block per notification."""
+
+    channel = NotificationChannel.SLACK
+    hosts = settings.SLACK_WEBHOOK_HOSTS
+    # Slack allows 50 blocks per message; each notification takes a section and a divider
+    max_batch = 20
+
+    @staticmethod
+    def payload(messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        blocks = []
+        for message in messages:
+            if blocks:
+                blocks.append({"type": "divider"})
+            blocks.append({
+                "type": "section",
+                "text": {"type": "mrkdwn", "text": f"*{message['subject']}*\n{message['content']}"[:3000]}
+            })
+        return {
+            # Shown in notifications and by clients without block support
+            "text": messages[0]["subject"] if len(messages) == 1 else f"{len(messages)} new notifications",
+            "blocks": blocks
+        }
+
+
+class TeamsAdapter:
+    """Teams incoming webhook: one message card with a section per notification."""
+
+    channel = NotificationChannel.TEAMS
+    hosts = settings.TEAMS_WEBHOOK_HOSTS
+    # Teams renders at most 10 sections per card
+    max_batch = 10
+
+    @staticmethod
+    def payload(messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "@type": "MessageCard",
+            "@context": "https://schema.org/extensions",
+            "summary": messages[0]["subject"] if len(messages) == 1 else f"{len(messages)} new notifications",
+            "sections": [
+                {"activityTitle": message["subject"], "text": message["content"]}
+                for message in messages
+            ]
+        }
+
+
+ADAPTERS = {
+    NotificationChannel.SLACK: SlackAdapter,
+    NotificationChannel.TEAMS: TeamsAdapter,
+}
+
+
+class WebhookDeliveryService:
+    """
+    Sends notifications to users' Slack and Teams webhooks.
+
+    Messages are queued in webhook_outbox in the caller's transaction and
+    posted by the dispatcher, so they go out if and only if the change
+    that caused them was committed, and are retried with backoff when a
+    post fails. Messages for the same webhook URL are merged into as few
+    posts as the target allows, and all posts run concurrently over the
+    shared webhook client.
+    """
+
+    @staticmethod
+    def messages_for(
+        prefs: Optional[NotificationPreference],
+        user_id: int,
+        type: NotificationType,
+        subject: str,
+        content: str,
+        extra_data: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        One message per webhook channel the user enabled and configured
+        with an allowed URL (see is_allowed_webhook_url).
+        """
+        if not prefs:
+            return []
+        targets = []
+        if prefs.slack_enabled and prefs.slack_webhook_url:
+            targets.append((NotificationChannel.SLACK, prefs.slack_webhook_url))
+        if prefs.teams_enabled and prefs.teams_webhook_url:
+            targets.append((NotificationChannel.TEAMS, prefs.teams_webhook_url))
+        for channel, url in list(targets):
+            if not is_allowed_webhook_url(url, ADAPTERS[channel].hosts):
+                logger.warning(f"Skipping {channel.value} webhook of user {user_id}: URL not allowed")
+                targets.remove((channel, url))
+        return [
+            {
+                "user_id": user_id,
+                "channel": channel,
+                "url": url,
+                "type": type,
+                "subject": subject,
+                "content": content,
+                "extra_data": extra_data or {}
+            }
+            for channel, url in targets
+        ]
+
+    @staticmethod
+    async def _post_batch(messages: List[Dict[str, Any]], check_url: bool) -> Optional[str]:
+        adapter = ADAPTERS[messages[0]["channel"]]
+        if check_url and not is_allowed_webhook_url(messages[0]["url"], adapter.hosts):
+            return f"{adapter.channel.value} webhook URL not allowed"
+        try:
+            await webhook_client.post(messages[0]["url"], adapter.payload(messages))
+            return None
+        except WebhookError as e:
+            logger.warning(f"{adapter.channel.value} webhook for user {messages[0]['user_id']} failed: {e}")
+            return str(e)[:2000]
+        except Exception as e:
+            # e.g. a malformed URL; fail the batch instead of the whole send
+            logger.exception(f"{adapter.channel.value} webhook for user {messages[0]['user_id']} failed")
+            return f"{type(e).__name__}: {e}"[:2000]
+
+    @staticmethod
+    async def send(
+        messages: List[Dict[str, Any]],
+        check_urls: bool = True
+    ) -> List[Optional[str]]:
+        """
+        Post messages, batched per (channel, webhook URL) up to the
+        adapter's limit. URLs off the adapter's allowed hosts fail without
+        a request unless ``check_urls`` is off (local benchmarks only).
+        Returns the error text per message (None if sent).
+        """
+        groups: Dict[tuple, List[int]] = {}
+        for i, message in enumerate(messages):
+            groups.setdefault((message["channel"], message["url"]), []).append(i)
+
+        batches = []
+        for (channel, _), positions in groups.items():
+            size = ADAPTERS[channel].max_batch
+            batches.extend(positions[start:start + size] for start in range(0, len(positions), size))
+
+        results = await asyncio.gather(*(
+            WebhookDeliveryService._post_batch([messages[i] for i in batch], check_urls)
+            for batch in batches
+        ))
+        errors: List[Optional[str]] = [None] * len(messages)
+        for batch, error in zip(batches, results):
+            for i in batch:
+                errors[i] = error
+        return errors
+
+    @staticmethod
+    async def enqueue(
+        db: AsyncSession,
+        messages: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Queue messages (from messages_for) together with their pending
+        NotificationLog entries. Does not commit, so callers include it in
+        their own transaction; dispatch() posts them once it is committed.
+        Returns the number of messages queued.
+        """
+        if not messages:
+            return 0
+
+        now = datetime.utcnow()
+        result = await db.execute(
+            insert(NotificationLog).returning(NotificationLog.id, sort_by_parameter_order=True),
+            [
+                {
+                    "user_id": message["user_id"],
+                    "type": message["type"],
+                    "channel": message["channel"],
+                    "subject": message["subject"],
+                    "content": message["content"],
+                    "status": NotificationStatus.PENDING,
+                    "created_at": now,
+                    "extra_data": message["extra_data"]
+                }
+                for message in messages
+            ]
+        )
+        await db.execute(
+            insert(WebhookOutbox),
+            [
+                {
+                    "user_id": message["user_id"],
+                    "notification_log_id": log_id,
+                    "channel": message["channel"],
+                    "url": message["url"],
+                    "subject": message["subject"],
+                    "content": message["content"],
+                    "status": OutboxStatus.PENDING,
+                    "attempts": 0,
+                    "next_attempt_at": now,
+                    "created_at": now
+                }
+                for message, log_id in zip(messages, result.scalars().all())
+            ]
+        )
+        return len(messages)
+
+    @staticmethod
+    async def _claim_batch(db: AsyncSession, batch_size: int) -> List[Any]:
+        """
+        Lease a batch of due messages to this worker and commit, as
+        EmailOutboxService._claim_batch does: no lock is held while
+        webhooks are slow, a crashed worker's messages become due again
+        when the lease ends, and the attempt is counted up front, so
+        messages whose lease ran out on their last attempt are marked dead
+        instead of being leased again.
+        """
+        now = datetime.utcnow()
+        # Out of attempts but due again: the last lease expired unanswered
+        exhausted = (
+            select(WebhookOutbox.id)
+            .where(
+                and_(
+                    WebhookOutbox.status == OutboxStatus.PENDING,
+                    WebhookOutbox.next_attempt_at <= now,
+                    WebhookOutbox.attempts >= settings.WEBHOOK_OUTBOX_MAX_ATTEMPTS
+                )
+            )
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.execute(
+            update(WebhookOutbox)
+            .where(WebhookOutbox.id.in_(exhausted))
+            .values(
+                status=OutboxStatus.DEAD,
+                last_error="Lease expired on the last attempt (worker crashed or hung)"
+            )
+            .returning(WebhookOutbox.notification_log_id)
+            .execution_options(synchronize_session=False)
+        )
+        dead_log_ids = [log_id for log_id in result.scalars().all() if log_id]
+        if dead_log_ids:
+            await db.execute(
+                update(NotificationLog)
+                .where(NotificationLog.id.in_(dead_log_ids))
+                .values(status=NotificationStatus.FAILED)
+                .execution_options(synchronize_session=False)
+            )
+
+        due = (
+            select(WebhookOutbox.id)
+            .where(
+                and_(
+                    WebhookOutbox.status == OutboxStatus.PENDING,
+                    WebhookOutbox.next_attempt_at <= now,
+                    WebhookOutbox.attempts < settings.WEBHOOK_OUTBOX_MAX_ATTEMPTS
+                )
+            )
+            .order_by(WebhookOutbox.next_attempt_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.execute(
+            update(WebhookOutbox)
+            .where(WebhookOutbox.id.in_(due))
+            .values(
+                attempts=WebhookOutbox.attempts + 1,
+                next_attempt_at=now + timedelta(seconds=settings.WEBHOOK_OUTBOX_LEASE_SECONDS)
+            )
+            .returning(
+                WebhookOutbox.id,
+                WebhookOutbox.user_id,
+                WebhookOutbox.notification_log_id,
+                WebhookOutbox.channel,
+                WebhookOutbox.url,
+                WebhookOutbox.subject,
+                WebhookOutbox.content,
+                WebhookOutbox.attempts
+            )
+            .execution_options(synchronize_session=False)
+        )
+        rows = result.all()
+        await db.commit()
+        return rows
+
+    @staticmethod
+    async def _record_results(
+        db: AsyncSession,
+        rows: List[Any],
+        errors: List[Optional[str]]
+    ) -> Dict[str, int]:
+        """Write the outcome of a batch with a few bulk statements and one commit."""
+        now = datetime.utcnow()
+        sent = [row for row, error in zip(rows, errors) if error is None]
+        failed = [
+            {
+                "outbox_id": row.id,
+                "status": OutboxStatus.DEAD if row.attempts >= settings.WEBHOOK_OUTBOX_MAX_ATTEMPTS else OutboxStatus.PENDING,
+                "next_attempt_at": now + timedelta(seconds=backoff_seconds(row.attempts)),
+                "last_error": error
+            }
+            for row, error in zip(rows, errors) if error is not None
+        ]
+        dead_log_ids = [
+            row.notification_log_id
+            for row, error in zip(rows, errors)
+            if error is not None and row.notification_log_id
+            and row.attempts >= settings.WEBHOOK_OUTBOX_MAX_ATTEMPTS
+        ]
+
+        if sent:
+            await db.execute(
+                update(WebhookOutbox)
+                .where(WebhookOutbox.id.in_([row.id for row in sent]))
+                .values(status=OutboxStatus.SENT, sent_at=now, last_error=None)
+                .execution_options(synchronize_session=False)
+            )
+            sent_log_ids = [row.notification_log_id for row in sent if row.notification_log_id]
+            if sent_log_ids:
+                await db.execute(
+                    update(NotificationLog)
+                    .where(NotificationLog.id.in_(sent_log_ids))
+                    .values(status=NotificationStatus.SENT, sent_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+
+        if failed:
+            outbox = WebhookOutbox.__table__
+            await db.execute(
+                update(outbox)
+                .where(outbox.c.id == bindparam("outbox_id"))
+                .values(
+                    status=bindparam("status"),
+                    next_attempt_at=bindparam("next_attempt_at"),
+                    last_error=bindparam("last_error")
+                ),
+                failed
+            )
+        if dead_log_ids:
+            await db.execute(
+                update(NotificationLog)
+                .where(NotificationLog.id.in_(dead_log_ids))
+                .values(status=NotificationStatus.FAILED)
+                .execution_options(synchronize_session=False)
+            )
+
+        await db.commit()
+        dead = sum(1 for item in failed if item["status"] == OutboxStatus.DEAD)
+        return {"sent": len(sent), "retried": len(failed) - dead, "dead": dead}
+
+    @staticmethod
+    async def dispatch(
+        db: AsyncSession,
+        batch_size: int = settings.WEBHOOK_OUTBOX_BATCH_SIZE
+    ) -> Dict[str, int]:
+        """
+        Drain all due messages in leased batches, posting each batch with
+        send(). Any number of dispatchers may run at once. Returns
+        sent/retried/dead counts.
+        """
+        started = time.monotonic()
+        totals = {"sent": 0, "retried": 0, "dead": 0}
+        while True:
+            rows = await WebhookDeliveryService._claim_batch(db, batch_size)
+            if not rows:
+                break
+
+            errors = await WebhookDeliveryService.send([
+                {
+                    "user_id": row.user_id,
+                    "channel": row.channel,
+                    "url": row.url,
+                    "subject": row.subject,
+                    "content": row.content
+                }
+                for row in rows
+            ])
+            for key, count in (await WebhookDeliveryService._record_results(db, rows, errors)).items():
+                totals[key] += count
+
+        processed = sum(totals.values())
+        if processed:
+            elapsed = time.monotonic() - started
+            logger.info(
+                f"Dispatched {processed} webhook notifications ({totals['sent']} sent, "
+                f"{totals['retried']} to retry, {totals['dead']} dead) in {elapsed:.1f}s"
+            )
+        return totals
@@ -0,0 +1,8 @@
+import socket
+
+
+def free_port() -> int:
+    """A localhost TCP port nothing is listening on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.services import idempotency
+from app.services.idempotency import IdempotencyService, IdempotentRequest
+
+
+class FakeRedis:
+    """Just enough of redis.asyncio for the idempotency service."""
+
+    def __init__(self):
+        self.values = {}
+        self.ttls = {}
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        self.ttls[key] = ex
+        return True
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+            self.ttls.pop(key, None)
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(idempotency, "redis_client", fake)
+    return fake
+
+
+def make_request() -> IdempotentRequest:
+    return IdempotentRequest(key="retry-1", fingerprint="abc")
+
+
+async def test_reservation_uses_the_short_lock_ttl(redis):
+    seen = {}
+
+    async def handler():
+        seen.update(redis.ttls)
+        return {"ok": True}
+
+    response = await IdempotencyService.run(None, 1, make_request(), handler)
+
+    key = IdempotencyService._redis_key(1, "retry-1")
+    assert response == {"ok": True}
+    assert seen[key] == settings.IDEMPOTENCY_LOCK_TTL_SECONDS
+    assert redis.ttls[key] == settings.IDEMPOTENCY_KEY_TTL_SECONDS
+    assert json.loads(redis.values[key])["status_code"] == 200
+
+
+async def test_retry_is_replayed(redis):
+    calls = []
+
+    async def handler():
+        calls.append(1)
+        return {"ok": True}
+
+    await IdempotencyService.run(None, 1, make_request(), handler)
+    replay = await IdempotencyService.run(None, 1, make_request(), handler)
+
+    assert len(calls) == 1
+    assert replay.headers["Idempotent-Replayed"] == "true"
+
+
+@pytest.mark.parametrize("error", [ValueError("boom"), asyncio.CancelledError()])
+async def test_failed_or_cancelled_handler_releases_the_key(redis, error):
+    async def handler():
+        raise error
+
+    with pytest.raises(type(error)):
+        await IdempotencyService.run(None, 1, make_request(), handler)
+
+    assert redis.values == {}
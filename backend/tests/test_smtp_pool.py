@@ -0,0 +1,136 @@
+import asyncio
+from email.message import EmailMessage
+
+import aiosmtplib
+import pytest
+from aiosmtpd.controller import Controller
+
+from app.core.smtp import SMTPConnectionPool
+from tests.conftest import free_port
+
+
+class RecordingHandler:
+    """Accepts every message and remembers the connection it came in on."""
+
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.peers = []
+        self.servers = []
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.peers.append(session.peer)
+        self.servers.append(server)
+        return "250 OK"
+
+
+def make_message(number: int) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = "tracker@example.org"
+    message["To"] = f"student{number}@example.org"
+    message["Subject"] = f"Message {number}"
+    message.set_content("Hello")
+    return message
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    yield controller
+    controller.stop()
+
+
+def make_pool(controller: Controller, **kwargs) -> SMTPConnectionPool:
+    return SMTPConnectionPool(hostname=controller.hostname, port=controller.port, size=2, **kwargs)
+
+
+async def test_sequential_sends_reuse_one_session(smtp_server):
+    pool = make_pool(smtp_server)
+    try:
+        for number in range(3):
+            await pool.send(make_message(number))
+    finally:
+        await pool.close()
+
+    assert len(smtp_server.handler.peers) == 3
+    assert len(set(smtp_server.handler.peers)) == 1
+
+
+async def test_send_many_uses_one_session(smtp_server):
+    pool = make_pool(smtp_server)
+    try:
+        errors = await pool.send_many([(make_message(number), None) for number in range(5)])
+    finally:
+        await pool.close()
+
+    assert errors == [None] * 5
+    assert len(set(smtp_server.handler.peers)) == 1
+
+
+async def test_concurrent_sends_are_bounded_by_pool_size(smtp_server):
+    pool = make_pool(smtp_server)
+    try:
+        await asyncio.gather(*(pool.send(make_message(number)) for number in range(6)))
+    finally:
+        await pool.close()
+
+    assert len(smtp_server.handler.peers) == 6
+    assert len(set(smtp_server.handler.peers)) <= pool.size
+
+
+async def test_send_reconnects_after_server_disconnect(smtp_server):
+    pool = make_pool(smtp_server)
+    try:
+        await pool.send(make_message(1))
+        # The server drops the idle session behind the pool's back
+        server = smtp_server.handler.servers[-1]
+        smtp_server.loop.call_soon_threadsafe(server.transport.close)
+        await asyncio.sleep(0.1)
+
+        await pool.send(make_message(2))
+    finally:
+        await pool.close()
+
+    first, second = smtp_server.handler.peers
+    assert first != second
+
+
+async def test_idle_sessions_are_replaced_after_idle_timeout(smtp_server):
+    pool = make_pool(smtp_server, idle_timeout=0.05)
+    try:
+        await pool.send(make_message(1))
+        await asyncio.sleep(0.1)
+        await pool.send(make_message(2))
+    finally:
+        await pool.close()
+
+    first, second = smtp_server.handler.peers
+    assert first != second
+
+
+async def test_slow_server_times_out_and_session_is_dropped():
+    handler = RecordingHandler(delay=2)
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    pool = make_pool(controller, timeout=0.3)
+    try:
+        with pytest.raises((asyncio.TimeoutError, aiosmtplib.SMTPTimeoutError)):
+            await pool.send(make_message(1))
+        assert pool._idle == []
+    finally:
+        await pool.close()
+        controller.stop()
+
+
+async def test_send_many_reports_errors_when_reconnect_fails():
+    pool = SMTPConnectionPool(hostname="127.0.0.1", port=free_port(), timeout=1)
+    try:
+        errors = await pool.send_many([(make_message(number), None) for number in range(3)])
+    finally:
+        await pool.close()
+
+    assert len(errors) == 3
+    assert all(error and "SMTPConnectError" in error for error in errors)
@@ -0,0 +1,155 @@
+import json
+import time
+
+import httpx
+import pytest
+
+from app.core.webhooks import WebhookClient, WebhookError
+from app.models import NotificationChannel
+from app.services import webhook_delivery
+from app.services.webhook_delivery import WebhookDeliveryService
+
+SLACK_URL = "https://hooks.slack.com/services/T000/B000/one"
+OTHER_SLACK_URL = "https://hooks.slack.com/services/T000/B000/two"
+TEAMS_URL = "https://contoso.webhook.office.com/webhookb2/three"
+
+
+class Recorder:
+    """Mock transport answering with queued responses (the last one repeats)."""
+
+    def __init__(self, *responses: httpx.Response, by_url=None):
+        self.responses = list(responses) or [httpx.Response(200)]
+        self.by_url = by_url or {}
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if str(request.url) in self.by_url:
+            return self.by_url[str(request.url)]
+        return self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+
+
+def make_client(recorder: Recorder, **kwargs) -> WebhookClient:
+    return WebhookClient(transport=httpx.MockTransport(recorder), **kwargs)
+
+
+def make_message(number: int, url: str, channel: NotificationChannel = NotificationChannel.SLACK):
+    return {"user_id": number, "channel": channel, "url": url, "subject": f"Reminder {number}", "content": "Due soon"}
+
+
+async def test_rate_limited_post_is_retried_after_retry_after():
+    recorder = Recorder(httpx.Response(429, headers={"Retry-After": "0.2"}), httpx.Response(200))
+    client = make_client(recorder)
+    started = time.monotonic()
+    try:
+        await client.post(SLACK_URL, {"text": "hello"})
+    finally:
+        await client.close()
+
+    assert len(recorder.requests) == 2
+    assert time.monotonic() - started >= 0.2
+
+
+async def test_retry_after_longer_than_the_limit_gives_up():
+    recorder = Recorder(httpx.Response(429, headers={"Retry-After": "120"}))
+    client = make_client(recorder, max_retry_after=30)
+    try:
+        with pytest.raises(WebhookError) as error:
+            await client.post(SLACK_URL, {"text": "hello"})
+    finally:
+        await client.close()
+
+    assert error.value.status_code == 429
+    assert len(recorder.requests) == 1
+
+
+async def test_rate_limited_post_gives_up_after_max_retries():
+    recorder = Recorder(httpx.Response(429, headers={"Retry-After": "0"}))
+    client = make_client(recorder, max_retries=2)
+    try:
+        with pytest.raises(WebhookError):
+            await client.post(SLACK_URL, {"text": "hello"})
+    finally:
+        await client.close()
+
+    assert len(recorder.requests) == 3
+
+
+@pytest.mark.parametrize("status_code", [400, 403, 404, 410])
+async def test_client_errors_are_not_retried(status_code):
+    recorder = Recorder(httpx.Response(status_code, text="invalid_token"))
+    client = make_client(recorder)
+    try:
+        with pytest.raises(WebhookError) as error:
+            await client.post(SLACK_URL, {"text": "hello"})
+    finally:
+        await client.close()
+
+    assert error.value.status_code == status_code
+    assert len(recorder.requests) == 1
+
+
+@pytest.fixture
+def delivery_client(monkeypatch):
+    """Point WebhookDeliveryService at a mock transport."""
+    def install(recorder: Recorder) -> WebhookClient:
+        client = make_client(recorder)
+        monkeypatch.setattr(webhook_delivery, "webhook_client", client)
+        return client
+    return install
+
+
+async def test_send_batches_messages_per_url(delivery_client):
+    recorder = Recorder()
+    client = delivery_client(recorder)
+    messages = (
+        [make_message(i, SLACK_URL) for i in range(25)]
+        + [make_message(i, OTHER_SLACK_URL) for i in range(3)]
+        + [make_message(i, TEAMS_URL, NotificationChannel.TEAMS) for i in range(12)]
+    )
+    try:
+        errors = await WebhookDeliveryService.send(messages)
+    finally:
+        await client.close()
+
+    assert errors == [None] * len(messages)
+    sizes = {}
+    for request in recorder.requests:
+        payload = json.loads(request.content)
+        count = len(payload["sections"]) if "sections" in payload else len(
+            [block for block in payload["blocks"] if block["type"] == "section"]
+        )
+        sizes.setdefault(str(request.url), []).append(count)
+    # Slack takes 20 notifications per post, Teams 10
+    assert sorted(sizes[SLACK_URL]) == [5, 20]
+    assert sizes[OTHER_SLACK_URL] == [3]
+    assert sorted(sizes[TEAMS_URL]) == [2, 10]
+
+
+async def test_send_fails_only_the_batches_that_failed(delivery_client):
+    recorder = Recorder(by_url={OTHER_SLACK_URL: httpx.Response(404, text="no_service")})
+    client = delivery_client(recorder)
+    messages = [make_message(1, SLACK_URL), make_message(2, OTHER_SLACK_URL), make_message(3, SLACK_URL)]
+    try:
+        errors = await WebhookDeliveryService.send(messages)
+    finally:
+        await client.close()
+
+    assert errors[0] is None and errors[2] is None
+    assert "404" in errors[1]
+    # One post per URL; the 404 is not retried
+    assert len(recorder.requests) == 2
+
+
+async def test_send_does_not_request_urls_off_the_allowlist(delivery_client):
+    recorder = Recorder()
+    client = delivery_client(recorder)
+    messages = [make_message(1, "http://169.254.169.254/latest/meta-data"), make_message(2, SLACK_URL)]
+    try:
+        errors = await WebhookDeliveryService.send(messages)
+    finally:
+        await client.close()
+
+    assert "not allowed" in errors[0]
+    assert errors[1] is None
+    assert [str(request.url) for request in recorder.requests] == [SLACK_URL]
@@ -3,7 +3,11 @@ import {
   NotificationPreferences, 
   InAppNotification, 
   NotificationList,
-  TestNotificationRequest 
+  TestNotificationRequest,
+  AnnouncementCreate,
+  AnnouncementResult,
+  UnreadCount,
+  BulkNotificationResult
 } from '../types/notifications';
 
 export const notificationsApi = {
@@ -21,22 +25,56 @@ export const notificationsApi = {
 
   // Get notifications list
   getNotifications: async (params?: {
+    cursor?: string;
     skip?: number;
     limit?: number;
     unread_only?: boolean;
+    include_total?: boolean;
   }): Promise<NotificationList> => {
     const response = await apiClient.get<NotificationList>('/notifications', { params });
     return response.data;
   },
 
+  // Get the unread count (cheap enough to poll)
+  getUnreadCount: async (): Promise<number> => {
+    const response = await apiClient.get<UnreadCount>('/notifications/unread-count');
+    return response.data.unread_count;
+  },
+
   // Mark notification as read
   markAsRead: async (notificationId: number): Promise<void> => {
     await apiClient.put(`/notifications/${notificationId}/read`);
   },
 
+  // Mark several notifications as read
+  markManyAsRead: async (ids: number[]): Promise<BulkNotificationResult> => {
+    const response = await apiClient.post<BulkNotificationResult>('/notifications/read', { ids });
+    return response.data;
+  },
+
+  // Mark all notifications up to the newest one seen as read
+  markAllAsRead: async (upToId?: number): Promise<BulkNotificationResult> => {
+    const response = await apiClient.post<BulkNotificationResult>('/notifications/read-all', { up_to_id: upToId });
+    return response.data;
+  },
+
+  // Delete notifications older than the given number of days
+  deleteOlderThan: async (days: number): Promise<BulkNotificationResult> => {
+    const response = await apiClient.delete<BulkNotificationResult>('/notifications', {
+      params: { older_than_days: days },
+    });
+    return response.data;
+  },
+
   // Send test notification
   sendTest: async (request?: TestNotificationRequest): Promise<{ message: string }> => {
     const response = await apiClient.post<{ message: string }>('/notifications/test', request || {});
     return response.data;
   },
+
+  // Send an in-app announcement to a group of users (admin only)
+  createAnnouncement: async (announcement: AnnouncementCreate): Promise<AnnouncementResult> => {
+    const response = await apiClient.post<AnnouncementResult>('/notifications/announcements', announcement);
+    return response.data;
+  },
 };
\ No newline at end of file
@@ -1,5 +1,15 @@
 import apiClient from './client';
-import { ReportPeriod, ReportEntry, ReportEntryCreate, QuickUpdate, ReportComment } from '../types/report';
+import {
+  ReportPeriod,
+  ReportPeriodWindow,
+  SubmissionMatrix,
+  ReportEntry,
+  ReportEntryCreate,
+  QuickUpdate,
+  ReportComment,
+  ReportPatchOperation,
+  BatchResult,
+} from '../types/report';
 
 export const reportsApi = {
   // Get report periods
@@ -9,15 +19,50 @@ export const reportsApi = {
     return response.data;
   },
 
-  // Submit report
-  submitReport: async (data: ReportEntryCreate) => {
-    const response = await apiClient.post<ReportEntry>('/reports/submit', data);
+  // Supervised students' periods grouped by period window (supervisor/admin)
+  getPeriodWindows: async (params: { before?: string; limit?: number; status?: string } = {}) => {
+    const response = await apiClient.get<ReportPeriodWindow[]>('/reports/periods/windows', { params });
+    return response.data;
+  },
+
+  // Submission heatmap for a supervisor's students, cells decoded to one status code each
+  getSubmissionMatrix: async (params: { period_type?: string; start_from?: string; start_to?: string } = {}) => {
+    const response = await apiClient.get<SubmissionMatrix>('/reports/matrix', {
+      params: { ...params, encoding: 'base64' },
+    });
+    const matrix = response.data;
+    const cells =
+      typeof matrix.cells === 'string'
+        ? Uint8Array.from(atob(matrix.cells), (c) => c.charCodeAt(0))
+        : Uint8Array.from(matrix.cells);
+    return { ...matrix, cells };
+  },
+
+  // Submit report (pass the same idempotency key when retrying)
+  submitReport: async (data: ReportEntryCreate, idempotencyKey: string = crypto.randomUUID()) => {
+    const response = await apiClient.post<ReportEntry>('/reports/submit', data, {
+      headers: { 'Idempotency-Key': idempotencyKey },
+    });
+    return response.data;
+  },
+
+  // Autosave draft changes (409 if the report changed since `version`)
+  patchDraft: async (
+    reportId: number,
+    version: number,
+    changes: ReportPatchOperation[] | Partial<ReportEntryCreate>
+  ) => {
+    const response = await apiClient.patch<ReportEntry>(`/reports/${reportId}`, changes, {
+      headers: { 'If-Match': `"${version}"` },
+    });
     return response.data;
   },
 
   // Quick update
-  quickUpdate: async (periodId: number, data: QuickUpdate) => {
-    const response = await apiClient.put(`/reports/${periodId}/quick-update`, data);
+  quickUpdate: async (periodId: number, data: QuickUpdate, idempotencyKey: string = crypto.randomUUID()) => {
+    const response = await apiClient.put(`/reports/${periodId}/quick-update`, data, {
+      headers: { 'Idempotency-Key': idempotencyKey },
+    });
     return response.data;
   },
 
@@ -28,17 +73,48 @@ export const reportsApi = {
   },
 
   // Add comment
-  addComment: async (reportId: number, data: ReportComment) => {
-    const response = await apiClient.post(`/reports/${reportId}/comment`, data);
+  addComment: async (reportId: number, data: ReportComment, idempotencyKey: string = crypto.randomUUID()) => {
+    const response = await apiClient.post(`/reports/${reportId}/comment`, data, {
+      headers: { 'Idempotency-Key': idempotencyKey },
+    });
     return response.data;
   },
 
   // Acknowledge report (supervisor)
-  acknowledgeReport: async (reportId: number, comment?: string) => {
-    const response = await apiClient.put(`/reports/${reportId}/acknowledge`, {
-      acknowledged: true,
-      comment,
-    });
+  acknowledgeReport: async (reportId: number, comment?: string, idempotencyKey: string = crypto.randomUUID()) => {
+    const response = await apiClient.put(
+      `/reports/${reportId}/acknowledge`,
+      { acknowledged: true, comment },
+      { headers: { 'Idempotency-Key': idempotencyKey } }
+    );
+    return response.data;
+  },
+
+  // Comment on several reports at once
+  addCommentBatch: async (
+    reportIds: number[],
+    data: ReportComment,
+    idempotencyKey: string = crypto.randomUUID()
+  ) => {
+    const response = await apiClient.post<BatchResult>(
+      '/reports/batch/comment',
+      { ...data, report_ids: reportIds },
+      { headers: { 'Idempotency-Key': idempotencyKey } }
+    );
+    return response.data;
+  },
+
+  // Acknowledge several reports at once (supervisor)
+  acknowledgeReports: async (
+    reportIds: number[],
+    comment?: string,
+    idempotencyKey: string = crypto.randomUUID()
+  ) => {
+    const response = await apiClient.post<BatchResult>(
+      '/reports/batch/acknowledge',
+      { report_ids: reportIds, comment },
+      { headers: { 'Idempotency-Key': idempotencyKey } }
+    );
     return response.data;
   },
-};
\ No newline at end of file
+};
@@ -10,12 +10,18 @@ export const NotificationDropdown: React.FC = () => {
   const [isOpen, setIsOpen] = useState(false);
   const dropdownRef = useRef<HTMLDivElement>(null);
 
-  // Fetch notifications
+  // Poll the unread count for the badge
+  const { data: unreadCount = 0, refetch: refetchUnreadCount } = useQuery({
+    queryKey: ['notifications', 'unread-count'],
+    queryFn: notificationsApi.getUnreadCount,
+    refetchInterval: 30000, // Refresh every 30 seconds
+  });
+
+  // Fetch notifications when open, and again when new ones arrive
   const { data, isLoading, refetch } = useQuery({
-    queryKey: ['notifications', { limit: 10, unread_only: false }],
+    queryKey: ['notifications', { limit: 10, unread_only: false }, unreadCount],
     queryFn: () => notificationsApi.getNotifications({ limit: 10 }),
     enabled: isOpen,
-    refetchInterval: 30000, // Refresh every 30 seconds when open
   });
 
   // Close dropdown when clicking outside
@@ -39,11 +45,23 @@ export const NotificationDropdown: React.FC = () => {
     try {
       await notificationsApi.markAsRead(notificationId);
       refetch();
+      refetchUnreadCount();
     } catch (error) {
       console.error('Failed to mark notification as read:', error);
     }
   };
 
+  const handleMarkAllAsRead = async () => {
+    try {
+      // Watermark: notifications that arrive meanwhile stay unread
+      await notificationsApi.markAllAsRead(data?.items[0]?.id);
+      refetch();
+      refetchUnreadCount();
+    } catch (error) {
+      console.error('Failed to mark notifications as read:', error);
+    }
+  };
+
   const getNotificationIcon = (type: NotificationType) => {
     switch (type) {
       case 'reminder':
@@ -70,7 +88,7 @@ export const NotificationDropdown: React.FC = () => {
         <Bell className="h-6 w-6" />
         
         {/* Unread count badge */}
-        {data?.unread_count && data.unread_count > 0 && (
+        {unreadCount > 0 && (
           <span className="absolute top-0 right-0 block h-2 w-2 transform translate-x-1/2 -translate-y-1/2 rounded-full bg-red-500 ring-2 ring-white" />
         )}
       </button>
@@ -88,10 +106,19 @@ export const NotificationDropdown: React.FC = () => {
                 <X className="h-5 w-5" />
               </button>
             </div>
-            {data?.unread_count && data.unread_count > 0 && (
-              <p className="mt-1 text-sm text-gray-500">
-                {data.unread_count} unread notification{data.unread_count > 1 ? 's' : ''}
-              </p>
+            {unreadCount > 0 && (
+              <div className="mt-1 flex items-center justify-between">
+                <p className="text-sm text-gray-500">
+                  {unreadCount} unread notification{unreadCount > 1 ? 's' : ''}
+                </p>
+                <button
+                  onClick={handleMarkAllAsRead}
+                  className="text-xs text-blue-600 hover:text-blue-800 flex items-center"
+                >
+                  <Check className="h-3 w-3 mr-1" />
+                  Mark all as read
+                </button>
+              </div>
             )}
           </div>
 
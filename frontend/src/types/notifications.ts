@@ -30,10 +30,34 @@ export interface InAppNotification {
 
 export interface NotificationList {
   items: InAppNotification[];
-  total: number;
+  total: number | null; // Only with include_total
+  unread_count: number;
+  next_cursor: string | null; // null on the last page
+}
+
+export interface UnreadCount {
+  unread_count: number;
+}
+
+export interface BulkNotificationResult {
+  updated: number;
   unread_count: number;
 }
 
 export interface TestNotificationRequest {
   email?: string;
-}
\ No newline at end of file
+}
+
+export interface AnnouncementCreate {
+  subject: string;
+  content: string;
+  // Filters combine with AND; none means all active users
+  roles?: Array<'student' | 'supervisor' | 'admin' | 'system_admin'>;
+  program_types?: string[];
+  supervisor_ids?: number[];
+}
+
+export interface AnnouncementResult {
+  announcement_id: string;
+  recipients: number;
+}
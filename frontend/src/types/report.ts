@@ -11,6 +11,20 @@ export interface ReportPeriod {
   updated_at: string;
 }
 
+// Period as listed for supervisors, with the student and report (if any)
+export interface SupervisedReportPeriod extends ReportPeriod {
+  student_name?: string;
+  report_id?: number;
+  report_submitted_at?: string;
+}
+
+export interface ReportPeriodWindow {
+  period_type: ReportPeriod['period_type'];
+  start_date: string;
+  end_date: string;
+  periods: SupervisedReportPeriod[];
+}
+
 export enum ReportStatus {
   PENDING = 'PENDING',
   SUBMITTED = 'SUBMITTED',
@@ -52,6 +66,14 @@ export interface ReportEntryCreate {
   is_draft: boolean;
 }
 
+export interface ReportPatchOperation {
+  op: 'add' | 'replace' | 'remove' | 'splice';
+  path: string;
+  value?: unknown;
+  offset?: number;
+  length?: number;
+}
+
 export interface QuickUpdate {
   status: 'steady_progress' | 'focus_week' | 'blocked';
   note?: string;
@@ -60,4 +82,27 @@ export interface QuickUpdate {
 export interface ReportComment {
   content: string;
   visibility: 'public' | 'private' | 'supervisor_only';
-}
\ No newline at end of file
+}
+
+export interface BatchItemResult {
+  report_id: number;
+  success: boolean;
+  comment_id?: number;
+  error?: string;
+}
+
+export interface BatchResult {
+  succeeded: number;
+  failed: number;
+  results: BatchItemResult[];
+}
+
+// Students x periods heatmap; `cells` is row-major (student, period start)
+export interface SubmissionMatrix {
+  version: string;
+  student_ids: number[];
+  period_starts: string[];
+  codes: Record<'none' | 'on_time' | 'late' | 'missing' | 'excused' | 'pending', number>;
+  encoding: 'base64' | 'array';
+  cells: string | number[];
+}